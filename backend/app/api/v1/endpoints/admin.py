@@ -2,15 +2,33 @@
 Admin endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import Annotated, List, Optional
 from bson import ObjectId
-from app.models.user import UserResponse, UserRole
+from app.models.user import UserResponse, UserRole, UserAdminUpdate
 from app.models.grievance import GrievanceResponse, GrievanceStatus, GrievancePriority, GrievanceCategory
-from app.api.v1.endpoints.auth import get_current_user
+from app.models.notification import NotificationBroadcast
+from app.api.v1.endpoints.auth import get_current_user, get_active_user, oauth2_scheme
+from app.core.config import settings
 from app.core.database import get_database
+from app.core.security import verify_token
+from app.core.indexes import explain_query_shapes
+from app.core.pagination import CursorPosition, NEWEST_FIRST, get_page_cursor, keyset_filter, set_next_cursor
+from app.services.reclassification_service import reclassification_service
+from app.services.ai_cache import ai_cache
+from app.services.ai_service import chat_stats
+from app.services.user_resolver import UserNameResolver
+from app.services.auth_service import AuthService
+from app.services.user_cache import user_cache
+from app.services.counter_service import counter_service, REBUILD_JOB_TYPE
+from app.services.job_queue import job_queue
+from app.services.unread_counter_service import unread_counter_service
+from app.services.fanout_service import fanout_service
+from app.services.notification_retention_service import notification_retention_service
+from app.services.geo_service import geo_service, precision_for_zoom
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timedelta
+import hmac
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,7 +55,9 @@ async def get_all_grievances(
     priority_filter: Optional[GrievancePriority] = Query(None),
     department_filter: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    position: Annotated[Optional[CursorPosition], Depends(get_page_cursor)] = None,
+    response: Response = None
 ):
     """Get all grievances with filters"""
     try:
@@ -53,16 +73,18 @@ async def get_all_grievances(
         if department_filter:
             filter_query["assigned_department"] = department_filter
         
-        # Get grievances
-        cursor = db.grievances.find(filter_query).sort("created_at", -1).skip(skip).limit(limit)
+        # Get grievances (keyset page when a cursor is given)
+        cursor = db.grievances.find(keyset_filter(filter_query, position)).sort(NEWEST_FIRST).skip(skip).limit(limit)
         grievances = await cursor.to_list(length=limit)
+        set_next_cursor(response, grievances, limit)
+        
+        # Resolve all citizen names on the page in one query
+        user_names = UserNameResolver(db)
+        await user_names.resolve(grievance["citizen_id"] for grievance in grievances)
         
-        # Get user names for each grievance
         grievance_responses = []
         for grievance in grievances:
-            # Get citizen name
-            citizen = await db.users.find_one({"_id": ObjectId(grievance["citizen_id"])})
-            citizen_name = citizen["full_name"] if citizen else "Unknown"
+            citizen_name = user_names.name(grievance["citizen_id"])
             
             grievance_responses.append(GrievanceResponse(
                 id=str(grievance["_id"]),
@@ -98,6 +120,99 @@ async def get_all_grievances(
         )
 
 
+@router.post("/grievances/reclassify", status_code=status.HTTP_202_ACCEPTED)
+async def reclassify_grievances(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    batch_size: Optional[int] = Query(None, ge=1, le=10000),
+    apply_changes: bool = Query(True),
+    reassign_pending: bool = Query(False),
+    resume_job_id: Optional[str] = Query(None)
+):
+    """Start (or resume) a background job that re-scores all grievances"""
+    try:
+        if current_user.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only admins can reclassify grievances"
+            )
+        
+        if resume_job_id:
+            try:
+                job = await reclassification_service.get_job(resume_job_id, db)
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid job ID format"
+                )
+            if not job:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Reclassification job not found"
+                )
+            if job["status"] == "completed":
+                return job
+        else:
+            job = await reclassification_service.create_job(
+                db,
+                batch_size=batch_size,
+                apply_changes=apply_changes,
+                reassign_pending=reassign_pending
+            )
+        
+        if not reclassification_service.start_job(job["_id"], db):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Reclassification job is already running"
+            )
+        
+        logger.info(f"Reclassification job {job['_id']} started by {current_user.email}")
+        return await reclassification_service.get_job(job["_id"], db)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting reclassification: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error starting reclassification"
+        )
+
+
+@router.get("/grievances/reclassify/{job_id}")
+async def get_reclassify_job(
+    job_id: str,
+    current_user: Annotated[UserResponse, Depends(require_admin_role)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+):
+    """Get reclassification job progress"""
+    try:
+        try:
+            job = await reclassification_service.get_job(job_id, db)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid job ID format"
+            )
+        
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Reclassification job not found"
+            )
+        
+        return job
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting reclassification job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting reclassification job"
+        )
+
+
 @router.put("/grievances/{grievance_id}/assign")
 async def assign_grievance(
     grievance_id: str,
@@ -133,10 +248,7 @@ async def assign_grievance(
             "updated_at": datetime.utcnow()
         }
         
-        await db.grievances.update_one(
-            {"_id": object_id},
-            {"$set": update_data}
-        )
+        await counter_service.update_grievance(db, {"_id": object_id}, update_data)
         
         # Create notification for department about assignment
         try:
@@ -144,8 +256,7 @@ async def assign_grievance(
             notification_service = NotificationService()
             
             # Get citizen name
-            citizen = await db.users.find_one({"_id": ObjectId(grievance["citizen_id"])})
-            citizen_name = citizen["full_name"] if citizen else "Unknown"
+            citizen_name = await UserNameResolver(db).get_name(grievance["citizen_id"])
             
             # Create assignment notification for department
             await notification_service.create_department_assignment_notification(
@@ -244,20 +355,13 @@ async def update_grievance_status(
         if status_value == "resolved":
             update_data["resolved_at"] = datetime.utcnow()
         
-        await db.grievances.update_one(
-            {"_id": ObjectId(grievance_id)},
-            {"$set": update_data}
-        )
+        await counter_service.update_grievance(db, {"_id": ObjectId(grievance_id)}, update_data)
         
         # Create notification for citizen about status update
         try:
             from app.services.notification_service import NotificationService
             notification_service = NotificationService()
             
-            # Get citizen name
-            citizen = await db.users.find_one({"_id": ObjectId(grievance["citizen_id"])})
-            citizen_name = citizen["full_name"] if citizen else "Unknown"
-            
             # Create status update notification
             await notification_service.create_citizen_notification(
                 citizen_id=str(grievance["citizen_id"]),
@@ -291,58 +395,21 @@ async def get_admin_stats(
 ):
     """Get admin statistics"""
     try:
-        # Get total counts
-        total_grievances = await db.grievances.count_documents({})
-        pending_grievances = await db.grievances.count_documents({"status": "pending"})
-        in_progress_grievances = await db.grievances.count_documents({"status": "in_progress"})
-        resolved_grievances = await db.grievances.count_documents({"status": "resolved"})
-        rejected_grievances = await db.grievances.count_documents({"status": "rejected"})
-        
-        # Get counts by category
-        category_pipeline = [
-            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
-        ]
-        category_cursor = db.grievances.aggregate(category_pipeline)
-        category_results = await category_cursor.to_list(length=None)
-        by_category = {result["_id"]: result["count"] for result in category_results}
-        
-        # Get counts by priority
-        priority_pipeline = [
-            {"$group": {"_id": "$priority", "count": {"$sum": 1}}}
-        ]
-        priority_cursor = db.grievances.aggregate(priority_pipeline)
-        priority_results = await priority_cursor.to_list(length=None)
-        by_priority = {result["_id"]: result["count"] for result in priority_results}
-        
-        # Get counts by department
-        department_pipeline = [
-            {"$match": {"assigned_department": {"$ne": None}}},
-            {"$group": {"_id": "$assigned_department", "count": {"$sum": 1}}}
-        ]
-        department_cursor = db.grievances.aggregate(department_pipeline)
-        department_results = await department_cursor.to_list(length=None)
-        by_department = {result["_id"]: result["count"] for result in department_results}
-        
-        # Get recent grievances (last 7 days)
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_grievances = await db.grievances.count_documents({
-            "created_at": {"$gte": week_ago}
-        })
-        
-        # Calculate resolution rate
-        resolution_rate = (resolved_grievances / total_grievances * 100) if total_grievances > 0 else 0
+        # Materialized counters: one document read regardless of grievance volume
+        stats = await counter_service.get_stats(db, recent_days=7)
         
         return {
-            "total_grievances": total_grievances,
-            "pending_grievances": pending_grievances,
-            "in_progress_grievances": in_progress_grievances,
-            "resolved_grievances": resolved_grievances,
-            "rejected_grievances": rejected_grievances,
-            "by_category": by_category,
-            "by_priority": by_priority,
-            "by_department": by_department,
-            "recent_grievances": recent_grievances,
-            "resolution_rate": round(resolution_rate, 2)
+            "total_grievances": stats["total"],
+            "pending_grievances": stats["pending"],
+            "in_progress_grievances": stats["in_progress"],
+            "resolved_grievances": stats["resolved"],
+            "rejected_grievances": stats["rejected"],
+            "by_category": stats["by_category"],
+            "by_priority": stats["by_priority"],
+            "by_department": stats["by_department"],
+            "recent_grievances": stats["recent"],
+            "resolution_rate": stats["resolution_rate"],
+            "avg_resolution_time": stats["avg_resolution_time"]
         }
         
     except Exception as e:
@@ -353,17 +420,329 @@ async def get_admin_stats(
         )
 
 
+@router.get("/stats/geo")
+async def get_geo_stats(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None,
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)] = None,
+    zoom: int = Query(12, ge=0, le=22, description="Web map zoom level; picks the cell precision"),
+    precision: Optional[int] = Query(
+        None, ge=settings.GEO_CELL_MIN_PRECISION, le=settings.GEO_CELL_MAX_PRECISION,
+        description="Geohash precision (overrides zoom)"
+    ),
+    west: Optional[float] = Query(None, ge=-180, le=180),
+    south: Optional[float] = Query(None, ge=-90, le=90),
+    east: Optional[float] = Query(None, ge=-180, le=180),
+    north: Optional[float] = Query(None, ge=-90, le=90)
+):
+    """Grievance counts by status and category per geohash cell, for heatmaps and clusters"""
+    try:
+        bounds = [west, south, east, north]
+        box = None
+        if any(value is not None for value in bounds):
+            if any(value is None for value in bounds) or west >= east or south >= north:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Give west, south, east and north together, with west < east and south < north"
+                )
+            box = (west, south, east, north)
+        
+        # Served from the incrementally maintained cell counters, never from raw grievances
+        return await geo_service.cell_stats(db, precision or precision_for_zoom(zoom), box)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting geo stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting geo statistics"
+        )
+
+
+@router.get("/stats/ai-cache")
+async def get_ai_cache_stats(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None
+):
+    """Get image analysis cache hit/miss counters"""
+    return ai_cache.stats()
+
+
+@router.get("/stats/chatbot")
+async def get_chatbot_stats(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None
+):
+    """Get chatbot time-to-first-token and total latency"""
+    return chat_stats()
+
+
+@router.get("/stats/user-cache")
+async def get_user_cache_stats(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None
+):
+    """Get authenticated-user cache hit/miss counters"""
+    return user_cache.stats()
+
+
+@router.get("/indexes/advisor")
+async def get_index_advisor_report(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None,
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)] = None
+):
+    """Explain every registered query shape and report collection scans and in-memory sorts"""
+    try:
+        return await explain_query_shapes(db)
+    except Exception as e:
+        logger.error(f"Error running index advisor: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error running index advisor"
+        )
+
+
+@router.get("/stats/counters/verify")
+async def verify_stats_counters(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None,
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)] = None
+):
+    """Compare materialized counters against a full scan of grievances"""
+    try:
+        return await counter_service.verify(db)
+    except Exception as e:
+        logger.error(f"Error verifying stats counters: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error verifying stats counters"
+        )
+
+
+@router.post("/stats/counters/rebuild", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_stats_counters(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None,
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)] = None
+):
+    """Queue the repair job that rebuilds materialized counters from scratch"""
+    try:
+        if current_user.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only admins can rebuild stats counters"
+            )
+        
+        job_id = await job_queue.enqueue(REBUILD_JOB_TYPE, {}, db, max_attempts=1)
+        return {"job_id": job_id, "status": "queued"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing stats counter rebuild: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error queueing stats counter rebuild"
+        )
+
+
+async def require_drain_caller(token: Annotated[str, Depends(oauth2_scheme)]):
+    """Admins, or a scheduler presenting JOB_QUEUE_DRAIN_SECRET as its bearer token"""
+    secret = settings.JOB_QUEUE_DRAIN_SECRET
+    if secret and hmac.compare_digest(token.encode(), secret.encode()):
+        return
+    current_user = await get_active_user(verify_token(token))
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can drain background jobs"
+        )
+
+
+# Vercel Cron issues GET requests
+@router.api_route("/jobs/drain", methods=["GET", "POST"], dependencies=[Depends(require_drain_caller)])
+async def drain_background_jobs(
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    limit: Optional[int] = Query(None, ge=1, le=500)
+):
+    """Run due background jobs in this request; serverless deployments have no workers"""
+    try:
+        return await job_queue.drain(db, limit=limit)
+        
+    except Exception as e:
+        logger.error(f"Error draining background jobs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error draining background jobs"
+        )
+
+
+@router.post("/notifications/broadcast", status_code=status.HTTP_202_ACCEPTED)
+async def broadcast_notification(
+    broadcast: NotificationBroadcast,
+    current_user: Annotated[UserResponse, Depends(require_admin_role)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+):
+    """Start a background fan-out of one notification to everyone in a role, department or city"""
+    try:
+        if current_user.role == UserRole.DEPARTMENT_HEAD:
+            # Department heads can only announce to their own department
+            if broadcast.audience.department not in (None, current_user.department) or not current_user.department:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Department heads can only broadcast to their own department"
+                )
+            broadcast.audience.department = current_user.department
+        
+        fanout = await fanout_service.create_fanout(broadcast, db, created_by=current_user.id)
+        fanout_service.start_fanout(fanout["_id"], db)
+        
+        logger.info(f"Broadcast {fanout['_id']} started by {current_user.email}")
+        return await fanout_service.get_fanout(fanout["_id"], db)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting broadcast: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error starting broadcast"
+        )
+
+
+@router.get("/notifications/broadcast/{fanout_id}")
+async def get_broadcast_progress(
+    fanout_id: str,
+    current_user: Annotated[UserResponse, Depends(require_admin_role)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+):
+    """Get progress of a broadcast"""
+    try:
+        if not ObjectId.is_valid(fanout_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid broadcast ID format"
+            )
+        
+        fanout = await fanout_service.get_fanout(fanout_id, db)
+        if not fanout:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Broadcast not found"
+            )
+        return fanout
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting broadcast progress: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting broadcast progress"
+        )
+
+
+@router.post("/notifications/broadcast/{fanout_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_broadcast(
+    fanout_id: str,
+    current_user: Annotated[UserResponse, Depends(require_admin_role)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+):
+    """Resume an interrupted or failed broadcast from its last checkpoint"""
+    try:
+        if not ObjectId.is_valid(fanout_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid broadcast ID format"
+            )
+        
+        fanout = await fanout_service.get_fanout(fanout_id, db)
+        if not fanout:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Broadcast not found"
+            )
+        if fanout["status"] == "completed":
+            return fanout
+        
+        if not fanout_service.start_fanout(fanout_id, db):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Broadcast is already running"
+            )
+        return await fanout_service.get_fanout(fanout_id, db)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming broadcast: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error resuming broadcast"
+        )
+
+
+@router.post("/notifications/counters/reconcile")
+async def reconcile_notification_counters(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None,
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)] = None
+):
+    """Recount unread notifications now and fix drifted per-user counters"""
+    try:
+        if current_user.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only admins can reconcile notification counters"
+            )
+        
+        result = await unread_counter_service.reconcile(db)
+        return {**result, "cache": unread_counter_service.stats()}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reconciling notification counters: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error reconciling notification counters"
+        )
+
+
+@router.post("/notifications/retention/run")
+async def run_notification_retention(
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None,
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)] = None
+):
+    """Archive stale unread notifications and trim inboxes over the per-user cap now"""
+    try:
+        if current_user.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only admins can run notification retention"
+            )
+        
+        result = await notification_retention_service.run(db)
+        return {**result, "stats": await notification_retention_service.stats(db)}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error running notification retention: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error running notification retention"
+        )
+
+
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
     current_user: Annotated[UserResponse, Depends(require_admin_role)] = None,
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    position: Annotated[Optional[CursorPosition], Depends(get_page_cursor)] = None,
+    response: Response = None
 ):
     """Get all users"""
     try:
-        cursor = db.users.find({}).sort("created_at", -1).skip(skip).limit(limit)
+        cursor = db.users.find(keyset_filter({}, position)).sort(NEWEST_FIRST).skip(skip).limit(limit)
         users = await cursor.to_list(length=limit)
+        set_next_cursor(response, users, limit)
         
         user_responses = []
         for user in users:
@@ -389,3 +768,52 @@ async def get_all_users(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error getting users"
         )
+
+
+@router.put("/users/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: str,
+    user_update: UserAdminUpdate,
+    current_user: Annotated[UserResponse, Depends(require_admin_role)] = None
+):
+    """Update a user's role, department or status (Admin only)"""
+    try:
+        if current_user.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only admins can update users"
+            )
+        
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format"
+            )
+        
+        updates = {
+            field: value.value if hasattr(value, "value") else value
+            for field, value in user_update.dict(exclude_unset=True).items()
+        }
+        if not updates:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No fields to update"
+            )
+        
+        user = await AuthService().update_user(user_id, updates)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        return user
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating user: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error updating user"
+        )
@@ -2,24 +2,28 @@
 Authentication endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import Annotated
-from app.models.user import UserCreate, UserResponse, UserLogin, Token
+from typing import Annotated, Optional
+from app.models.user import UserCreate, UserResponse, UserLogin, Token, UserStatus
 from app.services.auth_service import AuthService
-from app.core.security import verify_token, TokenData
+from app.services.user_cache import user_cache
+from app.core.security import verify_token, TokenData, STREAM_TICKET_PURPOSE
 from app.core.database import get_database
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
-) -> UserResponse:
-    """Get current authenticated user"""
+async def get_token_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
+    """Decoded token claims (id, email, role) without a database lookup"""
+    return verify_token(token)
+
+
+async def get_active_user(token_data: TokenData) -> UserResponse:
+    """Cached user for verified token claims; 401 unless the account is active"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -27,11 +31,16 @@ async def get_current_user(
     )
     
     try:
-        token_data = verify_token(token)
-        auth_service = AuthService()
-        user = await auth_service.get_user_by_id(token_data.user_id)
-        
+        user = user_cache.get(token_data.user_id, token_data.jti)
         if user is None:
+            auth_service = AuthService()
+            user = await auth_service.get_user_by_id(token_data.user_id)
+            if user is None:
+                raise credentials_exception
+            user_cache.set(token_data.user_id, token_data.jti, user)
+        
+        # Suspended/deactivated accounts lose access as soon as their cache entry is invalidated
+        if user.status != UserStatus.ACTIVE:
             raise credentials_exception
         
         return user
@@ -40,6 +49,34 @@ async def get_current_user(
         raise credentials_exception
 
 
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+) -> UserResponse:
+    """Get current authenticated user"""
+    return await get_active_user(verify_token(token))
+
+
+async def get_stream_user(
+    header_token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+    ticket: Optional[str] = Query(
+        None, description="Ticket from POST /notifications/stream/ticket, for clients like EventSource that can't set headers"
+    )
+) -> UserResponse:
+    """Active user from the Authorization header or a ?ticket= stream ticket (never an access token)"""
+    if header_token:
+        token_data = verify_token(header_token)
+    elif ticket:
+        token_data = verify_token(ticket, purpose=STREAM_TICKET_PURPOSE)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_active_user(token_data)
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate):
     """Register a new user"""
@@ -2,12 +2,14 @@
 Chatbot endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Annotated, Optional
+from typing import Annotated, AsyncIterator, Optional
 from app.models.user import UserResponse
 from app.api.v1.endpoints.auth import get_current_user
-from app.services.ai_service import AIService
+from app.services.ai_service import AIService, CHATBOT_FAQ
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,12 +30,35 @@ class ChatResponse(BaseModel):
     message_id: Optional[str] = None
 
 
+def wants_stream(request: Request, stream: bool) -> bool:
+    """Stream when asked via ?stream=true or an SSE Accept header"""
+    return stream or "text/event-stream" in request.headers.get("accept", "")
+
+
+async def sse_events(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wrap reply chunks as server-sent events"""
+    async for chunk in chunks:
+        yield f"data: {json.dumps({'delta': chunk})}\n\n"
+    yield f"data: {json.dumps({'done': True, 'message_id': None})}\n\n"
+
+
+def sse_response(chunks: AsyncIterator[str]) -> StreamingResponse:
+    """Server-sent events response for a streamed reply"""
+    return StreamingResponse(
+        sse_events(chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_bot(
     message_data: ChatMessage,
-    current_user: Annotated[UserResponse, Depends(get_current_user)] = None
+    request: Request,
+    current_user: Annotated[UserResponse, Depends(get_current_user)] = None,
+    stream: bool = Query(False)
 ):
-    """Chat with the AI bot"""
+    """Chat with the AI bot (SSE stream with Accept: text/event-stream or ?stream=true)"""
     try:
         # Add user context to the message
         user_context = {
@@ -46,6 +71,9 @@ async def chat_with_bot(
         if message_data.context:
             user_context.update(message_data.context)
         
+        if wants_stream(request, stream):
+            return sse_response(ai_service.stream_response(message_data.message, user_context))
+        
         # Generate response
         reply = await ai_service.generate_response(
             message_data.message, 
@@ -66,9 +94,16 @@ async def chat_with_bot(
 
 
 @router.post("/chat/guest", response_model=ChatResponse)
-async def chat_as_guest(message_data: ChatMessage):
+async def chat_as_guest(
+    message_data: ChatMessage,
+    request: Request,
+    stream: bool = Query(False)
+):
     """Chat with the AI bot as a guest (no authentication required)"""
     try:
+        if wants_stream(request, stream):
+            return sse_response(ai_service.stream_response(message_data.message))
+        
         # Generate response without user context
         reply = await ai_service.generate_response(message_data.message)
         
@@ -88,42 +123,7 @@ async def chat_as_guest(message_data: ChatMessage):
 @router.get("/faq")
 async def get_faq():
     """Get frequently asked questions"""
-    return {
-        "faq": [
-            {
-                "question": "How do I submit a complaint?",
-                "answer": "You can submit a complaint by logging in to your account, clicking on 'Submit New Grievance', filling out the form, and uploading relevant images."
-            },
-            {
-                "question": "How long does it take to resolve a complaint?",
-                "answer": "The resolution time varies depending on the type of issue. Simple issues may be resolved within 1-3 days, while complex infrastructure problems may take 1-2 weeks."
-            },
-            {
-                "question": "Can I track the status of my complaint?",
-                "answer": "Yes, you can track the status of your complaint in real-time through your dashboard. You'll also receive notifications when the status changes."
-            },
-            {
-                "question": "What types of issues can I report?",
-                "answer": "You can report various civic issues including potholes, street light problems, water supply issues, garbage collection problems, road damage, and other infrastructure-related concerns."
-            },
-            {
-                "question": "How do I know which department is handling my complaint?",
-                "answer": "The system automatically assigns complaints to the appropriate department based on the issue type. You can see the assigned department in your complaint details."
-            },
-            {
-                "question": "Can I upload photos with my complaint?",
-                "answer": "Yes, you can upload up to 5 photos with your complaint. Photos help us better understand the issue and resolve it faster."
-            },
-            {
-                "question": "What if my complaint is rejected?",
-                "answer": "If your complaint is rejected, you'll receive a notification with the reason. You can submit a new complaint with additional information or contact support for clarification."
-            },
-            {
-                "question": "How do I provide feedback on resolved complaints?",
-                "answer": "Once your complaint is resolved, you'll receive a notification asking for your feedback. You can rate the resolution and provide comments through your dashboard."
-            }
-        ]
-    }
+    return {"faq": CHATBOT_FAQ}
 
 
 @router.get("/help")
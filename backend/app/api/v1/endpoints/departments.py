@@ -2,16 +2,21 @@
 Department management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
 
 from app.core.database import get_database
+from app.core.pagination import CursorPosition, NEWEST_FIRST, get_page_cursor, keyset_filter, set_next_cursor
 from app.models.department import DepartmentCreate, DepartmentUpdate, DepartmentResponse, DepartmentInDB
 from app.models.user import UserResponse
 from app.api.v1.endpoints.auth import get_current_user
 from app.api.v1.endpoints.admin import require_admin_role
+from app.services.user_resolver import UserNameResolver
+from app.services.counter_service import counter_service, department_scope
+from app.services.search_service import search_service
+from app.services.department_catalog import department_catalog
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Annotated
 import logging
@@ -88,6 +93,14 @@ DEFAULT_DEPARTMENTS = [
 ]
 
 
+def _apply_counters(dept: dict, stats: Optional[dict]):
+    """Fill the department's grievance totals from the materialized counters"""
+    if stats:
+        dept["total_grievances"] = stats["total"]
+        dept["resolved_grievances"] = stats["resolved"]
+        dept["avg_resolution_time"] = stats["avg_resolution_time"]
+
+
 @router.post("/initialize", response_model=List[DepartmentResponse])
 async def initialize_departments(
     current_user: Annotated[UserResponse, Depends(require_admin_role)],
@@ -118,6 +131,7 @@ async def initialize_departments(
             result = await db.departments.insert_one(dept_doc)
             dept_doc["_id"] = str(result.inserted_id)
             departments.append(DepartmentInDB(**dept_doc))
+        await department_catalog.load(db)
         
         logger.info(f"Initialized {len(departments)} departments")
         return [DepartmentResponse(**dept.dict()) for dept in departments]
@@ -139,23 +153,20 @@ async def get_departments(
     status_filter: Optional[str] = Query(None),
     search: Optional[str] = Query(None)
 ):
-    """Get all departments"""
+    """Get all departments (most relevant first when searching)"""
     try:
-        query = {}
-        
-        if status_filter:
-            query["status"] = status_filter
-        
         if search:
-            query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-                {"head_name": {"$regex": search, "$options": "i"}}
-            ]
+            matches = await search_service.search_departments(db, search, status_filter)
+        else:
+            await department_catalog.ensure_loaded(db)
+            matches = department_catalog.all(status_filter)
+        
+        department_stats = await counter_service.get_department_stats(db)
         
         departments = []
-        async for dept in db.departments.find(query).sort("name", 1):
+        for dept in matches:
             dept["id"] = str(dept["_id"])
+            _apply_counters(dept, department_stats.get(dept["name"]))
             departments.append(DepartmentResponse(**dept))
         
         return departments
@@ -176,7 +187,7 @@ async def get_department(
 ):
     """Get department by ID"""
     try:
-        dept = await db.departments.find_one({"_id": ObjectId(department_id)})
+        dept = await department_catalog.find(db, department_id)
         if not dept:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -184,6 +195,7 @@ async def get_department(
             )
         
         dept["id"] = str(dept["_id"])
+        _apply_counters(dept, await counter_service.get_stats(db, department_scope(dept["name"])))
         return DepartmentResponse(**dept)
         
     except HTTPException:
@@ -223,6 +235,8 @@ async def create_department(
         
         result = await db.departments.insert_one(dept_doc)
         dept_doc["_id"] = str(result.inserted_id)
+        dept_doc["id"] = dept_doc["_id"]
+        department_catalog.upsert(dict(dept_doc))
         
         return DepartmentResponse(**dept_doc)
         
@@ -265,7 +279,9 @@ async def update_department(
         
         # Get updated department
         updated_dept = await db.departments.find_one({"_id": ObjectId(department_id)})
+        department_catalog.upsert(dict(updated_dept))
         updated_dept["_id"] = str(updated_dept["_id"])
+        updated_dept["id"] = updated_dept["_id"]
         
         return DepartmentResponse(**updated_dept)
         
@@ -288,7 +304,7 @@ async def delete_department(
     """Delete department (Admin only)"""
     try:
         # Check if department exists
-        existing = await db.departments.find_one({"_id": ObjectId(department_id)})
+        existing = await department_catalog.find(db, department_id)
         if not existing:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -309,6 +325,7 @@ async def delete_department(
         
         # Delete department
         await db.departments.delete_one({"_id": ObjectId(department_id)})
+        department_catalog.remove(department_id)
         
         return {"message": "Department deleted successfully"}
         
@@ -329,12 +346,14 @@ async def get_department_grievances(
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
     status_filter: Optional[str] = Query(None),
     limit: int = Query(10, ge=1, le=100),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    position: Annotated[Optional[CursorPosition], Depends(get_page_cursor)] = None,
+    response: Response = None
 ):
     """Get grievances assigned to a department"""
     try:
         # Get department name
-        dept = await db.departments.find_one({"_id": ObjectId(department_id)})
+        dept = await department_catalog.find(db, department_id)
         if not dept:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -346,11 +365,12 @@ async def get_department_grievances(
         if status_filter:
             query["status"] = status_filter
         
-        # Get grievances
-        grievances = []
-        async for grievance in db.grievances.find(query).skip(skip).limit(limit).sort("created_at", -1):
+        # Get grievances (keyset page when a cursor is given)
+        cursor = db.grievances.find(keyset_filter(query, position)).sort(NEWEST_FIRST).skip(skip).limit(limit)
+        grievances = await cursor.to_list(length=limit)
+        set_next_cursor(response, grievances, limit)
+        for grievance in grievances:
             grievance["_id"] = str(grievance["_id"])
-            grievances.append(grievance)
         
         return grievances
         
@@ -372,7 +392,9 @@ async def get_my_department_grievances(
     category_filter: Optional[str] = Query(None),
     priority_filter: Optional[str] = Query(None),
     limit: int = Query(10, ge=1, le=100),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    position: Annotated[Optional[CursorPosition], Depends(get_page_cursor)] = None,
+    response: Response = None
 ):
     """Get grievances assigned to the current user's department (for department heads)"""
     try:
@@ -393,14 +415,17 @@ async def get_my_department_grievances(
             query["priority"] = priority_filter
         
         # Get grievances
+        cursor = db.grievances.find(keyset_filter(query, position)).sort(NEWEST_FIRST).skip(skip).limit(limit)
+        page = await cursor.to_list(length=limit)
+        set_next_cursor(response, page, limit)
+        
+        # Resolve all citizen names on the page in one query
+        user_names = UserNameResolver(db)
+        await user_names.resolve(grievance["citizen_id"] for grievance in page)
+        
         grievances = []
-        async for grievance in db.grievances.find(query).skip(skip).limit(limit).sort("created_at", -1):
-            # Get citizen name
-            try:
-                citizen = await db.users.find_one({"_id": ObjectId(grievance["citizen_id"])})
-                citizen_name = citizen["full_name"] if citizen else "Unknown"
-            except Exception:
-                citizen_name = "Unknown"
+        for grievance in page:
+            citizen_name = user_names.name(grievance["citizen_id"])
             
             grievance_data = {
                 "id": str(grievance["_id"]),
@@ -448,52 +473,24 @@ async def get_department_stats(
     """Get department statistics"""
     try:
         # Get department name
-        dept = await db.departments.find_one({"_id": ObjectId(department_id)})
+        dept = await department_catalog.find(db, department_id)
         if not dept:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Department not found"
             )
         
-        # Get statistics
-        total_grievances = await db.grievances.count_documents({"assigned_department": dept["name"]})
-        pending_grievances = await db.grievances.count_documents({
-            "assigned_department": dept["name"],
-            "status": "pending"
-        })
-        in_progress_grievances = await db.grievances.count_documents({
-            "assigned_department": dept["name"],
-            "status": "in_progress"
-        })
-        resolved_grievances = await db.grievances.count_documents({
-            "assigned_department": dept["name"],
-            "status": "resolved"
-        })
-        
-        # Calculate average resolution time
-        resolved_grievances_with_dates = await db.grievances.find({
-            "assigned_department": dept["name"],
-            "status": "resolved",
-            "resolved_at": {"$exists": True}
-        }).to_list(length=None)
-        
-        avg_resolution_time = None
-        if resolved_grievances_with_dates:
-            total_days = 0
-            for grievance in resolved_grievances_with_dates:
-                if grievance.get("resolved_at") and grievance.get("created_at"):
-                    days = (grievance["resolved_at"] - grievance["created_at"]).days
-                    total_days += days
-            avg_resolution_time = total_days / len(resolved_grievances_with_dates)
+        # Materialized counters: one document read regardless of grievance volume
+        stats = await counter_service.get_stats(db, department_scope(dept["name"]))
         
         return {
             "department_name": dept["name"],
-            "total_grievances": total_grievances,
-            "pending_grievances": pending_grievances,
-            "in_progress_grievances": in_progress_grievances,
-            "resolved_grievances": resolved_grievances,
-            "avg_resolution_time_days": avg_resolution_time,
-            "resolution_rate": (resolved_grievances / total_grievances * 100) if total_grievances > 0 else 0
+            "total_grievances": stats["total"],
+            "pending_grievances": stats["pending"],
+            "in_progress_grievances": stats["in_progress"],
+            "resolved_grievances": stats["resolved"],
+            "avg_resolution_time_days": stats["avg_resolution_time"],
+            "resolution_rate": stats["resolution_rate"]
         }
         
     except HTTPException:
@@ -2,17 +2,26 @@
 Grievance endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import Annotated, List, Optional
 from app.models.user import UserResponse
 from app.models.grievance import (
     GrievanceCreate, GrievanceResponse, GrievanceUpdateRequest, 
-    GrievanceStats, GrievanceStatus, GrievancePriority, GrievanceCategory
+    GrievanceStats, GrievanceStatus, GrievancePriority, GrievanceCategory, GrievanceMapPoint, GrievanceSearchHit
 )
 from app.api.v1.endpoints.auth import get_current_user
+from app.core.config import settings
 from app.core.database import get_database
+from app.core.pagination import (
+    CursorPosition, NEWEST_FIRST, NEXT_CURSOR_HEADER, get_page_cursor, keyset_filter, set_next_cursor
+)
 from app.services.auto_assignment_service import auto_assignment_service
-from app.services.notification_service import NotificationService
+from app.services.job_queue import job_queue
+from app.services.counter_service import counter_service, citizen_scope
+from app.services.geo_service import geo_service, decode_nearby_cursor, NearbyPosition
+from app.services.duplicate_detector import duplicate_detector
+from app.services.search_service import search_service
+from app.services.user_resolver import UserNameResolver
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime
 from bson import ObjectId
@@ -22,16 +31,124 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Shown to a supporter whose own report is no longer kept on the grievance
+SUPPORTER_REPORT_FALLBACK = "Your report was added to this grievance."
+
+
+def _grievance_response(grievance: dict, citizen_name: str) -> GrievanceResponse:
+    """Full view of a grievance, for its reporter, its department and admins"""
+    return GrievanceResponse(
+        id=str(grievance["_id"]),
+        title=grievance["title"],
+        description=grievance["description"],
+        category=grievance["category"],
+        priority=grievance["priority"],
+        location=grievance["location"],
+        images=grievance["images"],
+        citizen_id=grievance["citizen_id"],
+        citizen_name=citizen_name,
+        status=grievance["status"],
+        assigned_department=grievance.get("assigned_department"),
+        assigned_to=grievance.get("assigned_to"),
+        created_at=grievance["created_at"],
+        updated_at=grievance["updated_at"],
+        resolved_at=grievance.get("resolved_at"),
+        ai_analysis=grievance.get("ai_analysis"),
+        comments=grievance.get("comments", []),
+        resolution_notes=grievance.get("resolution_notes"),
+        estimated_resolution_date=grievance.get("estimated_resolution_date"),
+        citizen_satisfaction=grievance.get("citizen_satisfaction"),
+        citizen_feedback=grievance.get("citizen_feedback"),
+        duplicate_count=grievance.get("duplicate_count", 0)
+    )
+
+
+def _supporter_view(
+    grievance: dict,
+    report: Optional[dict],
+    current_user: UserResponse,
+    attached: bool = False
+) -> GrievanceResponse:
+    """A grievance as shown to a citizen whose report was attached to it
+
+    Progress and handling come from the grievance; description, location and images are the
+    supporter's own report, and nothing identifies the original reporter.
+    """
+    report = report or {}
+    return GrievanceResponse(
+        id=str(grievance["_id"]),
+        title=grievance["title"],
+        description=report.get("description", SUPPORTER_REPORT_FALLBACK),
+        category=grievance["category"],
+        priority=grievance["priority"],
+        location=report.get("location", grievance["location"]),
+        images=report.get("images", []),
+        citizen_id=current_user.id,
+        citizen_name=current_user.full_name,
+        status=grievance["status"],
+        assigned_department=grievance.get("assigned_department"),
+        created_at=grievance["created_at"],
+        updated_at=grievance["updated_at"],
+        resolved_at=grievance.get("resolved_at"),
+        estimated_resolution_date=grievance.get("estimated_resolution_date"),
+        duplicate_count=grievance.get("duplicate_count", 0),
+        attached_to_existing=attached
+    )
+
 
 @router.post("/", response_model=GrievanceResponse, status_code=status.HTTP_201_CREATED)
 async def create_grievance(
     grievance_data: GrievanceCreate,
     current_user: Annotated[UserResponse, Depends(get_current_user)],
-    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    response: Response = None
 ):
-    """Create a new grievance"""
+    """Create a new grievance, or attach the report to an open grievance it duplicates"""
     try:
+        # Classify before inserting so the grievance is written once, already assigned
+        assignment = await auto_assignment_service.classify_new_grievance(
+            grievance_data.title, grievance_data.description, db
+        )
+        
+        # A report matching an open grievance about the same issue nearby becomes a "+1" on it
+        match = None
+        if settings.DUPLICATE_DETECTION_ENABLED:
+            try:
+                match = await duplicate_detector.find_duplicate(
+                    db,
+                    grievance_data.title,
+                    grievance_data.description,
+                    grievance_data.location.dict(),
+                    assignment.get("assigned_department")
+                )
+            except Exception as e:
+                logger.error(f"Error checking for duplicate grievances: {e}")
+        if match:
+            existing_id, score = match
+            report = {
+                "title": grievance_data.title,
+                "description": grievance_data.description,
+                "location": grievance_data.location.dict(),
+                "images": [img.dict() for img in grievance_data.images]
+            }
+            attachment = await duplicate_detector.attach_report(db, existing_id, current_user.id, report, score)
+            # A grievance closed since it was matched falls through to a new one
+            if attachment:
+                existing, attached = attachment
+                if attached:
+                    logger.info(f"Report from {current_user.id} attached to grievance {existing_id} (similarity {score:.2f})")
+                    try:
+                        await duplicate_detector.notify_supporter(existing, current_user.id, db)
+                    except Exception as e:
+                        logger.error(f"Error notifying citizen about attached report on {existing_id}: {e}")
+                if response is not None:
+                    response.status_code = status.HTTP_200_OK
+                if existing["citizen_id"] == current_user.id:
+                    return _grievance_response(existing, current_user.full_name)
+                return _supporter_view(existing, report, current_user, attached)
+        
         # Create grievance document
+        created_at = datetime.utcnow()
         grievance_doc = {
             "title": grievance_data.title,
             "description": grievance_data.description,
@@ -43,70 +160,61 @@ async def create_grievance(
             "status": "pending",
             "assigned_department": None,
             "assigned_to": None,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
+            "created_at": created_at,
+            "updated_at": created_at,
             "resolved_at": None,
             "ai_analysis": None,
             "comments": [],
             "resolution_notes": None,
             "estimated_resolution_date": None,
             "citizen_satisfaction": None,
-            "citizen_feedback": None
+            "citizen_feedback": None,
+            **assignment
         }
         
-        # Insert grievance
-        result = await db.grievances.insert_one(grievance_doc)
-        grievance_id = str(result.inserted_id)
+        # Insert grievance and bump the dashboard counters together
+        grievance_id = str(await counter_service.insert_grievance(db, grievance_doc))
         grievance_doc["_id"] = grievance_id
+        if settings.DUPLICATE_DETECTION_ENABLED:
+            duplicate_detector.remember(grievance_doc)
         
-        # Auto-assign grievance based on AI analysis
-        try:
-            assignment_result = await auto_assignment_service.analyze_and_assign_grievance(
-                grievance_id=grievance_id,
-                images=grievance_data.images,
-                title=grievance_data.title,
-                description=grievance_data.description,
-                citizen_name=current_user.full_name,
-                db=db
-            )
-            
-            if assignment_result["success"]:
-                # Update grievance with assignment results
-                await db.grievances.update_one(
-                    {"_id": ObjectId(grievance_id)},
-                    {"$set": {
-                        "assigned_department": assignment_result["assigned_department"],
-                        "ai_analysis": assignment_result["ai_analysis"],
-                        "updated_at": datetime.utcnow()
-                    }}
+        if not assignment:
+            # No departments to assign to yet; the queue retries the assignment
+            try:
+                await job_queue.enqueue(
+                    "auto_assign_grievance",
+                    {
+                        "grievance_id": grievance_id,
+                        "images": grievance_doc["images"],
+                        "title": grievance_data.title,
+                        "description": grievance_data.description,
+                        "citizen_name": current_user.full_name
+                    },
+                    db
                 )
-                logger.info(f"Grievance {grievance_id} auto-assigned to {assignment_result['assigned_department']}")
-            else:
-                logger.warning(f"Auto-assignment failed for grievance {grievance_id}: {assignment_result['message']}")
-                
-        except Exception as e:
-            logger.error(f"Error in auto-assignment for grievance {grievance_id}: {e}")
+            except Exception as e:
+                logger.error(f"Error queueing auto-assignment for grievance {grievance_id}: {e}")
         
-        # Create notification for citizen
+        # Citizen confirmation and department notifications in one insert_many
         try:
-            notification_service = NotificationService()
-            await notification_service.create_citizen_notification(
-                citizen_id=str(current_user.id),
-                grievance_id=grievance_id,
-                notification_type="grievance_created",
-                title="Grievance Submitted Successfully",
-                message=f"Your grievance '{grievance_data.title}' has been submitted and is being processed.",
-                db=db
-            )
+            await auto_assignment_service.notify_new_grievance(grievance_doc, current_user.full_name, db)
         except Exception as e:
-            logger.error(f"Error creating citizen notification: {e}")
+            logger.error(f"Error notifying about grievance {grievance_id}, retrying in the background: {e}")
+            try:
+                await job_queue.enqueue(
+                    "grievance_notifications",
+                    {"grievance_id": grievance_id, "citizen_name": current_user.full_name},
+                    db
+                )
+            except Exception as e:
+                logger.error(f"Error queueing notifications for grievance {grievance_id}: {e}")
         
         # Get citizen name
         citizen_name = current_user.full_name
         
         # Return grievance response
         return GrievanceResponse(
-            id=str(result.inserted_id),
+            id=grievance_id,
             title=grievance_doc["title"],
             description=grievance_doc["description"],
             category=grievance_doc["category"],
@@ -145,7 +253,9 @@ async def get_grievances(
     category_filter: Optional[GrievanceCategory] = Query(None),
     priority_filter: Optional[GrievancePriority] = Query(None),
     skip: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    position: Annotated[Optional[CursorPosition], Depends(get_page_cursor)] = None,
+    response: Response = None
 ):
     """Get grievances with optional filters"""
     try:
@@ -163,8 +273,9 @@ async def get_grievances(
             filter_query["priority"] = priority_filter.value
         
         # Get grievances
-        cursor = db.grievances.find(filter_query).sort("created_at", -1).skip(skip).limit(limit)
+        cursor = db.grievances.find(keyset_filter(filter_query, position)).sort(NEWEST_FIRST).skip(skip).limit(limit)
         grievances = await cursor.to_list(length=limit)
+        set_next_cursor(response, grievances, limit)
         logger.info(f"Found {len(grievances)} grievances for user {current_user.email}")
         
         # Convert to response format
@@ -210,6 +321,162 @@ async def get_grievances(
         )
 
 
+def get_nearby_cursor(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous nearby page")
+) -> Optional[NearbyPosition]:
+    """Dependency decoding the optional ?cursor= parameter of /nearby"""
+    if not cursor:
+        return None
+    try:
+        return decode_nearby_cursor(cursor)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def map_department_scope(current_user: UserResponse) -> Optional[str]:
+    """Department heads see their department's grievances; admins and citizens aren't department scoped"""
+    if current_user.role == "department_head":
+        return current_user.department or ""
+    return None
+
+
+def map_citizen_scope(current_user: UserResponse) -> Optional[str]:
+    """Citizens see only the grievances they reported or supported, as in GET and search"""
+    if current_user.role == "citizen":
+        return current_user.id
+    return None
+
+
+@router.get("/nearby", response_model=List[GrievanceMapPoint])
+async def get_nearby_grievances(
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    lng: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+    radius: float = Query(1000, gt=0, le=settings.GEO_MAX_RADIUS_METERS, description="meters"),
+    status_filter: Optional[GrievanceStatus] = Query(None),
+    category_filter: Optional[GrievanceCategory] = Query(None),
+    limit: int = Query(50, ge=1, le=settings.GEO_MAX_PAGE_SIZE),
+    position: Annotated[Optional[NearbyPosition], Depends(get_nearby_cursor)] = None,
+    response: Response = None
+):
+    """Grievances within `radius` meters of a point, nearest first"""
+    try:
+        points, next_cursor = await geo_service.nearby(
+            db,
+            lng=lng,
+            lat=lat,
+            radius=radius,
+            limit=limit,
+            status=status_filter.value if status_filter else None,
+            category=category_filter.value if category_filter else None,
+            department=map_department_scope(current_user),
+            citizen_id=map_citizen_scope(current_user),
+            position=position
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return points
+        
+    except Exception as e:
+        logger.error(f"Error getting nearby grievances: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting nearby grievances"
+        )
+
+
+@router.get("/within", response_model=List[GrievanceMapPoint])
+async def get_grievances_within_box(
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    west: float = Query(..., ge=-180, le=180),
+    south: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    status_filter: Optional[GrievanceStatus] = Query(None),
+    category_filter: Optional[GrievanceCategory] = Query(None),
+    limit: int = Query(100, ge=1, le=settings.GEO_MAX_PAGE_SIZE),
+    position: Annotated[Optional[CursorPosition], Depends(get_page_cursor)] = None,
+    response: Response = None
+):
+    """Grievances inside a map viewport (west, south, east, north), newest first"""
+    try:
+        if west >= east or south >= north:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bounding box must have west < east and south < north"
+            )
+        
+        grievances = await geo_service.within_box(
+            db,
+            west=west,
+            south=south,
+            east=east,
+            north=north,
+            limit=limit,
+            status=status_filter.value if status_filter else None,
+            category=category_filter.value if category_filter else None,
+            department=map_department_scope(current_user),
+            citizen_id=map_citizen_scope(current_user),
+            position=position
+        )
+        set_next_cursor(response, grievances, limit)
+        return [geo_service.to_point(grievance) for grievance in grievances]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting grievances within box: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting grievances within box"
+        )
+
+
+@router.get("/search", response_model=List[GrievanceSearchHit])
+async def search_grievances(
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
+    q: str = Query(..., min_length=2, max_length=200),
+    status_filter: Optional[GrievanceStatus] = Query(None),
+    category_filter: Optional[GrievanceCategory] = Query(None),
+    priority_filter: Optional[GrievancePriority] = Query(None),
+    department_filter: Optional[str] = Query(None, description="Admins only; department heads always see their own"),
+    skip: int = Query(0, ge=0, le=settings.SEARCH_MAX_SKIP),
+    limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE)
+):
+    """Full-text search over title, description, address and landmark, most relevant first"""
+    try:
+        # Citizens search their own and supported grievances, department heads their department's
+        citizen_id = map_citizen_scope(current_user)
+        department = map_department_scope(current_user)
+        if department is None and current_user.role == "admin":
+            department = department_filter
+        
+        return await search_service.search_grievances(
+            db,
+            q,
+            limit=limit,
+            skip=skip,
+            status=status_filter.value if status_filter else None,
+            category=category_filter.value if category_filter else None,
+            priority=priority_filter.value if priority_filter else None,
+            department=department,
+            citizen_id=citizen_id
+        )
+        
+    except Exception as e:
+        logger.error(f"Error searching grievances: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching grievances"
+        )
+
+
 @router.get("/{grievance_id}", response_model=GrievanceResponse)
 async def get_grievance(
     grievance_id: str,
@@ -230,9 +497,9 @@ async def get_grievance(
         # Build query based on user role
         query = {"_id": object_id}
         
-        # Citizens can only see their own grievances
+        # Citizens can see their own grievances and those their reports were attached to
         if current_user.role == "citizen":
-            query["citizen_id"] = current_user.id
+            query["$or"] = [{"citizen_id": current_user.id}, {"supporters": current_user.id}]
         # Department heads can see grievances assigned to their department
         elif current_user.role == "department_head":
             query["assigned_department"] = current_user.department
@@ -246,29 +513,11 @@ async def get_grievance(
                 detail="Grievance not found"
             )
         
-        return GrievanceResponse(
-            id=str(grievance["_id"]),
-            title=grievance["title"],
-            description=grievance["description"],
-            category=grievance["category"],
-            priority=grievance["priority"],
-            location=grievance["location"],
-            images=grievance["images"],
-            citizen_id=grievance["citizen_id"],
-            citizen_name=current_user.full_name,
-            status=grievance["status"],
-            assigned_department=grievance["assigned_department"],
-            assigned_to=grievance["assigned_to"],
-            created_at=grievance["created_at"],
-            updated_at=grievance["updated_at"],
-            resolved_at=grievance["resolved_at"],
-            ai_analysis=grievance["ai_analysis"],
-            comments=grievance["comments"],
-            resolution_notes=grievance["resolution_notes"],
-            estimated_resolution_date=grievance["estimated_resolution_date"],
-            citizen_satisfaction=grievance["citizen_satisfaction"],
-            citizen_feedback=grievance["citizen_feedback"]
-        )
+        if current_user.role == "citizen" and grievance["citizen_id"] != current_user.id:
+            own_reports = [r for r in grievance.get("duplicate_reports", []) if r.get("citizen_id") == current_user.id]
+            return _supporter_view(grievance, own_reports[-1] if own_reports else None, current_user)
+        
+        return _grievance_response(grievance, current_user.full_name)
         
     except HTTPException:
         raise
@@ -331,11 +580,8 @@ async def update_grievance(
         if grievance_update.location:
             update_data["location"] = grievance_update.location.dict()
         
-        # Update grievance
-        await db.grievances.update_one(
-            {"_id": object_id},
-            {"$set": update_data}
-        )
+        # Update grievance and the counters for any category/priority change
+        await counter_service.update_grievance(db, {"_id": object_id}, update_data)
         
         # Get updated grievance
         updated_grievance = await db.grievances.find_one({"_id": object_id})
@@ -381,64 +627,19 @@ async def get_grievance_stats(
 ):
     """Get grievance statistics for current user"""
     try:
-        # Get total count
-        total = await db.grievances.count_documents({"citizen_id": current_user.id})
-        
-        # Get counts by status
-        pending = await db.grievances.count_documents({
-            "citizen_id": current_user.id,
-            "status": "pending"
-        })
-        in_progress = await db.grievances.count_documents({
-            "citizen_id": current_user.id,
-            "status": "in_progress"
-        })
-        resolved = await db.grievances.count_documents({
-            "citizen_id": current_user.id,
-            "status": "resolved"
-        })
-        rejected = await db.grievances.count_documents({
-            "citizen_id": current_user.id,
-            "status": "rejected"
-        })
-        
-        # Get counts by category
-        category_pipeline = [
-            {"$match": {"citizen_id": current_user.id}},
-            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
-        ]
-        category_cursor = db.grievances.aggregate(category_pipeline)
-        category_results = await category_cursor.to_list(length=None)
-        by_category = {result["_id"]: result["count"] for result in category_results}
-        
-        # Get counts by priority
-        priority_pipeline = [
-            {"$match": {"citizen_id": current_user.id}},
-            {"$group": {"_id": "$priority", "count": {"$sum": 1}}}
-        ]
-        priority_cursor = db.grievances.aggregate(priority_pipeline)
-        priority_results = await priority_cursor.to_list(length=None)
-        by_priority = {result["_id"]: result["count"] for result in priority_results}
-        
-        # Get counts by department
-        department_pipeline = [
-            {"$match": {"citizen_id": current_user.id, "assigned_department": {"$ne": None}}},
-            {"$group": {"_id": "$assigned_department", "count": {"$sum": 1}}}
-        ]
-        department_cursor = db.grievances.aggregate(department_pipeline)
-        department_results = await department_cursor.to_list(length=None)
-        by_department = {result["_id"]: result["count"] for result in department_results}
+        # Materialized counters: one document read regardless of grievance volume
+        stats = await counter_service.get_stats(db, citizen_scope(current_user.id))
         
         return GrievanceStats(
-            total=total,
-            pending=pending,
-            in_progress=in_progress,
-            resolved=resolved,
-            rejected=rejected,
-            by_category=by_category,
-            by_priority=by_priority,
-            by_department=by_department,
-            avg_resolution_time=None  # TODO: Calculate average resolution time
+            total=stats["total"],
+            pending=stats["pending"],
+            in_progress=stats["in_progress"],
+            resolved=stats["resolved"],
+            rejected=stats["rejected"],
+            by_category=stats["by_category"],
+            by_priority=stats["by_priority"],
+            by_department=stats["by_department"],
+            avg_resolution_time=stats["avg_resolution_time"]
         )
         
     except Exception as e:
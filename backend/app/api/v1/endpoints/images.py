@@ -76,11 +76,8 @@ async def analyze_image(
         # Process image for AI analysis
         image_bytes = await image_service.process_image_for_ai(file)
         
-        # Analyze image with AI
-        ai_analysis = await ai_service.analyze_image(image_bytes)
-        
-        # Extract location if available
-        location_data = await ai_service.extract_location_from_image(image_bytes)
+        # Analyze image with AI and extract location (cached for duplicate uploads)
+        ai_analysis, location_data = await ai_service.analyze_image_with_location(image_bytes)
         
         return {
             "analysis": ai_analysis.dict(),
@@ -149,11 +146,8 @@ async def upload_and_analyze_image(
         # Process image for AI analysis
         image_bytes = await image_service.process_image_for_ai(file)
         
-        # Analyze image with AI
-        ai_analysis = await ai_service.analyze_image(image_bytes)
-        
-        # Extract location if available
-        location_data = await ai_service.extract_location_from_image(image_bytes)
+        # Analyze image with AI and extract location (cached for duplicate uploads)
+        ai_analysis, location_data = await ai_service.analyze_image_with_location(image_bytes)
         
         return {
             "image_metadata": image_metadata.dict(),
@@ -172,6 +166,54 @@ async def upload_and_analyze_image(
         )
 
 
+@router.post("/upload-multiple-and-analyze")
+async def upload_and_analyze_multiple_images(
+    files: List[UploadFile] = File(...),
+    current_user: Annotated[UserResponse, Depends(get_current_user)] = None
+):
+    """Upload multiple images and analyze them in one AI request"""
+    try:
+        if len(files) > 5:  # Limit to 5 images
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Maximum 5 images allowed"
+            )
+        
+        results = []
+        images = []
+        for file in files:
+            try:
+                image_metadata = await image_service.upload_image(file, folder="grievances")
+                image_bytes = await image_service.process_image_for_ai(file)
+            except Exception as e:
+                logger.error(f"Error uploading image {file.filename}: {e}")
+                # Continue with other images even if one fails
+                continue
+            
+            results.append({"image_metadata": image_metadata.dict()})
+            images.append(image_bytes)
+        
+        # Classify all uncached images with a single remote call
+        analyses = await ai_service.analyze_images_with_location(images)
+        for result, (ai_analysis, location_data) in zip(results, analyses):
+            result["ai_analysis"] = ai_analysis.dict()
+            result["location"] = location_data
+        
+        return {
+            "images": results,
+            "message": f"{len(results)} images uploaded and analyzed successfully"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading and analyzing images: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error uploading and analyzing images"
+        )
+
+
 @router.delete("/{public_id}")
 async def delete_image(
     public_id: str,
@@ -2,17 +2,24 @@
 Notification endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import Annotated, List, Optional
-from app.models.user import UserResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Annotated, AsyncIterator, List, Optional
+from app.models.user import UserResponse, TokenData
 from app.models.notification import (
     NotificationResponse, NotificationUpdate, NotificationCreate,
-    NotificationType, NotificationPriority
+    NotificationType, NotificationPriority, NotificationChannel, StreamTicket
 )
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, get_token_claims, get_stream_user
+from app.core.security import create_stream_ticket
 from app.services.notification_service import NotificationService
+from app.services.notification_hub import notification_hub
+from app.core.config import settings
 from app.core.database import get_database
+from app.core.pagination import CursorPosition, NEXT_CURSOR_HEADER, encode_cursor, get_page_cursor
 from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,7 +34,9 @@ async def get_notifications(
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)],
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    unread_only: bool = Query(False)
+    unread_only: bool = Query(False),
+    position: Annotated[Optional[CursorPosition], Depends(get_page_cursor)] = None,
+    response: Response = None
 ):
     """Get user's notifications"""
     try:
@@ -36,8 +45,12 @@ async def get_notifications(
             db=db,
             skip=skip,
             limit=limit,
-            unread_only=unread_only
+            unread_only=unread_only,
+            position=position
         )
+        if len(notifications) == limit:
+            last = notifications[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"created_at": last.created_at, "_id": last.id})
         return notifications
         
     except Exception as e:
@@ -50,12 +63,12 @@ async def get_notifications(
 
 @router.get("/unread-count")
 async def get_unread_count(
-    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    claims: Annotated[TokenData, Depends(get_token_claims)],
     db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
 ):
-    """Get count of unread notifications"""
+    """Get count of unread notifications (polled often, so token claims only)"""
     try:
-        count = await notification_service.get_unread_count(current_user.id, db)
+        count = await notification_service.get_unread_count(claims.user_id, db)
         return {"unread_count": count}
         
     except Exception as e:
@@ -66,14 +79,63 @@ async def get_unread_count(
         )
 
 
+async def notification_events(
+    request: Request,
+    user_id: str,
+    db: AsyncIOMotorDatabase
+) -> AsyncIterator[str]:
+    """Server-sent events: the unread count once, then each new notification"""
+    # Subscribe before reading the count so nothing created meanwhile is missed
+    queue = notification_hub.subscribe(user_id)
+    try:
+        count = await notification_service.get_unread_count(user_id, db)
+        yield f"event: unread_count\ndata: {json.dumps({'unread_count': count})}\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.NOTIFICATION_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: notification\nid: {event['id']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        notification_hub.unsubscribe(user_id, queue)
+
+
+@router.post("/stream/ticket", response_model=StreamTicket)
+async def create_notification_stream_ticket(
+    current_user: Annotated[UserResponse, Depends(get_current_user)]
+):
+    """Issue a short-lived ticket for opening /stream from clients that can't send headers"""
+    return StreamTicket(
+        ticket=create_stream_ticket(current_user.id, current_user.email, current_user.role),
+        expires_in=settings.NOTIFICATION_STREAM_TICKET_SECONDS
+    )
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    current_user: Annotated[UserResponse, Depends(get_stream_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
+):
+    """Push new notifications over server-sent events instead of polling"""
+    return StreamingResponse(
+        notification_events(request, current_user.id, db),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.put("/{notification_id}/read")
 async def mark_notification_read(
     notification_id: str,
-    current_user: Annotated[UserResponse, Depends(get_current_user)]
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
 ):
     """Mark a notification as read"""
     try:
-        success = await notification_service.mark_as_read(notification_id, current_user.id)
+        success = await notification_service.mark_as_read(notification_id, current_user.id, db)
         
         if success:
             return {"message": "Notification marked as read"}
@@ -95,11 +157,12 @@ async def mark_notification_read(
 
 @router.put("/mark-all-read")
 async def mark_all_notifications_read(
-    current_user: Annotated[UserResponse, Depends(get_current_user)]
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
 ):
     """Mark all notifications as read"""
     try:
-        count = await notification_service.mark_all_as_read(current_user.id)
+        count = await notification_service.mark_all_as_read(current_user.id, db)
         return {"message": f"Marked {count} notifications as read"}
         
     except Exception as e:
@@ -113,11 +176,12 @@ async def mark_all_notifications_read(
 @router.delete("/{notification_id}")
 async def delete_notification(
     notification_id: str,
-    current_user: Annotated[UserResponse, Depends(get_current_user)]
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
 ):
     """Delete a notification"""
     try:
-        success = await notification_service.delete_notification(notification_id, current_user.id)
+        success = await notification_service.delete_notification(notification_id, current_user.id, db)
         
         if success:
             return {"message": "Notification deleted"}
@@ -139,7 +203,8 @@ async def delete_notification(
 
 @router.post("/test")
 async def create_test_notification(
-    current_user: Annotated[UserResponse, Depends(get_current_user)]
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    db: Annotated[AsyncIOMotorDatabase, Depends(get_database)]
 ):
     """Create a test notification (for development)"""
     try:
@@ -148,12 +213,12 @@ async def create_test_notification(
             message="This is a test notification to verify the system is working.",
             type=NotificationType.SYSTEM_ANNOUNCEMENT,
             priority=NotificationPriority.MEDIUM,
-            channels=[NotificationType.IN_APP],
+            channels=[NotificationChannel.IN_APP],
             data={"test": True},
             user_id=current_user.id
         )
         
-        notification = await notification_service.create_notification(notification_data)
+        notification = await notification_service.create_notification(notification_data, db)
         return notification
         
     except Exception as e:
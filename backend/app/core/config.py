@@ -22,6 +22,10 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    USER_CACHE_TTL_SECONDS: float = 30.0  # 0 disables the authenticated-user cache
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    BCRYPT_ROUNDS: int = 12  # Changing it rehashes each password on the user's next login
+    PASSWORD_HASH_WORKERS: int = 4
     
     # CORS
     ALLOWED_HOSTS: List[str] = [
@@ -52,6 +56,8 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     EMAILS_FROM_EMAIL: Optional[str] = None
     EMAILS_FROM_NAME: Optional[str] = None
+    SMTP_POOL_SIZE: int = 2  # Reused SMTP connections per worker process
+    SMTP_TIMEOUT: float = 30.0
     
     # File Upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
@@ -60,10 +66,81 @@ class Settings(BaseSettings):
     # AI Configuration
     AI_CONFIDENCE_THRESHOLD: float = 0.7
     AUTO_ASSIGN_DEPARTMENTS: bool = True
+    DEPARTMENT_CACHE_TTL: float = 60.0  # seconds before the department catalog is reloaded (without the change stream)
+    DEPARTMENT_CHANGE_STREAM: bool = False  # Apply department writes from other workers at once (needs a replica set)
+    CLARIFAI_MAX_CONCURRENCY: int = 4
+    CLARIFAI_TIMEOUT: float = 15.0  # seconds per prediction call
+    AI_CACHE_MAX_ENTRIES: int = 2048
+    AI_CACHE_TTL_SECONDS: int = 30 * 24 * 60 * 60  # 30 days
+    
+    # Chatbot
+    CHATBOT_MAX_CONCURRENCY: int = 8
+    CHATBOT_TIMEOUT: float = 30.0  # seconds to first token / between chunks
+    CHATBOT_CACHE_MAX_ENTRIES: int = 1000
+    CHATBOT_CACHE_TTL_SECONDS: int = 3600
+    CHATBOT_FAQ_MATCHING: bool = False  # canned FAQ answers; off means exact repeats only
+    CHATBOT_FAQ_MATCH_THRESHOLD: float = 0.9  # Jaccard similarity of question keywords
+    
+    # Map queries
+    GEO_MAX_RADIUS_METERS: float = 50000.0
+    GEO_MAX_PAGE_SIZE: int = 500
+    GEO_CELL_MIN_PRECISION: int = 2  # Geohash precisions kept in the map cell rollup
+    GEO_CELL_MAX_PRECISION: int = 7  # ~150m cells
+    GEO_MAX_CELLS: int = 5000  # Cells returned by /admin/stats/geo
+    
+    # Full-text search
+    SEARCH_LANGUAGE: str = "english"  # Stemming and stop words of the text indexes
+    SEARCH_MAX_PAGE_SIZE: int = 100
+    SEARCH_MAX_SKIP: int = 1000  # Results past this are reached by narrowing the query
+    SEARCH_SNIPPET_LENGTH: int = 160  # Characters of description shown around the first match
+    
+    # Duplicate detection
+    DUPLICATE_DETECTION_ENABLED: bool = True
+    DUPLICATE_RADIUS_METERS: float = 100.0  # Open grievances this close are compared
+    DUPLICATE_SIMILARITY_THRESHOLD: float = 0.65  # Jaccard similarity of title + description words (see duplicate_benchmark.py)
+    DUPLICATE_MAX_CANDIDATES: int = 20  # Nearest open grievances compared per report
+    DUPLICATE_INDEX_MAX_PER_CITY: int = 10000  # Signatures kept per city; oldest evicted first
+    DUPLICATE_INDEX_MAX_CITIES: int = 100
+    
+    # Bulk reclassification
+    RECLASSIFY_BATCH_SIZE: int = 1000
+    RECLASSIFY_WORKERS: Optional[int] = None  # Defaults to CPU count
+    
+    # Background job queue
+    JOB_QUEUE_CONCURRENCY: int = 4
+    JOB_QUEUE_MAX_ATTEMPTS: int = 5
+    JOB_QUEUE_RETRY_BASE_DELAY: float = 2.0  # seconds, doubled per attempt
+    JOB_QUEUE_RETRY_MAX_DELAY: float = 300.0
+    JOB_QUEUE_JOB_TIMEOUT: float = 120.0
+    JOB_QUEUE_POLL_INTERVAL: float = 15.0
+    JOB_QUEUE_LEASE_SECONDS: float = 60.0  # claim lease, renewed every third; expired leases are re-queued
+    JOB_QUEUE_DRAIN_LIMIT: int = 20  # due jobs run per /admin/jobs/drain call
+    JOB_QUEUE_DRAIN_SECRET: Optional[str] = None  # bearer token a scheduler (cron) may drain with
     
     # Notification
     ENABLE_EMAIL_NOTIFICATIONS: bool = False
     ENABLE_PUSH_NOTIFICATIONS: bool = True
+    NOTIFICATION_STREAM_HEARTBEAT: float = 15.0  # seconds between SSE keep-alive comments
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 100  # per connection; oldest events dropped beyond this
+    NOTIFICATION_STREAM_TICKET_SECONDS: int = 60  # lifetime of the ?ticket= that opens a stream
+    NOTIFICATION_CHANGE_STREAM: bool = False  # Relay inserts between workers (needs a replica set)
+    NOTIFICATION_STREAM_RETRY_DELAY: float = 5.0
+    NOTIFICATION_UNREAD_CACHE_TTL: float = 5.0  # 0 disables the in-memory unread count cache
+    NOTIFICATION_UNREAD_CACHE_MAX_ENTRIES: int = 10000
+    NOTIFICATION_COUNTER_RECONCILE_INTERVAL: float = 3600.0  # 0 reconciles at startup only
+    NOTIFICATION_DISPATCH_BATCH_SIZE: int = 50
+    NOTIFICATION_DISPATCH_POLL_INTERVAL: float = 10.0  # seconds; local inserts wake workers immediately
+    NOTIFICATION_DISPATCH_LEASE_SECONDS: float = 120.0  # Claimed batches are retried after this if a worker dies
+    NOTIFICATION_DISPATCH_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_DISPATCH_RETRY_BASE_DELAY: float = 30.0  # seconds, doubled per attempt
+    NOTIFICATION_DISPATCH_RETRY_MAX_DELAY: float = 3600.0
+    NOTIFICATION_FANOUT_CHUNK_SIZE: int = 1000  # Recipients per insert_many
+    NOTIFICATION_READ_TTL_DAYS: int = 30  # Read notifications expire through a TTL index on read_at
+    NOTIFICATION_ARCHIVE_AFTER_DAYS: int = 90  # Older unread notifications move to notifications_archive
+    NOTIFICATION_ARCHIVE_TTL_DAYS: int = 365
+    NOTIFICATION_MAX_PER_USER: int = 500  # Oldest beyond this are archived; 0 disables the cap
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = 1000
+    NOTIFICATION_RETENTION_INTERVAL: float = 3600.0  # 0 runs at startup only
     
     class Config:
         env_file = ".env"
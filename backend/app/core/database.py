@@ -5,6 +5,7 @@ Database configuration and connection management
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 from app.core.config import settings
+from app.core.indexes import ensure_indexes
 import logging
 
 logger = logging.getLogger(__name__)
@@ -61,24 +62,8 @@ async def close_mongo_connection():
 async def create_indexes():
     """Create database indexes for better performance"""
     try:
-        # Users collection indexes
-        await database.users.create_index([("email", 1)], unique=True)
-        await database.users.create_index([("phone", 1)], unique=True, sparse=True)
-        
-        # Grievances collection indexes
-        await database.grievances.create_index([("citizen_id", 1)])
-        await database.grievances.create_index([("status", 1)])
-        await database.grievances.create_index([("category", 1)])
-        await database.grievances.create_index([("priority", 1)])
-        await database.grievances.create_index([("created_at", 1)])
-        await database.grievances.create_index([("location.coordinates", "2dsphere")])
-        
-        # Notifications collection indexes
-        await database.notifications.create_index([("user_id", 1)])
-        await database.notifications.create_index([("created_at", 1)])
-        
-        # Departments collection indexes
-        await database.departments.create_index([("name", 1)], unique=True)
+        # Compound indexes for every query shape, see app/core/indexes.py
+        await ensure_indexes(database)
         
         logger.info("📊 Database indexes created successfully")
         
@@ -0,0 +1,92 @@
+"""
+Geohash encoding and cell geometry for map rollups
+"""
+
+from typing import List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+BASE32_INDEX = {char: index for index, char in enumerate(BASE32)}
+
+# (west, south, east, north)
+Bounds = Tuple[float, float, float, float]
+
+
+def encode(lng: float, lat: float, precision: int) -> str:
+    """Geohash of a point, `precision` characters long"""
+    lng_range = [-180.0, 180.0]
+    lat_range = [-90.0, 90.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            bounds[0] = middle
+        else:
+            bits = bits * 2
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> Bounds:
+    """(west, south, east, north) of a geohash cell"""
+    lng_range = [-180.0, 180.0]
+    lat_range = [-90.0, 90.0]
+    even = True
+    for char in geohash:
+        value = BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            target = lng_range if even else lat_range
+            middle = (target[0] + target[1]) / 2
+            if (value >> shift) & 1:
+                target[0] = middle
+            else:
+                target[1] = middle
+            even = not even
+    return lng_range[0], lat_range[0], lng_range[1], lat_range[1]
+
+
+def center(geohash: str) -> Tuple[float, float]:
+    """[longitude, latitude] of a cell's centre"""
+    west, south, east, north = bounds(geohash)
+    return (west + east) / 2, (south + north) / 2
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(width, height) in degrees of cells at a precision"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 360.0 / (1 << lng_bits), 180.0 / (1 << lat_bits)
+
+
+def covering(box: Bounds, precision: int) -> List[str]:
+    """Every cell at `precision` that intersects a bounding box"""
+    west, south, east, north = box
+    width, height = cell_size(precision)
+    first_column = int((west + 180) // width)
+    last_column = int(min(east + 180, 360 - width / 2) // width)
+    first_row = int((south + 90) // height)
+    last_row = int(min(north + 90, 180 - height / 2) // height)
+    return [
+        encode(-180 + (column + 0.5) * width, -90 + (row + 0.5) * height, precision)
+        for row in range(first_row, last_row + 1)
+        for column in range(first_column, last_column + 1)
+    ]
+
+
+def covering_count(box: Bounds, precision: int) -> int:
+    """How many cells covering() would return, without encoding them"""
+    west, south, east, north = box
+    width, height = cell_size(precision)
+    columns = int(min(east + 180, 360 - width / 2) // width) - int((west + 180) // width) + 1
+    rows = int(min(north + 90, 180 - height / 2) // height) - int((south + 90) // height) + 1
+    return columns * rows
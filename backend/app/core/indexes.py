@@ -0,0 +1,239 @@
+"""
+Declarative index registry and query-shape advisor
+
+Every query shape the endpoints issue is listed in QUERY_SHAPES, and every
+index that serves them in INDEXES. Compound indexes follow the ESR rule:
+equality fields first, then the sort field, then range fields. List sorts
+end in _id so keyset pagination cursors are served by the same index.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+from app.core.pagination import NEWEST_FIRST
+
+logger = logging.getLogger(__name__)
+
+# {collection: [{"keys": [(field, direction)], **create_index options}]}
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "users": [
+        {"keys": [("email", 1)], "unique": True},
+        {"keys": [("phone", 1)], "unique": True, "sparse": True},
+        {"keys": [("role", 1), ("department", 1)]},
+        # Broadcast fan-out streams recipients in _id order
+        {"keys": [("role", 1), ("status", 1), ("_id", 1)]},
+        {"keys": [("department", 1), ("status", 1), ("_id", 1)]},
+        {"keys": [("created_at", -1), ("_id", -1)]},
+    ],
+    "grievances": [
+        # Citizen dashboard: citizen_id [+ status [+ category]], newest first
+        {"keys": [("citizen_id", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("citizen_id", 1), ("status", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("citizen_id", 1), ("status", 1), ("category", 1), ("created_at", -1), ("_id", -1)]},
+        # Admin list: one optional filter, newest first
+        {"keys": [("status", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("category", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("priority", 1), ("created_at", -1), ("_id", -1)]},
+        # Department list and active-grievance checks
+        {"keys": [("assigned_department", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("assigned_department", 1), ("status", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("created_at", -1), ("_id", -1)]},
+        {"keys": [("location.coordinates", "2dsphere")]},
+        # Citizens of a city for broadcasts (covered by the index)
+        {"keys": [("location.city", 1), ("citizen_id", 1)]},
+        # Full-text search; a collection holds at most one text index
+        {"keys": [("title", "text"), ("description", "text"), ("location.address", "text"), ("location.landmark", "text")],
+         "name": "grievance_text", "default_language": settings.SEARCH_LANGUAGE,
+         "weights": {"title": 10, "location.landmark": 5, "location.address": 3, "description": 1}},
+    ],
+    "notifications": [
+        {"keys": [("user_id", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("user_id", 1), ("is_read", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("created_at", 1)]},
+        # Outbox: notifications with external channels still to deliver
+        {"keys": [("pending_channels", 1)]},
+        # One notification per recipient and broadcast, so resumed fan-outs skip sent users
+        {"keys": [("fanout_id", 1), ("user_id", 1)], "unique": True,
+         "partialFilterExpression": {"fanout_id": {"$exists": True}}},
+        # Retention: read notifications expire; stale unread ones are archived oldest first
+        {"keys": [("read_at", 1)], "expireAfterSeconds": settings.NOTIFICATION_READ_TTL_DAYS * 24 * 60 * 60},
+        {"keys": [("is_read", 1), ("created_at", 1), ("_id", 1)]},
+    ],
+    "notifications_archive": [
+        {"keys": [("user_id", 1), ("created_at", -1), ("_id", -1)]},
+        {"keys": [("archived_at", 1)], "expireAfterSeconds": settings.NOTIFICATION_ARCHIVE_TTL_DAYS * 24 * 60 * 60},
+    ],
+    "departments": [
+        {"keys": [("name", 1)], "unique": True},
+        {"keys": [("name", "text"), ("description", "text"), ("head_name", "text"), ("categories", "text")],
+         "name": "department_text", "default_language": settings.SEARCH_LANGUAGE,
+         "weights": {"name": 10, "categories": 5, "head_name": 3, "description": 1}},
+    ],
+    "ai_cache": [
+        {"keys": [("phash", 1)]},
+        {"keys": [("created_at", 1)], "expireAfterSeconds": settings.AI_CACHE_TTL_SECONDS},
+    ],
+    "background_jobs": [
+        {"keys": [("status", 1), ("next_run_at", 1)]},
+        {"keys": [("status", 1), ("locked_until", 1)]},
+    ],
+    "grievance_counters": [
+        # Department documents and map cells are listed by scope
+        {"keys": [("scope", 1)]},
+    ],
+}
+
+SAMPLE_ID = "000000000000000000000000"
+
+INDEX_OPTIONS_CONFLICT = 85
+
+# Representative queries, explained by the advisor against the live indexes
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"name": "citizen grievances", "collection": "grievances",
+     "filter": {"citizen_id": SAMPLE_ID}, "sort": NEWEST_FIRST},
+    {"name": "citizen grievances by status", "collection": "grievances",
+     "filter": {"citizen_id": SAMPLE_ID, "status": "pending"}, "sort": NEWEST_FIRST},
+    {"name": "citizen grievances by status and category", "collection": "grievances",
+     "filter": {"citizen_id": SAMPLE_ID, "status": "pending", "category": "infrastructure"},
+     "sort": NEWEST_FIRST},
+    {"name": "all grievances", "collection": "grievances",
+     "filter": {}, "sort": NEWEST_FIRST},
+    {"name": "all grievances by status", "collection": "grievances",
+     "filter": {"status": "pending"}, "sort": NEWEST_FIRST},
+    {"name": "all grievances by category", "collection": "grievances",
+     "filter": {"category": "infrastructure"}, "sort": NEWEST_FIRST},
+    {"name": "all grievances by priority", "collection": "grievances",
+     "filter": {"priority": "high"}, "sort": NEWEST_FIRST},
+    {"name": "department grievances", "collection": "grievances",
+     "filter": {"assigned_department": "Municipal Corporation"}, "sort": NEWEST_FIRST},
+    {"name": "department grievances by status", "collection": "grievances",
+     "filter": {"assigned_department": "Municipal Corporation", "status": "pending"},
+     "sort": NEWEST_FIRST},
+    {"name": "department active grievances", "collection": "grievances",
+     "filter": {"assigned_department": "Municipal Corporation", "status": {"$in": ["pending", "in_progress"]}}},
+    {"name": "nearby grievances", "collection": "grievances",
+     "filter": {"location.coordinates": {"$nearSphere": {
+         "$geometry": {"type": "Point", "coordinates": [77.59, 12.97]}, "$maxDistance": 1000
+     }}}},
+    {"name": "duplicate candidates", "collection": "grievances",
+     "filter": {"location.coordinates": {"$nearSphere": {
+         "$geometry": {"type": "Point", "coordinates": [77.59, 12.97]}, "$maxDistance": 100
+     }}, "status": {"$in": ["pending", "in_progress"]}}},
+    {"name": "grievance search", "collection": "grievances",
+     "filter": {"$text": {"$search": "pothole"}}},
+    {"name": "grievance search by status", "collection": "grievances",
+     "filter": {"$text": {"$search": "pothole"}, "status": "pending"}},
+    {"name": "department search", "collection": "departments",
+     "filter": {"$text": {"$search": "water"}}},
+    {"name": "user notifications", "collection": "notifications",
+     "filter": {"user_id": SAMPLE_ID}, "sort": NEWEST_FIRST},
+    {"name": "unread notifications", "collection": "notifications",
+     "filter": {"user_id": SAMPLE_ID, "is_read": False}, "sort": NEWEST_FIRST},
+    {"name": "pending email notifications", "collection": "notifications",
+     "filter": {"pending_channels": "email", "delivery.email.next_attempt_at": {"$lte": datetime(2000, 1, 1)}}},
+    {"name": "stale unread notifications", "collection": "notifications",
+     "filter": {"is_read": False, "created_at": {"$lt": datetime(2000, 1, 1)}, "pending_channels.0": {"$exists": False}},
+     "sort": [("created_at", 1), ("_id", 1)]},
+    {"name": "oldest user notifications", "collection": "notifications",
+     "filter": {"user_id": SAMPLE_ID, "pending_channels.0": {"$exists": False}},
+     "sort": [("created_at", 1), ("_id", 1)]},
+    {"name": "department head lookup", "collection": "users",
+     "filter": {"role": "department_head", "department": "Municipal Corporation"}},
+    {"name": "broadcast recipients by role", "collection": "users",
+     "filter": {"role": "citizen", "status": "active"}, "sort": [("_id", 1)]},
+    {"name": "broadcast recipients by department", "collection": "users",
+     "filter": {"department": "Municipal Corporation", "status": "active"}, "sort": [("_id", 1)]},
+    {"name": "all users", "collection": "users",
+     "filter": {}, "sort": NEWEST_FIRST},
+    {"name": "department counters", "collection": "grievance_counters",
+     "filter": {"scope": "department"}},
+    {"name": "map cells", "collection": "grievance_counters",
+     "filter": {"scope": "geo6", "total": {"$gt": 0}}},
+    {"name": "due background jobs", "collection": "background_jobs",
+     "filter": {"status": "queued", "next_run_at": {"$lte": datetime(2000, 1, 1)}},
+     "sort": [("next_run_at", 1)]},
+    {"name": "expired job leases", "collection": "background_jobs",
+     "filter": {"status": "running", "locked_until": {"$lt": datetime(2000, 1, 1)}}},
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """Create every registered index (no-op for ones that already exist)"""
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            options = {key: value for key, value in index.items() if key != "keys"}
+            try:
+                await db[collection].create_index(index["keys"], **options)
+            except OperationFailure as e:
+                if e.code != INDEX_OPTIONS_CONFLICT or "expireAfterSeconds" not in options:
+                    raise
+                # A changed TTL setting: update the existing index in place
+                await db.command(
+                    "collMod", collection,
+                    index={"keyPattern": dict(index["keys"]), "expireAfterSeconds": options["expireAfterSeconds"]}
+                )
+
+
+def _plan_stages(plan: Any, stages: List[str], index_names: List[str]):
+    """Collect stage names and index names from a (possibly nested) explain plan"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        if "indexName" in plan:
+            index_names.append(plan["indexName"])
+        for value in plan.values():
+            _plan_stages(value, stages, index_names)
+    elif isinstance(plan, list):
+        for item in plan:
+            _plan_stages(item, stages, index_names)
+
+
+async def explain_query_shapes(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Explain each registered query shape and flag collection scans and in-memory sorts"""
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        entry = {"name": shape["name"], "collection": shape["collection"]}
+        try:
+            explain = await cursor.limit(10).explain()
+            stages: List[str] = []
+            index_names: List[str] = []
+            _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}), stages, index_names)
+            entry.update({
+                "indexes": sorted(set(index_names)),
+                "collscan": "COLLSCAN" in stages,
+                "in_memory_sort": "SORT" in stages,
+            })
+            entry["ok"] = not entry["collscan"] and not entry["in_memory_sort"]
+        except Exception as e:
+            logger.error(f"Error explaining query shape {shape['name']}: {e}")
+            entry.update({"ok": False, "error": str(e)})
+        report.append(entry)
+
+    unused = []
+    for collection, indexes in INDEXES.items():
+        registered = {tuple((field, direction) for field, direction in index["keys"]) for index in indexes}
+        # Text indexes report their keys as _fts/_ftsx, so they are matched by name
+        registered_names = {index["name"] for index in indexes if "name" in index}
+        try:
+            existing = await db[collection].index_information()
+        except Exception:
+            continue
+        for name, info in existing.items():
+            keys = tuple(
+                (field, direction if isinstance(direction, str) else int(direction))
+                for field, direction in info["key"]
+            )
+            if name != "_id_" and keys not in registered and name not in registered_names:
+                unused.append({"collection": collection, "index": name})
+
+    return {
+        "query_shapes": report,
+        "problems": [entry["name"] for entry in report if not entry["ok"]],
+        "unregistered_indexes": unused
+    }
@@ -0,0 +1,37 @@
+"""
+Lightweight in-process latency metrics
+"""
+
+from collections import deque
+from typing import Any, Dict
+
+
+class LatencyTracker:
+    """Rolling window of latency samples (seconds) with summary percentiles"""
+
+    def __init__(self, window: int = 1000):
+        self.samples: deque = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        """Record one sample"""
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Count plus avg/p50/p95/max over the window, in milliseconds"""
+        if not self.samples:
+            return {"count": self.count, "avg_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+
+        ordered = sorted(self.samples)
+
+        def percentile(fraction: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 2)
+
+        return {
+            "count": self.count,
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(ordered[-1] * 1000, 2)
+        }
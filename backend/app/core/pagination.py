@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination over (created_at, _id), newest first
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException, Query, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Sort order every cursor-paginated list uses; _id breaks created_at ties
+NEWEST_FIRST = [("created_at", -1), ("_id", -1)]
+
+CursorPosition = Tuple[datetime, ObjectId]
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Opaque token for the position just after `doc`"""
+    payload = json.dumps({"t": doc["created_at"].isoformat(), "id": str(doc["_id"])}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> CursorPosition:
+    """Inverse of encode_cursor; raises ValueError on a malformed token"""
+    padded = token + "=" * (-len(token) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+
+
+def get_page_cursor(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces skip")
+) -> Optional[CursorPosition]:
+    """Dependency decoding the optional ?cursor= parameter"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_filter(query: Dict[str, Any], position: Optional[CursorPosition]) -> Dict[str, Any]:
+    """Restrict a query to documents after the cursor position in NEWEST_FIRST order"""
+    if position is None:
+        return query
+    created_at, last_id = position
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}}
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+def next_cursor(docs: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """Cursor for the following page, or None when this page is the last"""
+    if len(docs) < limit or not docs:
+        return None
+    return encode_cursor(docs[-1])
+
+
+def set_next_cursor(response: Response, docs: List[Dict[str, Any]], limit: int):
+    """Expose the next page cursor as a response header (list bodies stay unchanged)"""
+    token = next_cursor(docs, limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
@@ -2,16 +2,24 @@
 Security utilities for authentication and authorization
 """
 
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings
 from app.models.user import TokenData
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Purpose claim of tokens that only open the notification stream
+STREAM_TICKET_PURPOSE = "notification_stream"
+
+# Password hashing; hashes with a different cost than BCRYPT_ROUNDS are flagged for rehash
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+_password_executor: Optional[ThreadPoolExecutor] = None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,6 +32,39 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_password_executor() -> ThreadPoolExecutor:
+    """Thread pool for bcrypt work (the bcrypt C code releases the GIL)"""
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt"
+        )
+    return _password_executor
+
+
+def shutdown_password_executor():
+    """Stop the password hashing pool"""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_executor(), pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password off the event loop; also returns a new hash when the stored one is outdated"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_executor(), pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -34,12 +75,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def verify_token(token: str) -> TokenData:
-    """Verify and decode a JWT token"""
+def create_stream_ticket(user_id: str, email: str, role: str) -> str:
+    """Create a short-lived token that only opens the notification stream (safe in a URL)"""
+    return create_access_token(
+        data={"sub": user_id, "email": email, "role": role, "purpose": STREAM_TICKET_PURPOSE},
+        expires_delta=timedelta(seconds=settings.NOTIFICATION_STREAM_TICKET_SECONDS)
+    )
+
+
+def verify_token(token: str, purpose: Optional[str] = None) -> TokenData:
+    """Verify and decode a JWT token (access tokens carry no purpose claim)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -52,10 +102,10 @@ def verify_token(token: str) -> TokenData:
         email: str = payload.get("email")
         role: str = payload.get("role")
         
-        if user_id is None or email is None:
+        if user_id is None or email is None or payload.get("purpose") != purpose:
             raise credentials_exception
             
-        token_data = TokenData(user_id=user_id, email=email, role=role)
+        token_data = TokenData(user_id=user_id, email=email, role=role, jti=payload.get("jti"))
         return token_data
         
     except JWTError:
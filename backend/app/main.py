@@ -10,9 +10,19 @@ from contextlib import asynccontextmanager
 import uvicorn
 
 from app.core.config import settings
-from app.core.database import connect_to_mongo, close_mongo_connection, database
+from app.core.database import connect_to_mongo, close_mongo_connection, database, get_database
 from app.api.v1.api import api_router
 from app.core.exceptions import add_exception_handlers
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.security import shutdown_password_executor
+from app.services.reclassification_service import reclassification_service
+from app.services.job_queue import job_queue
+from app.services.counter_service import counter_service
+from app.services.notification_hub import notification_hub
+from app.services.unread_counter_service import unread_counter_service
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_retention_service import notification_retention_service
+from app.services.department_catalog import department_catalog
 
 
 @asynccontextmanager
@@ -24,8 +34,50 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Warning: Could not connect to MongoDB: {e}")
         print("App will continue without database connection")
+    try:
+        await job_queue.start(get_database())
+    except Exception as e:
+        print(f"Warning: Background job queue not started: {e}")
+    try:
+        await department_catalog.load(get_database())
+    except Exception as e:
+        print(f"Warning: Could not load departments: {e}")
+    if settings.DEPARTMENT_CHANGE_STREAM:
+        try:
+            department_catalog.start(get_database())
+        except Exception as e:
+            print(f"Warning: Department change stream not started: {e}")
+    try:
+        await counter_service.ensure_initialized(get_database())
+    except Exception as e:
+        print(f"Warning: Could not check grievance counters: {e}")
+    try:
+        unread_counter_service.start(get_database())
+    except Exception as e:
+        print(f"Warning: Notification counter reconciler not started: {e}")
+    try:
+        notification_dispatcher.start(get_database())
+    except Exception as e:
+        print(f"Warning: Notification dispatcher not started: {e}")
+    try:
+        notification_retention_service.start(get_database())
+    except Exception as e:
+        print(f"Warning: Notification retention not started: {e}")
+    if settings.NOTIFICATION_CHANGE_STREAM:
+        try:
+            notification_hub.start(get_database())
+        except Exception as e:
+            print(f"Warning: Notification change stream not started: {e}")
     yield
     # Shutdown
+    await notification_hub.stop()
+    await department_catalog.stop()
+    await unread_counter_service.stop()
+    await notification_dispatcher.stop()
+    await notification_retention_service.stop()
+    await job_queue.stop()
+    reclassification_service.shutdown()
+    shutdown_password_executor()
     try:
         await close_mongo_connection()
     except Exception as e:
@@ -49,6 +101,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Add trusted host middleware (more permissive for development)
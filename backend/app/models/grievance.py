@@ -155,6 +155,37 @@ class GrievanceResponse(GrievanceBase):
     estimated_resolution_date: Optional[datetime] = None
     citizen_satisfaction: Optional[int] = None
     citizen_feedback: Optional[str] = None
+    duplicate_count: int = 0  # Reports from other citizens attached to this grievance
+    attached_to_existing: bool = False  # Set on create when the report joined an open grievance
+
+
+class GrievanceMapPoint(BaseModel):
+    """Map marker for a grievance (nearby and bounding-box queries)"""
+    id: str
+    title: str
+    category: GrievanceCategory
+    priority: GrievancePriority
+    status: GrievanceStatus
+    coordinates: List[float]  # [longitude, latitude]
+    address: Optional[str] = None
+    assigned_department: Optional[str] = None
+    created_at: datetime
+    distance: Optional[float] = None  # meters, nearby queries only
+
+
+class GrievanceSearchHit(BaseModel):
+    """Full-text search result, most relevant first"""
+    id: str
+    title: str
+    category: GrievanceCategory
+    priority: GrievancePriority
+    status: GrievanceStatus
+    address: Optional[str] = None
+    landmark: Optional[str] = None
+    assigned_department: Optional[str] = None
+    created_at: datetime
+    score: float  # MongoDB text score
+    highlights: Dict[str, str] = {}  # field -> HTML-escaped snippet with matches in <em>
 
 
 class GrievanceStats(BaseModel):
@@ -7,11 +7,13 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 from bson import ObjectId
+from app.models.user import UserRole
 
 
 class NotificationType(str, Enum):
     """Notification types"""
     GRIEVANCE_CREATED = "grievance_created"
+    GRIEVANCE_DUPLICATE = "grievance_duplicate"
     GRIEVANCE_ASSIGNED = "grievance_assigned"
     GRIEVANCE_STATUS_UPDATED = "grievance_status_updated"
     GRIEVANCE_RESOLVED = "grievance_resolved"
@@ -52,6 +54,19 @@ class NotificationCreate(NotificationBase):
     grievance_id: Optional[str] = None
 
 
+class NotificationAudience(BaseModel):
+    """Broadcast recipients; filters combine, and an empty audience means every active user"""
+    role: Optional[UserRole] = None
+    department: Optional[str] = Field(None, max_length=100)
+    city: Optional[str] = Field(None, max_length=100)  # Citizens who reported a grievance in the city
+
+
+class NotificationBroadcast(NotificationBase):
+    """Notification fanned out to an audience"""
+    type: NotificationType = NotificationType.SYSTEM_ANNOUNCEMENT
+    audience: NotificationAudience = NotificationAudience()
+
+
 class NotificationInDB(NotificationBase):
     """Notification model in database"""
     id: str = Field(alias="_id")
@@ -61,6 +76,7 @@ class NotificationInDB(NotificationBase):
     created_at: datetime
     read_at: Optional[datetime] = None
     sent_at: Optional[datetime] = None
+    pending_channels: list[NotificationChannel] = []  # External channels the dispatcher still has to deliver
     failed_channels: list[NotificationChannel] = []
     
     class Config:
@@ -83,6 +99,12 @@ class NotificationUpdate(BaseModel):
     is_read: Optional[bool] = None
 
 
+class StreamTicket(BaseModel):
+    """Short-lived ticket for opening the notification stream"""
+    ticket: str
+    expires_in: int
+
+
 class NotificationStats(BaseModel):
     """Notification statistics model"""
     total: int
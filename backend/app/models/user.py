@@ -48,6 +48,11 @@ class UserUpdate(BaseModel):
     status: Optional[UserStatus] = None
 
 
+class UserAdminUpdate(UserUpdate):
+    """User update model for admins"""
+    role: Optional[UserRole] = None
+
+
 class UserInDB(UserBase):
     """User model in database"""
     id: str = Field(alias="_id")
@@ -104,3 +109,4 @@ class TokenData(BaseModel):
     user_id: Optional[str] = None
     email: Optional[str] = None
     role: Optional[str] = None
+    jti: Optional[str] = None
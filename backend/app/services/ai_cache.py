@@ -0,0 +1,157 @@
+"""
+Content-addressed cache for image AI analysis results
+"""
+
+import hashlib
+import io
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from PIL import Image
+from app.core.config import settings
+from app.core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION = "ai_cache"
+
+
+def perceptual_hash(image_bytes: bytes) -> Optional[str]:
+    """64-bit difference hash; survives re-encoding and resizing of the same photo"""
+    try:
+        image = Image.open(io.BytesIO(image_bytes)).convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+        pixels = list(image.getdata())
+        bits = 0
+        for row in range(8):
+            for col in range(8):
+                bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+        # Flat images (blank walls, sky) give near-constant hashes that would collide
+        if not 8 <= bin(bits).count("1") <= 56:
+            return None
+        return f"{bits:016x}"
+    except Exception as e:
+        logger.error(f"Error computing perceptual hash: {e}")
+        return None
+
+
+class AICache:
+    """Two-tier (in-memory LRU + MongoDB TTL) cache for image analysis
+
+    Only the label analysis is cached. A perceptual hash also matches other photos of the
+    same scene, so anything read from the bytes themselves (EXIF location) is never shared.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries or settings.AI_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.AI_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._phash_index: Dict[str, str] = {}
+        self.counters = {"memory_hits": 0, "db_hits": 0, "phash_hits": 0, "misses": 0, "stores": 0}
+
+    def compute_keys(self, image_bytes: bytes) -> Tuple[str, Optional[str]]:
+        """Return (sha256, perceptual hash) of the normalized image bytes"""
+        return hashlib.sha256(image_bytes).hexdigest(), perceptual_hash(image_bytes)
+
+    def _get_db(self):
+        """Database tier is optional; the memory tier works without it"""
+        try:
+            return get_database()
+        except Exception:
+            return None
+
+    def _remember(self, sha256: str, phash: Optional[str], value: Dict[str, Any]):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._entries[sha256] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(sha256)
+        if phash:
+            self._phash_index[phash] = sha256
+        while len(self._entries) > self.max_entries:
+            evicted, (_, evicted_value) = self._entries.popitem(last=False)
+            evicted_phash = evicted_value.get("phash")
+            if evicted_phash and self._phash_index.get(evicted_phash) == evicted:
+                del self._phash_index[evicted_phash]
+
+    def _memory_get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Look up a live memory entry"""
+        entry = self._entries.get(sha256)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[sha256]
+            return None
+        self._entries.move_to_end(sha256)
+        return value
+
+    async def get(self, sha256: str, phash: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Look up a cached analysis by exact bytes, then by perceptual hash"""
+        value = self._memory_get(sha256)
+        if value is None and phash and phash in self._phash_index:
+            value = self._memory_get(self._phash_index[phash])
+            if value is not None:
+                self.counters["phash_hits"] += 1
+                return value
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+
+        db = self._get_db()
+        if db is not None:
+            try:
+                fresh_after = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+                doc = await db[CACHE_COLLECTION].find_one({"_id": sha256, "created_at": {"$gte": fresh_after}})
+                counter = "db_hits"
+                if doc is None and phash:
+                    doc = await db[CACHE_COLLECTION].find_one({"phash": phash, "created_at": {"$gte": fresh_after}})
+                    counter = "phash_hits"
+                if doc is not None:
+                    value = {"analysis": doc["analysis"], "phash": doc.get("phash")}
+                    self._remember(sha256, phash, value)
+                    self.counters[counter] += 1
+                    return value
+            except Exception as e:
+                logger.error(f"Error reading AI cache: {e}")
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(
+        self,
+        sha256: str,
+        phash: Optional[str],
+        analysis: Dict[str, Any]
+    ):
+        """Store an analysis in both tiers"""
+        value = {"analysis": analysis, "phash": phash}
+        self._remember(sha256, phash, value)
+        self.counters["stores"] += 1
+
+        db = self._get_db()
+        if db is not None:
+            try:
+                await db[CACHE_COLLECTION].replace_one(
+                    {"_id": sha256},
+                    {"phash": phash, "analysis": analysis, "created_at": datetime.utcnow()},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.error(f"Error writing AI cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory tier size"""
+        hits = self.counters["memory_hits"] + self.counters["db_hits"] + self.counters["phash_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Export singleton instance
+ai_cache = AICache()
@@ -2,26 +2,152 @@
 AI service for image analysis and classification
 """
 
-import os
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 try:
     from clarifai.client.model import Model
+    from clarifai.client.input import Inputs
     CLARIFAI_AVAILABLE = True
 except ImportError:
     CLARIFAI_AVAILABLE = False
     Model = None
+    Inputs = None
 
 try:
     import google.generativeai as genai
 except ImportError:
     # Fallback for older versions
     genai = None
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from app.core.config import settings
+from app.core.metrics import LatencyTracker
+from app.services.ai_cache import ai_cache
+from app.services.chat_cache import ChatResponseCache
 from app.models.grievance import AIAnalysis, GrievanceCategory, GrievancePriority
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared across AIService instances so the limit is process-wide
+_clarifai_executor: Optional[ThreadPoolExecutor] = None
+_clarifai_semaphore: Optional[asyncio.Semaphore] = None
+
+
+_chat_semaphore: Optional[asyncio.Semaphore] = None
+
+# Chatbot latency metrics
+chat_metrics = {
+    "time_to_first_token": LatencyTracker(),
+    "total": LatencyTracker()
+}
+chat_counters = {"errors": 0, "timeouts": 0}
+
+CHATBOT_UNAVAILABLE_REPLY = "I'm sorry, I'm not available right now. Please try again later."
+CHATBOT_EMPTY_REPLY = "I'm sorry, I couldn't generate a response. Please try again."
+CHATBOT_ERROR_REPLY = "I'm sorry, I'm having trouble responding right now. Please try again later."
+
+CHATBOT_SYSTEM_PROMPT = """
+            You are CivicConnect AI Assistant, a helpful and professional chatbot for citizens reporting civic issues in India.
+            
+            Your role is to assist citizens with:
+            - Reporting new civic issues (potholes, street lights, water supply, garbage, etc.)
+            - Tracking existing grievance status and progress
+            - Understanding the platform features and navigation
+            - Providing information about different issue categories
+            - Explaining the resolution process and timelines
+            - Helping with account management and settings
+            
+            Guidelines:
+            - Be friendly, professional, and empathetic
+            - Provide clear, actionable advice
+            - Use simple language that everyone can understand
+            - Ask clarifying questions when needed
+            - Always encourage citizens to report issues with photos and precise locations
+            - Explain the auto-assignment system to departments
+            - Mention that they can track progress in real-time
+            - If you don't know something, suggest contacting support or checking the help section
+            
+            Current user context: {user_role} - {user_name}
+            
+            Respond in a helpful, encouraging tone and provide specific guidance based on their role.
+            """
+
+
+CHATBOT_FAQ = [
+    {
+        "question": "How do I submit a complaint?",
+        "answer": "You can submit a complaint by logging in to your account, clicking on 'Submit New Grievance', filling out the form, and uploading relevant images."
+    },
+    {
+        "question": "How long does it take to resolve a complaint?",
+        "answer": "The resolution time varies depending on the type of issue. Simple issues may be resolved within 1-3 days, while complex infrastructure problems may take 1-2 weeks."
+    },
+    {
+        "question": "Can I track the status of my complaint?",
+        "answer": "Yes, you can track the status of your complaint in real-time through your dashboard. You'll also receive notifications when the status changes."
+    },
+    {
+        "question": "What types of issues can I report?",
+        "answer": "You can report various civic issues including potholes, street light problems, water supply issues, garbage collection problems, road damage, and other infrastructure-related concerns."
+    },
+    {
+        "question": "How do I know which department is handling my complaint?",
+        "answer": "The system automatically assigns complaints to the appropriate department based on the issue type. You can see the assigned department in your complaint details."
+    },
+    {
+        "question": "Can I upload photos with my complaint?",
+        "answer": "Yes, you can upload up to 5 photos with your complaint. Photos help us better understand the issue and resolve it faster."
+    },
+    {
+        "question": "What if my complaint is rejected?",
+        "answer": "If your complaint is rejected, you'll receive a notification with the reason. You can submit a new complaint with additional information or contact support for clarification."
+    },
+    {
+        "question": "How do I provide feedback on resolved complaints?",
+        "answer": "Once your complaint is resolved, you'll receive a notification asking for your feedback. You can rate the resolution and provide comments through your dashboard."
+    }
+]
+
+chat_cache = ChatResponseCache(faq_entries=CHATBOT_FAQ)
+
+
+def _get_chat_semaphore() -> asyncio.Semaphore:
+    """Cap on in-flight Gemini calls"""
+    global _chat_semaphore
+    if _chat_semaphore is None:
+        _chat_semaphore = asyncio.Semaphore(settings.CHATBOT_MAX_CONCURRENCY)
+    return _chat_semaphore
+
+
+def chat_stats() -> Dict[str, Any]:
+    """Chatbot latency, error and cache counters"""
+    return {
+        "time_to_first_token": chat_metrics["time_to_first_token"].summary(),
+        "total": chat_metrics["total"].summary(),
+        **chat_counters,
+        "cache": chat_cache.stats()
+    }
+
+
+def _get_clarifai_executor() -> ThreadPoolExecutor:
+    """Thread pool for blocking Clarifai SDK calls"""
+    global _clarifai_executor
+    if _clarifai_executor is None:
+        _clarifai_executor = ThreadPoolExecutor(
+            max_workers=settings.CLARIFAI_MAX_CONCURRENCY,
+            thread_name_prefix="clarifai"
+        )
+    return _clarifai_executor
+
+
+def _get_clarifai_semaphore() -> asyncio.Semaphore:
+    """Cap on in-flight Clarifai calls"""
+    global _clarifai_semaphore
+    if _clarifai_semaphore is None:
+        _clarifai_semaphore = asyncio.Semaphore(settings.CLARIFAI_MAX_CONCURRENCY)
+    return _clarifai_semaphore
+
 
 class AIService:
     """AI service for image analysis and classification"""
@@ -91,32 +217,96 @@ class AIService:
         try:
             # Get image classification from Clarifai
             clarifai_analysis = await self._analyze_with_clarifai(image_bytes)
-            
-            # Determine category based on keywords
-            category = self._determine_category(clarifai_analysis.get("labels", []))
-            
-            # Determine priority based on category and confidence
-            priority = self._determine_priority(category, clarifai_analysis.get("confidence", 0.0))
-            
-            # Suggest department based on category
-            suggested_department = self._suggest_department(category)
-            
-            return AIAnalysis(
-                category=category,
-                confidence=clarifai_analysis.get("confidence", 0.0),
-                labels=clarifai_analysis.get("labels", []),
-                auto_priority=priority,
-                suggested_department=suggested_department
-            )
+            return self._build_analysis(clarifai_analysis)
             
         except Exception as e:
             logger.error(f"Error analyzing image: {e}")
-            return AIAnalysis(
-                category="other",
-                confidence=0.0,
-                labels=[],
-                auto_priority=GrievancePriority.MEDIUM,
-                suggested_department=None
+            return self._empty_analysis()
+    
+    async def predict_batch(self, images: List[bytes]) -> List[AIAnalysis]:
+        """Analyze several images with a single Clarifai request"""
+        if not images:
+            return []
+        
+        try:
+            clarifai_analyses = await self._analyze_batch_with_clarifai(images)
+            return [self._build_analysis(analysis) for analysis in clarifai_analyses]
+            
+        except Exception as e:
+            logger.error(f"Error analyzing image batch: {e}")
+            return [self._empty_analysis() for _ in images]
+    
+    async def analyze_image_with_location(self, image_bytes: bytes) -> Tuple[AIAnalysis, Optional[Dict[str, float]]]:
+        """Analyze image and extract location, reusing cached results for duplicate uploads"""
+        return (await self.analyze_images_with_location([image_bytes]))[0]
+    
+    async def analyze_images_with_location(
+        self, 
+        images: List[bytes]
+    ) -> List[Tuple[AIAnalysis, Optional[Dict[str, float]]]]:
+        """Cached analysis for several images; only cache misses go to Clarifai, in one batch"""
+        keys = [ai_cache.compute_keys(image_bytes) for image_bytes in images]
+        analyses: List[Optional[AIAnalysis]] = []
+        for sha256, phash in keys:
+            cached = await ai_cache.get(sha256, phash)
+            analyses.append(AIAnalysis(**cached["analysis"]) if cached else None)
+        
+        misses = [index for index, analysis in enumerate(analyses) if analysis is None]
+        if misses:
+            if len(misses) == 1:
+                fresh = [await self.analyze_image(images[misses[0]])]
+            else:
+                fresh = await self.predict_batch([images[index] for index in misses])
+            
+            for index, ai_analysis in zip(misses, fresh):
+                analyses[index] = ai_analysis
+                # Failed or unavailable analyses have no labels; don't pin them in the cache
+                if ai_analysis.labels:
+                    sha256, phash = keys[index]
+                    await ai_cache.set(sha256, phash, ai_analysis.dict())
+        
+        # Location always comes from this upload's own EXIF, never from a similar cached photo
+        return [
+            (analysis, await self.extract_location_from_image(image_bytes))
+            for analysis, image_bytes in zip(analyses, images)
+        ]
+    
+    def _build_analysis(self, clarifai_analysis: Dict[str, Any]) -> AIAnalysis:
+        """Turn Clarifai labels into an AIAnalysis"""
+        # Determine category based on keywords
+        category = self._determine_category(clarifai_analysis.get("labels", []))
+        
+        # Determine priority based on category and confidence
+        priority = self._determine_priority(category, clarifai_analysis.get("confidence", 0.0))
+        
+        # Suggest department based on category
+        suggested_department = self._suggest_department(category)
+        
+        return AIAnalysis(
+            category=category,
+            confidence=clarifai_analysis.get("confidence", 0.0),
+            labels=clarifai_analysis.get("labels", []),
+            auto_priority=priority,
+            suggested_department=suggested_department
+        )
+    
+    def _empty_analysis(self) -> AIAnalysis:
+        """Fallback analysis when Clarifai fails"""
+        return AIAnalysis(
+            category="other",
+            confidence=0.0,
+            labels=[],
+            auto_priority=GrievancePriority.MEDIUM,
+            suggested_department=None
+        )
+    
+    async def _run_clarifai(self, func, *args):
+        """Run a blocking Clarifai call in the executor with a concurrency cap and timeout"""
+        loop = asyncio.get_running_loop()
+        async with _get_clarifai_semaphore():
+            return await asyncio.wait_for(
+                loop.run_in_executor(_get_clarifai_executor(), func, *args),
+                timeout=settings.CLARIFAI_TIMEOUT
             )
     
     async def _analyze_with_clarifai(self, image_bytes: bytes) -> Dict[str, Any]:
@@ -125,36 +315,63 @@ class AIService:
             return {"labels": [], "confidence": 0.0}
         
         try:
-            # Save image to temporary file
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp_file:
-                tmp_file.write(image_bytes)
-                tmp_file_path = tmp_file.name
-            
-            # Analyze with Clarifai
-            prediction = self.clarifai_model.predict_by_filepath(tmp_file_path, input_type="image")
-            concepts = prediction.outputs[0].data.concepts[:10]  # Top 10 concepts
-            
-            # Clean up temporary file
-            os.unlink(tmp_file_path)
-            
-            # Extract labels and confidences
-            labels = [c.name.lower() for c in concepts]
-            confidences = {c.name.lower(): c.value for c in concepts}
-            
-            # Calculate average confidence
-            avg_confidence = sum(confidences.values()) / len(confidences) if confidences else 0.0
-            
-            return {
-                "labels": labels,
-                "confidence": avg_confidence,
-                "concepts": [(c.name, c.value) for c in concepts]
-            }
+            # Send the in-memory bytes straight to the model
+            prediction = await self._run_clarifai(self._predict_bytes, image_bytes)
+            return self._parse_concepts(prediction.outputs[0].data.concepts)
             
+        except asyncio.TimeoutError:
+            logger.error(f"Clarifai analysis timed out after {settings.CLARIFAI_TIMEOUT}s")
+            return {"labels": [], "confidence": 0.0}
         except Exception as e:
             logger.error(f"Error with Clarifai analysis: {e}")
             return {"labels": [], "confidence": 0.0}
     
+    async def _analyze_batch_with_clarifai(self, images: List[bytes]) -> List[Dict[str, Any]]:
+        """Analyze several images using one Clarifai predict call"""
+        empty = [{"labels": [], "confidence": 0.0} for _ in images]
+        if not self.clarifai_model:
+            return empty
+        
+        try:
+            prediction = await self._run_clarifai(self._predict_batch, images)
+            return [self._parse_concepts(output.data.concepts) for output in prediction.outputs]
+            
+        except asyncio.TimeoutError:
+            logger.error(f"Clarifai batch analysis timed out after {settings.CLARIFAI_TIMEOUT}s")
+            return empty
+        except Exception as e:
+            logger.error(f"Error with Clarifai batch analysis: {e}")
+            return empty
+    
+    def _predict_bytes(self, image_bytes: bytes):
+        """Blocking single-image prediction (runs in the executor)"""
+        return self.clarifai_model.predict_by_bytes(image_bytes, input_type="image")
+    
+    def _predict_batch(self, images: List[bytes]):
+        """Blocking multi-image prediction (runs in the executor)"""
+        inputs = [
+            Inputs.get_input_from_bytes(input_id=f"image-{index}", image_bytes=image_bytes)
+            for index, image_bytes in enumerate(images)
+        ]
+        return self.clarifai_model.predict(inputs)
+    
+    def _parse_concepts(self, concepts) -> Dict[str, Any]:
+        """Extract labels and average confidence from Clarifai concepts"""
+        concepts = concepts[:10]  # Top 10 concepts
+        
+        # Extract labels and confidences
+        labels = [c.name.lower() for c in concepts]
+        confidences = {c.name.lower(): c.value for c in concepts}
+        
+        # Calculate average confidence
+        avg_confidence = sum(confidences.values()) / len(confidences) if confidences else 0.0
+        
+        return {
+            "labels": labels,
+            "confidence": avg_confidence,
+            "concepts": [(c.name, c.value) for c in concepts]
+        }
+    
     def _determine_category(self, labels: List[str]) -> str:
         """Determine category based on detected labels"""
         category_scores = {cat: 0 for cat in self.category_keywords.keys()}
@@ -204,58 +421,139 @@ class AIService:
         
         return department_mapping.get(category)
     
+    def _chat_available(self) -> bool:
+        """Whether the Gemini model is configured"""
+        return bool(self.google_api_key and getattr(self, "gemini_model", None))
+    
+    def _build_prompt(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Create context-aware prompt"""
+        if context:
+            user_role = context.get('user_role', 'citizen')
+            user_name = context.get('user_name', 'User')
+            context_str = f"\nContext: {context}"
+        else:
+            user_role = 'citizen'
+            user_name = 'User'
+            context_str = ""
+        
+        # Format the system prompt with user context
+        formatted_prompt = CHATBOT_SYSTEM_PROMPT.format(user_role=user_role, user_name=user_name)
+        return f"{formatted_prompt}{context_str}\nUser: {message}\nAssistant:"
+    
     async def generate_response(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
-        """Generate response using Gemini"""
-        if not self.google_api_key or not self.gemini_model:
-            return "I'm sorry, I'm not available right now. Please try again later."
+        """Generate response using Gemini without blocking the event loop"""
+        if not self._chat_available():
+            return CHATBOT_UNAVAILABLE_REPLY
+        
+        if context is not None:
+            reply, _ = await self._generate_reply(message, context)
+            return reply
         
+        # Context-free (guest) replies are the same for everyone, so serve them from cache
+        cached = chat_cache.lookup(message)
+        if cached is not None:
+            return cached
+        return await chat_cache.coalesce(message, lambda: self._generate_reply(message, None))
+    
+    async def _generate_reply(self, message: str, context: Optional[Dict[str, Any]]) -> Tuple[str, bool]:
+        """Call Gemini once; returns the reply and whether it is a real answer"""
+        prompt = self._build_prompt(message, context)
+        started = time.perf_counter()
         try:
-            # Create context-aware prompt
-            system_prompt = """
-            You are CivicConnect AI Assistant, a helpful and professional chatbot for citizens reporting civic issues in India.
-            
-            Your role is to assist citizens with:
-            - Reporting new civic issues (potholes, street lights, water supply, garbage, etc.)
-            - Tracking existing grievance status and progress
-            - Understanding the platform features and navigation
-            - Providing information about different issue categories
-            - Explaining the resolution process and timelines
-            - Helping with account management and settings
-            
-            Guidelines:
-            - Be friendly, professional, and empathetic
-            - Provide clear, actionable advice
-            - Use simple language that everyone can understand
-            - Ask clarifying questions when needed
-            - Always encourage citizens to report issues with photos and precise locations
-            - Explain the auto-assignment system to departments
-            - Mention that they can track progress in real-time
-            - If you don't know something, suggest contacting support or checking the help section
-            
-            Current user context: {user_role} - {user_name}
+            async with _get_chat_semaphore():
+                if hasattr(self.gemini_model, "generate_content_async"):
+                    call = self.gemini_model.generate_content_async(prompt)
+                else:
+                    call = asyncio.to_thread(self.gemini_model.generate_content, prompt)
+                response = await asyncio.wait_for(call, timeout=settings.CHATBOT_TIMEOUT)
             
-            Respond in a helpful, encouraging tone and provide specific guidance based on their role.
-            """
-            
-            if context:
-                user_role = context.get('user_role', 'citizen')
-                user_name = context.get('user_name', 'User')
-                context_str = f"\nContext: {context}"
-            else:
-                user_role = 'citizen'
-                user_name = 'User'
-                context_str = ""
+            elapsed = time.perf_counter() - started
+            chat_metrics["time_to_first_token"].record(elapsed)
+            chat_metrics["total"].record(elapsed)
+            if not response.text:
+                return CHATBOT_EMPTY_REPLY, False
+            return response.text, True
             
-            # Format the system prompt with user context
-            formatted_prompt = system_prompt.format(user_role=user_role, user_name=user_name)
-            prompt = f"{formatted_prompt}{context_str}\nUser: {message}\nAssistant:"
+        except asyncio.TimeoutError:
+            chat_counters["timeouts"] += 1
+            logger.error(f"Gemini response timed out after {settings.CHATBOT_TIMEOUT}s")
+            return CHATBOT_ERROR_REPLY, False
+        except Exception as e:
+            chat_counters["errors"] += 1
+            logger.error(f"Error generating response: {e}")
+            return CHATBOT_ERROR_REPLY, False
+    
+    async def stream_response(
+        self, 
+        message: str, 
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Stream response text chunks from Gemini as they are generated"""
+        if not self._chat_available():
+            yield CHATBOT_UNAVAILABLE_REPLY
+            return
+        
+        cacheable = context is None
+        if cacheable:
+            cached = chat_cache.lookup(message)
+            if cached is not None:
+                yield cached
+                return
+        
+        prompt = self._build_prompt(message, context)
+        started = time.perf_counter()
+        sent_any = False
+        streamed: List[str] = []
+        try:
+            async with _get_chat_semaphore():
+                if not hasattr(self.gemini_model, "generate_content_async"):
+                    # Older client without async support: offload and send the reply as one chunk
+                    response = await asyncio.wait_for(
+                        asyncio.to_thread(self.gemini_model.generate_content, prompt),
+                        timeout=settings.CHATBOT_TIMEOUT
+                    )
+                    chat_metrics["time_to_first_token"].record(time.perf_counter() - started)
+                    sent_any = True
+                    if cacheable and response.text:
+                        chat_cache.store(message, response.text)
+                    yield response.text or CHATBOT_EMPTY_REPLY
+                    return
+                
+                response = await asyncio.wait_for(
+                    self.gemini_model.generate_content_async(prompt, stream=True),
+                    timeout=settings.CHATBOT_TIMEOUT
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=settings.CHATBOT_TIMEOUT)
+                    except StopAsyncIteration:
+                        break
+                    if not chunk.text:
+                        continue
+                    if not sent_any:
+                        chat_metrics["time_to_first_token"].record(time.perf_counter() - started)
+                        sent_any = True
+                    streamed.append(chunk.text)
+                    yield chunk.text
             
-            response = self.gemini_model.generate_content(prompt)
-            return response.text or "I'm sorry, I couldn't generate a response. Please try again."
+            if not sent_any:
+                yield CHATBOT_EMPTY_REPLY
+            elif cacheable:
+                chat_cache.store(message, "".join(streamed))
             
+        except asyncio.TimeoutError:
+            chat_counters["timeouts"] += 1
+            logger.error(f"Gemini stream timed out after {settings.CHATBOT_TIMEOUT}s")
+            if not sent_any:
+                yield CHATBOT_ERROR_REPLY
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return "I'm sorry, I'm having trouble responding right now. Please try again later."
+            chat_counters["errors"] += 1
+            logger.error(f"Error streaming response: {e}")
+            if not sent_any:
+                yield CHATBOT_ERROR_REPLY
+        finally:
+            chat_metrics["total"].record(time.perf_counter() - started)
     
     async def extract_location_from_image(self, image_bytes: bytes) -> Optional[Dict[str, float]]:
         """Extract location information from image EXIF data"""
@@ -7,9 +7,10 @@ from typing import Optional, Dict, Any
 from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.database import get_database
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import hash_password, verify_and_update_password, create_access_token
 from app.models.user import UserCreate, UserInDB, UserResponse, UserLogin, Token
 from app.core.config import settings
+from app.services.user_cache import user_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,7 +49,7 @@ class AuthService:
                 "phone": user_data.phone,
                 "role": user_data.role.value,
                 "status": user_data.status.value,
-                "hashed_password": get_password_hash(user_data.password),
+                "hashed_password": await hash_password(user_data.password),
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow(),
                 "last_login": None,
@@ -96,16 +97,22 @@ class AuthService:
             logger.info(f"User found: {user['email']}")
             logger.info(f"Checking password for user: {user['email']}")
             
-            if not verify_password(password, user["hashed_password"]):
+            verified, new_hash = await verify_and_update_password(password, user["hashed_password"])
+            if not verified:
                 logger.warning(f"Password verification failed for user: {email}")
                 return None
             
             logger.info(f"Password verified for user: {email}")
             
-            # Update last login
+            # Update last login, upgrading the hash if BCRYPT_ROUNDS changed since it was made
+            updates = {"last_login": datetime.utcnow()}
+            if new_hash:
+                logger.info(f"Rehashing password for user: {email}")
+                updates["hashed_password"] = new_hash
+                user["hashed_password"] = new_hash
             await self.db.users.update_one(
                 {"_id": user["_id"]},
-                {"$set": {"last_login": datetime.utcnow()}}
+                {"$set": updates}
             )
             
             return UserInDB.from_mongo(user)
@@ -174,6 +181,17 @@ class AuthService:
             logger.error(f"Error getting user by ID: {e}")
             return None
     
+    async def update_user(self, user_id: str, updates: Dict[str, Any]) -> Optional[UserResponse]:
+        """Update a user's profile fields and drop their cached sessions"""
+        from bson import ObjectId
+        updates = {**updates, "updated_at": datetime.utcnow()}
+        result = await self.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": updates})
+        # Role, department and status are read from the cache on every request
+        user_cache.invalidate_user(user_id)
+        if result.matched_count == 0:
+            return None
+        return await self.get_user_by_id(user_id)
+    
     async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
         """Get user by email"""
         try:
@@ -302,7 +320,7 @@ class AuthService:
                     "phone": user_data["phone"],
                     "role": user_data["role"],
                     "status": user_data["status"],
-                    "hashed_password": get_password_hash(user_data["password"]),
+                    "hashed_password": await hash_password(user_data["password"]),
                     "created_at": datetime.utcnow(),
                     "updated_at": datetime.utcnow(),
                     "last_login": None,
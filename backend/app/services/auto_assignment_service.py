@@ -10,10 +10,16 @@ from app.services.ai_service import AIService
 from app.models.grievance import AIAnalysis, GrievanceCategory, GrievancePriority
 from app.models.notification import NotificationCreate
 from app.services.notification_service import NotificationService
+from app.services.text_classifier import text_classifier
+from app.services.job_queue import job_queue
+from app.services.counter_service import counter_service
+from app.services.department_catalog import department_catalog
 from bson import ObjectId
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_DEPARTMENT = "Municipal Corporation"
+
 
 class AutoAssignmentService:
     """Service for automatically assigning grievances to departments"""
@@ -22,6 +28,80 @@ class AutoAssignmentService:
         self.ai_service = AIService()
         self.notification_service = NotificationService()
     
+    async def resolve_department(
+        self,
+        suggested_department: Optional[str],
+        db: AsyncIOMotorDatabase,
+        category: Optional[str] = None
+    ) -> Optional[str]:
+        """The suggested department if it exists, else one handling the category, else the fallback
+
+        None when there are no departments.
+        """
+        await department_catalog.ensure_loaded(db)
+        if department_catalog.has(suggested_department):
+            return suggested_department
+        logger.warning(f"Suggested department {suggested_department} not found")
+        handlers = department_catalog.for_category(category)
+        if handlers:
+            return handlers[0]["name"]
+        if department_catalog.has(FALLBACK_DEPARTMENT):
+            return FALLBACK_DEPARTMENT
+        return None
+    
+    def assignment_fields(self, ai_analysis: AIAnalysis, department: str) -> Dict[str, Any]:
+        """Grievance fields set by an automatic assignment"""
+        fields = {
+            "ai_analysis": ai_analysis.dict(),
+            "assigned_department": department,
+            "assigned_to": None,  # Will be assigned by department head
+            "status": "pending"
+        }
+        
+        # Update category and priority if AI suggests different values
+        if ai_analysis.category != "other":
+            fields["category"] = ai_analysis.category
+        if ai_analysis.auto_priority:
+            fields["priority"] = ai_analysis.auto_priority.value
+        return fields
+    
+    async def classify_new_grievance(self, title: str, description: str, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Assignment fields for a grievance that is about to be inserted ({} when no department exists yet)"""
+        ai_analysis = await self._analyze_text_content(title, description)
+        department = await self.resolve_department(ai_analysis.suggested_department, db, ai_analysis.category)
+        if department is None:
+            return {}
+        return self.assignment_fields(ai_analysis, department)
+    
+    async def notify_new_grievance(self, grievance: Dict[str, Any], citizen_name: str, db: AsyncIOMotorDatabase) -> int:
+        """Citizen confirmation and department notifications for a new grievance, in one insert"""
+        grievance_id = str(grievance["_id"])
+        notifications = [
+            self.notification_service.citizen_notification(
+                citizen_id=str(grievance["citizen_id"]),
+                grievance_id=grievance_id,
+                notification_type="grievance_created",
+                title="Grievance Submitted Successfully",
+                message=f"Your grievance '{grievance['title']}' has been submitted and is being processed."
+            )
+        ]
+        if grievance.get("assigned_department"):
+            notifications += await self.notification_service.department_assignment_notifications(
+                grievance["assigned_department"], grievance_id, grievance["title"], citizen_name, db
+            )
+        return await self.notification_service.insert_notifications(notifications, db)
+    
+    async def run_notification_job(self, payload: Dict[str, Any], db: AsyncIOMotorDatabase) -> int:
+        """Background job handler retrying notify_new_grievance when the request could not write them"""
+        grievance = await db.grievances.find_one(
+            {"_id": ObjectId(payload["grievance_id"])},
+            {"title": 1, "citizen_id": 1, "assigned_department": 1}
+        )
+        if not grievance:
+            logger.warning(f"Grievance {payload['grievance_id']} no longer exists, skipping its notifications")
+            return 0
+        return await self.notify_new_grievance(grievance, payload["citizen_name"], db)
+    
     async def analyze_and_assign_grievance(
         self, 
         grievance_id: str, 
@@ -31,76 +111,41 @@ class AutoAssignmentService:
         citizen_name: str,
         db: AsyncIOMotorDatabase
     ) -> Dict[str, Any]:
-        """Analyze grievance and auto-assign to appropriate department"""
+        """Analyze an existing grievance and auto-assign it to the appropriate department"""
         try:
-            # Analyze images if available
-            ai_analysis = None
-            if images:
-                # Get the first image for analysis
-                first_image = images[0]
-                if first_image.get("url"):
-                    # For now, we'll use the description and title for analysis
-                    # In production, you'd download and analyze the actual image
-                    ai_analysis = await self._analyze_text_content(title, description)
-                else:
-                    ai_analysis = await self._analyze_text_content(title, description)
-            else:
-                ai_analysis = await self._analyze_text_content(title, description)
-            
-            # Get suggested department
-            suggested_department = ai_analysis.suggested_department
-            
-            # Verify department exists
-            department = await db.departments.find_one({"name": suggested_department})
-            if not department:
-                logger.warning(f"Suggested department {suggested_department} not found")
-                suggested_department = "Municipal Corporation"  # Fallback
-                department = await db.departments.find_one({"name": suggested_department})
+            # Images are not analyzed yet; title and description decide the department
+            ai_analysis = await self._analyze_text_content(title, description)
             
+            department = await self.resolve_department(ai_analysis.suggested_department, db, ai_analysis.category)
             if not department:
                 logger.error("No departments found in database")
                 return {
                     "success": False,
                     "message": "No departments available for assignment",
-                    "ai_analysis": ai_analysis.dict() if ai_analysis else None
+                    "ai_analysis": ai_analysis.dict()
                 }
             
             # Update grievance with AI analysis and assignment
-            update_data = {
-                "ai_analysis": ai_analysis.dict() if ai_analysis else None,
-                "assigned_department": suggested_department,
-                "assigned_to": None,  # Will be assigned by department head
-                "status": "pending",
-                "updated_at": datetime.utcnow()
-            }
+            update_data = {**self.assignment_fields(ai_analysis, department), "updated_at": datetime.utcnow()}
             
-            # Update category and priority if AI suggests different values
-            if ai_analysis and ai_analysis.category != "other":
-                update_data["category"] = ai_analysis.category
-            if ai_analysis and ai_analysis.auto_priority:
-                update_data["priority"] = ai_analysis.auto_priority.value
-            
-            await db.grievances.update_one(
-                {"_id": ObjectId(grievance_id)},
-                {"$set": update_data}
-            )
+            await counter_service.update_grievance(db, {"_id": ObjectId(grievance_id)}, update_data)
             
             # Create notification for department
             await self._create_department_notification(
                 grievance_id, 
-                suggested_department, 
+                department, 
                 title, 
                 citizen_name,
                 db
             )
             
-            logger.info(f"Grievance {grievance_id} auto-assigned to {suggested_department}")
+            logger.info(f"Grievance {grievance_id} auto-assigned to {department}")
             
             return {
                 "success": True,
-                "assigned_department": suggested_department,
-                "ai_analysis": ai_analysis.dict() if ai_analysis else None,
-                "message": f"Grievance auto-assigned to {suggested_department}"
+                "assigned_department": department,
+                "ai_analysis": ai_analysis.dict(),
+                "message": f"Grievance auto-assigned to {department}"
             }
             
         except Exception as e:
@@ -111,114 +156,24 @@ class AutoAssignmentService:
                 "ai_analysis": None
             }
     
+    async def run_assignment_job(self, payload: Dict[str, Any], db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Background job handler; raises so the queue retries failed assignments"""
+        result = await self.analyze_and_assign_grievance(
+            grievance_id=payload["grievance_id"],
+            images=payload.get("images", []),
+            title=payload["title"],
+            description=payload["description"],
+            citizen_name=payload["citizen_name"],
+            db=db
+        )
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        return result
+    
     async def _analyze_text_content(self, title: str, description: str) -> AIAnalysis:
         """Analyze text content to determine category and department"""
         try:
-            # Combine title and description for analysis
-            content = f"{title} {description}".lower()
-            
-            # Simple keyword-based analysis (in production, use more sophisticated NLP)
-            category_scores = {
-                "infrastructure": 0,
-                "utilities": 0,
-                "transportation": 0,
-                "environment": 0,
-                "safety": 0,
-                "other": 0
-            }
-            
-            # Infrastructure keywords
-            infrastructure_keywords = [
-                "pothole", "road", "street", "bridge", "sidewalk", "pavement", 
-                "crack", "hole", "asphalt", "concrete", "damaged", "broken"
-            ]
-            
-            # Utilities keywords (electrical infrastructure)
-            utilities_keywords = [
-                "street light", "lamp", "lighting", "power", "electricity", 
-                "electrical", "pole", "utility pole", "electricity pole", "power pole",
-                "electric pole", "wire", "cable", "transformer", "outage", "blackout", "voltage",
-                "fuse", "electrical hazard", "fallen pole", "broken wire", 
-                "exposed wire", "electrical emergency", "tangled", "hanging",
-                "dangerous", "hazard", "infrastructure", "utility", "power line",
-                "electrical line", "overhead", "downed", "electrical pole",
-                "water supply", "water", "pipe", "pipeline", "drainage", "sewer",
-                "water leak", "water shortage", "no water", "water problem"
-            ]
-            
-            # Transportation keywords
-            transportation_keywords = [
-                "traffic", "signal", "sign", "parking", "bus stop", "intersection",
-                "stoplight", "pedestrian", "crossing"
-            ]
-            
-            # Environment keywords
-            environment_keywords = [
-                "garbage", "trash", "waste", "drainage", "sewer", "dirty",
-                "litter", "dumpster", "cleaning", "sanitation", "dumping",
-                "pollution", "environment", "green", "park", "public space"
-            ]
-            
-            # Safety keywords
-            safety_keywords = [
-                "accident", "danger", "hazard", "unsafe", "emergency", "fire",
-                "flood", "water", "puddle", "risk"
-            ]
-            
-            # Score each category with weighted keywords
-            for keyword in infrastructure_keywords:
-                if keyword in content:
-                    # Give higher weight to more specific terms, but lower than electrical
-                    weight = 2 if keyword in ["broken", "damaged", "crack", "hole"] else 1
-                    category_scores["infrastructure"] += weight
-            
-            for keyword in utilities_keywords:
-                if keyword in content:
-                    # Give much higher weight to electrical-specific terms
-                    if keyword in ["electricity pole", "utility pole", "power pole", "electrical pole", "fallen pole", "electric pole"]:
-                        category_scores["utilities"] += 10  # Highest priority
-                    elif keyword in ["electricity", "electrical", "power", "wire", "cable", "transformer", "street light", "lighting"]:
-                        category_scores["utilities"] += 5
-                    elif keyword in ["pole"] and any(electrical_word in content for electrical_word in ["electric", "electrical", "power", "utility"]):
-                        category_scores["utilities"] += 8  # High weight for pole with electrical context
-                    elif keyword in ["water supply", "water", "pipe", "pipeline", "water leak", "water shortage", "no water", "water problem"]:
-                        category_scores["utilities"] += 3  # Water-related terms
-                    else:
-                        category_scores["utilities"] += 1
-            
-            for keyword in transportation_keywords:
-                if keyword in content:
-                    category_scores["transportation"] += 1
-            
-            for keyword in environment_keywords:
-                if keyword in content:
-                    # Give higher weight to environment keywords
-                    weight = 3 if keyword in ["garbage", "trash", "waste", "dumping", "pollution"] else 2
-                    category_scores["environment"] += weight
-            
-            for keyword in safety_keywords:
-                if keyword in content:
-                    category_scores["safety"] += 1
-            
-            # Determine category
-            if max(category_scores.values()) == 0:
-                category = "other"
-            else:
-                category = max(category_scores, key=category_scores.get)
-            
-            # Determine priority
-            priority = self._determine_priority(category, max(category_scores.values()) / 10)
-            
-            # Suggest department
-            suggested_department = self._suggest_department(category, content)
-            
-            return AIAnalysis(
-                category=category,
-                confidence=min(max(category_scores.values()) / 10, 1.0),
-                labels=[f"{cat}:{score}" for cat, score in category_scores.items() if score > 0],
-                auto_priority=priority,
-                suggested_department=suggested_department
-            )
+            return text_classifier.classify(title, description)
             
         except Exception as e:
             logger.error(f"Error analyzing text content: {e}")
@@ -227,51 +182,16 @@ class AutoAssignmentService:
                 confidence=0.0,
                 labels=[],
                 auto_priority=GrievancePriority.MEDIUM,
-                suggested_department="Municipal Corporation"
+                suggested_department=FALLBACK_DEPARTMENT
             )
     
     def _determine_priority(self, category: str, confidence: float) -> GrievancePriority:
         """Determine priority based on category and confidence"""
-        high_priority_categories = ["safety", "utilities"]
-        medium_priority_categories = ["infrastructure", "transportation"]
-        low_priority_categories = ["environment", "other"]
-        
-        if category in high_priority_categories:
-            return GrievancePriority.HIGH
-        elif category in medium_priority_categories:
-            return GrievancePriority.MEDIUM
-        elif category in low_priority_categories:
-            return GrievancePriority.LOW
-        else:
-            return GrievancePriority.MEDIUM
+        return text_classifier.determine_priority(category)
     
     def _suggest_department(self, category: str, content: str = "") -> str:
         """Suggest department based on category and content"""
-        # Check for water-related keywords in content
-        water_keywords = ["water supply", "water", "pipe", "pipeline", "water leak", "water shortage", "no water", "water problem", "drainage", "sewer"]
-        has_water_keywords = any(keyword in content.lower() for keyword in water_keywords)
-        
-        # Check for electrical keywords in content
-        electrical_keywords = ["electricity", "electrical", "power", "street light", "lighting", "pole", "wire", "cable", "transformer"]
-        has_electrical_keywords = any(keyword in content.lower() for keyword in electrical_keywords)
-        
-        if category == "utilities":
-            if has_water_keywords and not has_electrical_keywords:
-                return "Water Supply Department"
-            elif has_electrical_keywords:
-                return "Electricity Department"
-            else:
-                return "Electricity Department"  # Default for utilities
-        
-        department_mapping = {
-            "infrastructure": "Public Works Department (PWD)",
-            "transportation": "Transport Department",
-            "environment": "Environment Department",
-            "safety": "Police Department",
-            "other": "Municipal Corporation"
-        }
-        
-        return department_mapping.get(category, "Municipal Corporation")
+        return text_classifier.suggest_department(category, text_classifier.find_terms(content.lower()))
     
     async def _create_department_notification(
         self, 
@@ -298,3 +218,5 @@ class AutoAssignmentService:
 
 # Export singleton instance
 auto_assignment_service = AutoAssignmentService()
+job_queue.register("auto_assign_grievance", auto_assignment_service.run_assignment_job)
+job_queue.register("grievance_notifications", auto_assignment_service.run_notification_job)
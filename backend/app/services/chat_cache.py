@@ -0,0 +1,144 @@
+"""
+Response cache for frequently asked chatbot questions
+"""
+
+import asyncio
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Words that carry no intent, dropped before FAQ keyword matching
+_FAQ_STOP_WORDS = frozenset(
+    "a an and are be can could do does for how i if in is it me my of on or please the "
+    "to what when where which who why will with would you your".split()
+)
+
+
+def normalize_question(message: str) -> str:
+    """Fold case, punctuation and whitespace so near-identical questions share a key"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", message.lower())).strip()
+
+
+def question_keywords(key: str) -> FrozenSet[str]:
+    """Content words of a normalized question"""
+    return frozenset(word for word in key.split() if word not in _FAQ_STOP_WORDS)
+
+
+class ChatResponseCache:
+    """TTL + LRU cache of replies keyed by normalized question, with optional FAQ matching"""
+
+    def __init__(
+        self,
+        faq_entries: Optional[List[Dict[str, str]]] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.max_entries = max_entries or settings.CHATBOT_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.CHATBOT_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._faq: List[Tuple[FrozenSet[str], str]] = [
+            (question_keywords(normalize_question(entry["question"])), entry["answer"])
+            for entry in (faq_entries or [])
+        ]
+        self.counters = {"hits": 0, "faq_hits": 0, "coalesced": 0, "misses": 0}
+
+    def lookup(self, message: str) -> Optional[str]:
+        """Return a cached or FAQ reply for the message, if any"""
+        key = normalize_question(message)
+        if not key:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, reply = entry
+            if expires_at >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return reply
+            del self._entries[key]
+
+        if settings.CHATBOT_FAQ_MATCHING and self._faq:
+            answer = self._match_faq(question_keywords(key))
+            if answer is not None:
+                self.counters["faq_hits"] += 1
+                return answer
+
+        self.counters["misses"] += 1
+        return None
+
+    def _match_faq(self, keywords: FrozenSet[str]) -> Optional[str]:
+        """Canned answer whose keywords the question shares almost entirely, if exactly one does
+
+        Matching is on content words rather than characters, so "upload photos" never
+        picks up the answer for "upload videos" the way a string ratio would.
+        """
+        if not keywords:
+            return None
+        matches = [
+            answer for faq_keywords, answer in self._faq
+            if len(keywords & faq_keywords) / len(keywords | faq_keywords)
+            >= settings.CHATBOT_FAQ_MATCH_THRESHOLD
+        ]
+        return matches[0] if len(matches) == 1 else None
+
+    def store(self, message: str, reply: str):
+        """Cache a reply, evicting the least recently used entry"""
+        key = normalize_question(message)
+        if not key:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def coalesce(
+        self,
+        message: str,
+        generate: Callable[[], Awaitable[Tuple[str, bool]]]
+    ) -> str:
+        """Share one model call between concurrent identical questions"""
+        key = normalize_question(message)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            reply, cacheable = await generate()
+            if cacheable:
+                self.store(message, reply)
+            future.set_result(reply)
+            return reply
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a future nobody else awaited doesn't log
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size"""
+        # Coalesced requests were counted as misses by lookup first
+        hits = self.counters["hits"] + self.counters["faq_hits"] + self.counters["coalesced"]
+        lookups = self.counters["hits"] + self.counters["faq_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
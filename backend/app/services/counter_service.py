@@ -0,0 +1,411 @@
+"""
+Materialized grievance counters maintained with $inc on every write
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from app.core import geohash
+from app.core.config import settings
+from app.models.grievance import GrievanceStatus
+from app.services.job_queue import job_queue
+from app.services.stats_service import MS_PER_DAY, stats_service
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "grievance_counters"
+GLOBAL_SCOPE = "global"
+REBUILD_JOB_TYPE = "rebuild_grievance_counters"
+
+# Fields a grievance's counter contribution depends on
+COUNTED_FIELDS = {
+    "status": 1, "category": 1, "priority": 1, "assigned_department": 1,
+    "citizen_id": 1, "created_at": 1, "resolved_at": 1, "location.coordinates": 1
+}
+
+GrievanceChange = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+# Performs grievance writes in a session (None without transactions) and returns their changes
+GrievanceWrite = Callable[[Any], Awaitable[List[GrievanceChange]]]
+
+
+def _field_key(value: str) -> str:
+    """Make a value safe to use as a sub-document key (no dots or leading $)"""
+    return value.replace(".", "\uff0e").lstrip("$")
+
+
+def _from_field_key(key: str) -> str:
+    """Reverse _field_key"""
+    return key.replace("\uff0e", ".")
+
+
+def department_scope(name: str) -> str:
+    """Counter document id for a department"""
+    return f"department:{name}"
+
+
+def citizen_scope(citizen_id: str) -> str:
+    """Counter document id for a citizen"""
+    return f"citizen:{citizen_id}"
+
+
+def geo_scope(cell: str) -> str:
+    """Counter document id for a geohash map cell (the scope names its precision)"""
+    return f"geo{len(cell)}:{cell}"
+
+
+def _geohash(grievance: Dict[str, Any]) -> Optional[str]:
+    """Geohash at the finest rollup precision, or None without valid coordinates"""
+    coordinates = (grievance.get("location") or {}).get("coordinates")
+    try:
+        lng, lat = (float(value) for value in coordinates)
+    except (TypeError, ValueError):
+        return None
+    if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+        return None
+    return geohash.encode(lng, lat, settings.GEO_CELL_MAX_PRECISION)
+
+
+class CounterService:
+    """Per-scope (global, department, citizen) rollups of grievance counts"""
+
+    def __init__(self):
+        self._transactions_supported: Optional[bool] = None
+        # Standalone servers have no snapshots, so a rebuild holds this process's writers instead
+        self._writes_resumed = asyncio.Event()
+        self._writes_resumed.set()
+        self._writes_idle = asyncio.Event()
+        self._writes_idle.set()
+        self._writes_in_flight = 0
+
+    def contributions(self, grievance: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """What one grievance adds to each counter document: {scope_id: {field: amount}}"""
+        if not grievance:
+            return {}
+
+        fields: Dict[str, int] = {"total": 1}
+        for field in ("status", "category", "priority"):
+            if grievance.get(field):
+                fields[f"{field}.{grievance[field]}"] = 1
+        if grievance.get("assigned_department"):
+            fields[f"department.{_field_key(grievance['assigned_department'])}"] = 1
+
+        created_at = grievance.get("created_at")
+        resolved_at = grievance.get("resolved_at")
+        if (
+            grievance.get("status") == GrievanceStatus.RESOLVED.value
+            and isinstance(created_at, datetime)
+            and isinstance(resolved_at, datetime)
+        ):
+            fields["resolution_count"] = 1
+            fields["resolution_ms"] = (resolved_at - created_at) // timedelta(milliseconds=1)
+
+        scopes = {GLOBAL_SCOPE: dict(fields)}
+        if isinstance(created_at, datetime):
+            scopes[GLOBAL_SCOPE][f"created_by_day.{created_at.strftime('%Y-%m-%d')}"] = 1
+        if grievance.get("assigned_department"):
+            scopes[department_scope(grievance["assigned_department"])] = dict(fields)
+        if grievance.get("citizen_id"):
+            scopes[citizen_scope(str(grievance["citizen_id"]))] = dict(fields)
+
+        # Map cells only count status and category, at every rollup precision
+        cell = _geohash(grievance)
+        if cell:
+            cell_fields = {
+                field: amount for field, amount in fields.items()
+                if field == "total" or field.startswith(("status.", "category."))
+            }
+            for precision in range(settings.GEO_CELL_MIN_PRECISION, settings.GEO_CELL_MAX_PRECISION + 1):
+                scopes[geo_scope(cell[:precision])] = dict(cell_fields)
+        return scopes
+
+    def deltas(self, changes: Iterable[GrievanceChange]) -> Dict[str, Dict[str, int]]:
+        """Net counter increments for a set of (before, after) grievance documents"""
+        totals: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for before, after in changes:
+            self._accumulate(totals, before, -1)
+            self._accumulate(totals, after, 1)
+        return self._nonzero(totals)
+
+    def _accumulate(self, totals: Dict[str, Dict[str, int]], grievance: Optional[Dict[str, Any]], sign: int):
+        """Add (sign=1) or remove (sign=-1) a grievance's contributions"""
+        for scope_id, fields in self.contributions(grievance).items():
+            for field, amount in fields.items():
+                totals[scope_id][field] += sign * amount
+
+    def _nonzero(self, totals: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+        """Drop zero increments and untouched scopes"""
+        return {
+            scope_id: {field: amount for field, amount in fields.items() if amount}
+            for scope_id, fields in totals.items()
+            if any(fields.values())
+        }
+
+    def _operations(self, deltas: Dict[str, Dict[str, int]]) -> List[UpdateOne]:
+        """One upserting $inc per touched counter document"""
+        operations = []
+        for scope_id, fields in deltas.items():
+            scope, _, key = scope_id.partition(":")
+            operations.append(UpdateOne(
+                {"_id": scope_id},
+                {
+                    "$inc": fields,
+                    "$set": {"updated_at": datetime.utcnow()},
+                    "$setOnInsert": {"scope": scope, "key": key or None}
+                },
+                upsert=True
+            ))
+        return operations
+
+    async def record_changes(
+        self,
+        db: AsyncIOMotorDatabase,
+        changes: Iterable[GrievanceChange],
+        session=None
+    ):
+        """Apply the counter increments for grievance writes"""
+        await self._apply(db, self.deltas(changes), session=session)
+
+    async def _apply(self, db: AsyncIOMotorDatabase, deltas: Dict[str, Dict[str, int]], session=None):
+        """Write counter increments in one unordered bulk write"""
+        operations = self._operations(deltas)
+        if operations:
+            await db[COUNTERS_COLLECTION].bulk_write(operations, ordered=False, session=session)
+
+    def _split_cells(self, deltas: Dict[str, Dict[str, int]]) -> Tuple[Dict, Dict]:
+        """Separate map cell increments from the dashboard counters"""
+        cells = {scope_id: fields for scope_id, fields in deltas.items() if scope_id.startswith("geo")}
+        return {scope_id: fields for scope_id, fields in deltas.items() if scope_id not in cells}, cells
+
+    async def record_change(
+        self,
+        db: AsyncIOMotorDatabase,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+        session=None
+    ):
+        """Apply the counter increments for one grievance write"""
+        await self.record_changes(db, [(before, after)], session=session)
+
+    async def _supports_transactions(self, db: AsyncIOMotorDatabase) -> bool:
+        """Transactions need a replica set or sharded cluster"""
+        if self._transactions_supported is None:
+            try:
+                hello = await db.client.admin.command("hello")
+                self._transactions_supported = bool(hello.get("setName") or hello.get("msg") == "isdbgrid")
+            except Exception:
+                self._transactions_supported = False
+            if not self._transactions_supported:
+                logger.warning("MongoDB deployment has no transactions; counters are updated without them")
+        return self._transactions_supported
+
+    @asynccontextmanager
+    async def _standalone_write(self):
+        """Wait out a rebuild scan in this process, then count the write as in flight"""
+        await self._writes_resumed.wait()
+        self._writes_in_flight += 1
+        self._writes_idle.clear()
+        try:
+            yield
+        finally:
+            self._writes_in_flight -= 1
+            if not self._writes_in_flight:
+                self._writes_idle.set()
+
+    async def record_write(self, db: AsyncIOMotorDatabase, write: GrievanceWrite) -> List[GrievanceChange]:
+        """Run grievance writes and their counter increments in one transaction
+
+        The driver retries the whole transaction on transient errors, such as write conflicts
+        on the global counter document, so `write` must not have effects outside its session.
+        Standalone servers run it once without a session.
+        """
+        if not await self._supports_transactions(db):
+            async with self._standalone_write():
+                changes = await write(None)
+                await self.record_changes(db, changes)
+            return changes
+
+        async def in_transaction(session):
+            changes = await write(session)
+            counters, cells = self._split_cells(self.deltas(changes))
+            await self._apply(db, counters, session=session)
+            return changes, cells
+
+        async with await db.client.start_session() as session:
+            changes, cells = await session.with_transaction(in_transaction)
+        # Coarse map cells are as contended as the global document, so they're kept out of the
+        # transaction; a cell write lost after the commit is repaired by the rebuild job
+        await self._apply(db, cells)
+        return changes
+
+    async def insert_grievance(self, db: AsyncIOMotorDatabase, grievance_doc: Dict[str, Any]) -> Any:
+        """Insert a grievance and count it; returns the inserted id"""
+        async def write(session):
+            await db.grievances.insert_one(grievance_doc, session=session)
+            return [(None, grievance_doc)]
+
+        await self.record_write(db, write)
+        return grievance_doc["_id"]
+
+    async def update_grievance(
+        self,
+        db: AsyncIOMotorDatabase,
+        query: Dict[str, Any],
+        update_data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """$set fields on one grievance and move its counts; returns its counted fields before the update"""
+        async def write(session):
+            previous = await db.grievances.find_one_and_update(
+                query,
+                {"$set": update_data},
+                projection=COUNTED_FIELDS,
+                session=session
+            )
+            return [(previous, {**previous, **update_data})] if previous else []
+
+        changes = await self.record_write(db, write)
+        return changes[0][0] if changes else None
+
+    def _to_stats(self, doc: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Shape a counter document like StatsService.grievance_stats output"""
+        doc = doc or {}
+        by_status = {k: int(v) for k, v in doc.get("status", {}).items() if v}
+        resolution_count = doc.get("resolution_count", 0)
+        stats = {
+            "total": int(doc.get("total", 0)),
+            "by_status": by_status,
+            "by_category": {k: int(v) for k, v in doc.get("category", {}).items() if v},
+            "by_priority": {k: int(v) for k, v in doc.get("priority", {}).items() if v},
+            "by_department": {_from_field_key(k): int(v) for k, v in doc.get("department", {}).items() if v},
+            "avg_resolution_time": (
+                round(doc.get("resolution_ms", 0) / resolution_count / MS_PER_DAY, 2)
+                if resolution_count > 0 else None
+            )
+        }
+        for grievance_status in GrievanceStatus:
+            stats[grievance_status.value] = by_status.get(grievance_status.value, 0)
+        stats["resolution_rate"] = round(stats["resolved"] / stats["total"] * 100, 2) if stats["total"] else 0
+        return stats
+
+    async def get_stats(
+        self,
+        db: AsyncIOMotorDatabase,
+        scope_id: str = GLOBAL_SCOPE,
+        recent_days: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Read one scope's counters with a single lookup"""
+        doc = await db[COUNTERS_COLLECTION].find_one({"_id": scope_id})
+        stats = self._to_stats(doc)
+
+        if recent_days is not None:
+            by_day = (doc or {}).get("created_by_day", {})
+            today = datetime.utcnow().date()
+            stats["recent"] = int(sum(
+                by_day.get((today - timedelta(days=offset)).strftime("%Y-%m-%d"), 0)
+                for offset in range(recent_days)
+            ))
+        return stats
+
+    async def get_department_stats(self, db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+        """Counters for every department, keyed by department name"""
+        cursor = db[COUNTERS_COLLECTION].find({"scope": "department"}, {"created_by_day": 0})
+        return {doc["key"]: self._to_stats(doc) async for doc in cursor}
+
+    async def ensure_initialized(self, db: AsyncIOMotorDatabase):
+        """Queue a rebuild on first start against an existing database"""
+        counters = db[COUNTERS_COLLECTION]
+        if await counters.find_one({"_id": GLOBAL_SCOPE}) is None:
+            logger.info("Grievance counters missing, queueing a rebuild")
+            await job_queue.enqueue(REBUILD_JOB_TYPE, {}, db, max_attempts=1)
+        elif (
+            await counters.find_one({"scope": f"geo{settings.GEO_CELL_MAX_PRECISION}"}, {"_id": 1}) is None
+            and await db.grievances.find_one({"location.coordinates": {"$exists": True}}, {"_id": 1})
+        ):
+            # Counters built before map cells existed (or with another max precision)
+            logger.info("Map cell counters missing, queueing a rebuild")
+            await job_queue.enqueue(REBUILD_JOB_TYPE, {}, db, max_attempts=1)
+
+    async def verify(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Compare the global counters with a full $facet scan"""
+        counters = await self.get_stats(db)
+        scanned = await stats_service.grievance_stats(db)
+        keys = ["total", "by_status", "by_category", "by_priority", "by_department"]
+        drift = {key: {"counters": counters[key], "scan": scanned[key]} for key in keys if counters[key] != scanned[key]}
+        return {"in_sync": not drift, "drift": drift}
+
+    def _counter_fields(self, doc: Dict[str, Any]) -> Dict[str, int]:
+        """A counter document's amounts, keyed like contributions()"""
+        fields = {}
+        for field, value in doc.items():
+            if isinstance(value, dict):
+                for child, amount in value.items():
+                    if isinstance(amount, (int, float)):
+                        fields[f"{field}.{child}"] = amount
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                fields[field] = value
+        return fields
+
+    async def _scan(self, db: AsyncIOMotorDatabase, batch_size: int, session=None) -> Tuple[Dict, Dict]:
+        """Current counter amounts and the amounts recomputed from every grievance"""
+        current = {
+            doc["_id"]: self._counter_fields(doc)
+            async for doc in db[COUNTERS_COLLECTION].find({}, session=session).batch_size(batch_size)
+        }
+        accumulated: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        async for grievance in db.grievances.find({}, COUNTED_FIELDS, session=session).batch_size(batch_size):
+            self._accumulate(accumulated, grievance, 1)
+        return current, accumulated
+
+    async def rebuild(self, db: AsyncIOMotorDatabase, batch_size: int = 1000) -> Dict[str, Any]:
+        """Repair job: recompute every counter from the grievances collection
+
+        Counters and grievances are read at one point in time (a snapshot session, or with this
+        process's writers held on standalone servers) and only the difference is $inc'ed onto
+        the live documents, so increments from writes made meanwhile are kept. Map cells are
+        written after their transaction commits, so a cell whose write was in flight at the
+        snapshot can end up off by that write.
+        """
+        started = datetime.utcnow()
+        if await self._supports_transactions(db):
+            async with await db.client.start_session(snapshot=True) as session:
+                current, accumulated = await self._scan(db, batch_size, session)
+        else:
+            self._writes_resumed.clear()
+            try:
+                await self._writes_idle.wait()
+                current, accumulated = await self._scan(db, batch_size)
+            finally:
+                self._writes_resumed.set()
+
+        for scope_id, fields in current.items():
+            for field, amount in fields.items():
+                accumulated[scope_id][field] -= amount
+        drift = self._nonzero(accumulated)
+        # Always keep a global document so ensure_initialized doesn't rebuild an empty database
+        if GLOBAL_SCOPE not in current and GLOBAL_SCOPE not in drift:
+            drift[GLOBAL_SCOPE] = {"total": 0}
+
+        counters = db[COUNTERS_COLLECTION]
+        operations = self._operations(drift)
+        for i in range(0, len(operations), batch_size):
+            await counters.bulk_write(operations[i:i + batch_size], ordered=False)
+        # Scopes with no grievances left are back to zero; a write landing later upserts afresh
+        stale = await counters.delete_many({"_id": {"$ne": GLOBAL_SCOPE}, "total": 0})
+
+        logger.info(f"Rebuilt grievance counters: {len(operations)} documents corrected")
+        return {"scopes": len(operations), "removed": stale.deleted_count, "started_at": started}
+
+    async def run_rebuild_job(self, payload: Dict[str, Any], db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Background job handler for the counter repair job"""
+        return await self.rebuild(db)
+
+
+# Export singleton instance
+counter_service = CounterService()
+
+job_queue.register(REBUILD_JOB_TYPE, counter_service.run_rebuild_job)
@@ -0,0 +1,163 @@
+"""
+Process-wide department catalog, loaded at startup and refreshed on change
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WATCH_RETRY_DELAY = 5.0  # seconds before reopening an interrupted change stream
+
+
+class DepartmentCatalog:
+    """In-memory department documents with O(1) lookup by id, name and category"""
+
+    def __init__(self):
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_category: Dict[str, List[Dict[str, Any]]] = {}
+        self._expires_at = 0.0
+        self._load_lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self.watch_active = False
+        self.counters = {"loads": 0, "changes": 0}
+
+    def _index(self, departments: List[Dict[str, Any]]):
+        """Swap in lookup tables built from a full list of department documents"""
+        by_id = {str(department["_id"]): department for department in departments}
+        by_name = {department["name"]: department for department in departments if department.get("name")}
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for department in sorted(departments, key=lambda d: d.get("name", "")):
+            for category in department.get("categories") or []:
+                by_category.setdefault(category.lower(), []).append(department)
+        self._by_id, self._by_name, self._by_category = by_id, by_name, by_category
+
+    async def load(self, db: AsyncIOMotorDatabase):
+        """Reload every department from MongoDB"""
+        async with self._load_lock:
+            departments = await db.departments.find({}).to_list(length=None)
+            self._index(departments)
+            self._expires_at = time.monotonic() + settings.DEPARTMENT_CACHE_TTL
+            self.counters["loads"] += 1
+
+    async def ensure_loaded(self, db: AsyncIOMotorDatabase):
+        """Load on first use, and again after DEPARTMENT_CACHE_TTL unless the change stream keeps it current"""
+        if not self.watch_active and time.monotonic() >= self._expires_at:
+            await self.load(db)
+
+    async def find(self, db: AsyncIOMotorDatabase, department_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of a department by id; a miss reloads once in case another worker just created it"""
+        await self.ensure_loaded(db)
+        department = self.get(department_id)
+        if department is None and not self.watch_active:
+            await self.load(db)
+            department = self.get(department_id)
+        return department
+
+    def upsert(self, department: Dict[str, Any]):
+        """Apply a created or updated department document"""
+        departments = [d for key, d in self._by_id.items() if key != str(department["_id"])]
+        self._index(departments + [department])
+        self.counters["changes"] += 1
+
+    def remove(self, department_id: str):
+        """Apply a deleted department"""
+        if department_id in self._by_id:
+            self._index([d for key, d in self._by_id.items() if key != department_id])
+            self.counters["changes"] += 1
+
+    def get(self, department_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of a department document by id"""
+        department = self._by_id.get(department_id)
+        return dict(department) if department else None
+
+    def by_name(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Copy of a department document by exact name"""
+        department = self._by_name.get(name) if name else None
+        return dict(department) if department else None
+
+    def has(self, name: Optional[str]) -> bool:
+        """Whether a department with this name exists"""
+        return bool(name) and name in self._by_name
+
+    def for_category(self, category: Optional[str]) -> List[Dict[str, Any]]:
+        """Copies of the departments handling a category, by name"""
+        if not category:
+            return []
+        return [dict(department) for department in self._by_category.get(category.lower(), [])]
+
+    def all(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Copies of every department (optionally with one status), by name"""
+        return [
+            dict(department)
+            for department in sorted(self._by_id.values(), key=lambda d: d.get("name", ""))
+            if status is None or department.get("status") == status
+        ]
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the change-stream listener (needs a replica set)"""
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(db))
+
+    async def stop(self):
+        """Stop the change-stream listener"""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        self.watch_active = False
+
+    async def _watch(self, db: AsyncIOMotorDatabase):
+        """Apply department writes made by any worker"""
+        resume_token = None
+        started = False
+        while True:
+            try:
+                async with db.departments.watch(full_document="updateLookup", resume_after=resume_token) as stream:
+                    if not started:
+                        logger.info("Department change stream started")
+                    started = True
+                    if not self.watch_active:
+                        # Anything written before the stream (re)opened
+                        await self.load(db)
+                    self.watch_active = True
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        operation = change["operationType"]
+                        if operation == "delete":
+                            self.remove(str(change["documentKey"]["_id"]))
+                        elif change.get("fullDocument"):
+                            self.upsert(change["fullDocument"])
+                        elif operation in ("drop", "rename", "invalidate"):
+                            await self.load(db)
+                            resume_token = None
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not started:
+                    logger.warning(f"Department change stream unavailable, reloading every {settings.DEPARTMENT_CACHE_TTL}s: {e}")
+                    self._watcher = None
+                    return
+                # Fall back to the TTL until the stream resumes
+                self.watch_active = False
+                logger.error(f"Department change stream interrupted, resuming: {e}")
+                await asyncio.sleep(WATCH_RETRY_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        """Catalog size and refresh counters"""
+        return {
+            **self.counters,
+            "departments": len(self._by_id),
+            "categories": len(self._by_category),
+            "watch_active": self.watch_active
+        }
+
+
+# Export singleton instance
+department_catalog = DepartmentCatalog()
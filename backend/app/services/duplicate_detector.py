@@ -0,0 +1,335 @@
+"""
+Duplicate grievance detection: geo and category shortlist, a per-city MinHash LSH index,
+then word-set similarity
+"""
+
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from app.core.config import settings
+from app.models.grievance import GrievanceStatus
+from app.services.notification_service import NotificationService
+from app.services.text_classifier import text_classifier
+
+logger = logging.getLogger(__name__)
+
+# 32 bands of 2 rows: pairs above ~0.4 Jaccard similarity share a band with high probability
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Words that say nothing about which issue a report is about: function words and complaint filler
+STOP_WORDS = frozenset("""
+    a about also am an and any are as at be been being but by can could do does for from had has have
+    he her here his i in into is it its just kindly madam me my near next no nor not of on onto or our
+    outside over please sir since so still than that the their them then there these they this those
+    to too under us very was we were which while who will with would you your
+    asap big complaint fix fixed help huge immediately issue issues lot lots many problem problems
+    request soon urgent urgently
+""".split())
+
+STEM_SUFFIXES = ("ing", "ed", "es", "s")
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+OPEN_STATUSES = [GrievanceStatus.PENDING.value, GrievanceStatus.IN_PROGRESS.value]
+
+# A supporter's report kept on the grievance it was attached to
+MAX_DUPLICATE_REPORTS = 50
+
+Signature = Tuple[int, ...]
+
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    """Fixed (a, b) pairs for the universal hashes h(x) = (a * x + b) mod p"""
+    pairs = []
+    seed = 0x5DEECE66D
+    for _ in range(count):
+        seed = (seed * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        a = (seed >> 3) % MERSENNE_PRIME or 1
+        seed = (seed * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        b = (seed >> 3) % MERSENNE_PRIME
+        pairs.append((a, b))
+    return pairs
+
+
+PERMUTATIONS = _permutations(NUM_PERMUTATIONS)
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so "leaking" and "leak" compare equal"""
+    for suffix in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def shingles(text: str) -> Set[int]:
+    """Hashed stemmed words of a text, stop words removed"""
+    return {
+        zlib.crc32(_stem(word).encode())
+        for word in re.findall(r"[a-z0-9]+", text.lower())
+        if word not in STOP_WORDS
+    }
+
+
+def minhash(shingle_hashes: Set[int]) -> Optional[Signature]:
+    """MinHash signature of a shingle set (None for empty text)"""
+    if not shingle_hashes:
+        return None
+    return tuple(
+        min((a * h + b) % MERSENNE_PRIME for h in shingle_hashes) & MAX_HASH
+        for a, b in PERMUTATIONS
+    )
+
+
+def similarity(first: Set[int], second: Set[int]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def shingles_for(title: str, description: str) -> Set[int]:
+    """Shingles of a grievance's title and description"""
+    return shingles(f"{title} {description}")
+
+
+def issue_for(title: str, description: str) -> Tuple[str, str]:
+    """(category, department) the text classifier files a report under"""
+    analysis = text_classifier.classify(title, description)
+    return analysis.category, analysis.suggested_department
+
+
+def signature_for(title: str, description: str) -> Optional[Signature]:
+    """Signature of a grievance's title and description"""
+    return minhash(shingles_for(title, description))
+
+
+class CityLSHIndex:
+    """Banded LSH over grievance signatures for one city, oldest entries evicted first"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.signatures: "OrderedDict[str, Signature]" = OrderedDict()
+        self.buckets: Dict[Tuple[int, Signature], Set[str]] = {}
+
+    def _bands(self, signature: Signature):
+        """(band number, band slice) keys of a signature"""
+        for band in range(LSH_BANDS):
+            yield band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+
+    def insert(self, grievance_id: str, signature: Signature):
+        """Index a grievance (no-op when already indexed)"""
+        if grievance_id in self.signatures:
+            return
+        self.signatures[grievance_id] = signature
+        for key in self._bands(signature):
+            self.buckets.setdefault(key, set()).add(grievance_id)
+        while len(self.signatures) > self.max_entries:
+            oldest, oldest_signature = self.signatures.popitem(last=False)
+            self._unlink(oldest, oldest_signature)
+
+    def remove(self, grievance_id: str):
+        """Forget a grievance"""
+        signature = self.signatures.pop(grievance_id, None)
+        if signature is not None:
+            self._unlink(grievance_id, signature)
+
+    def _unlink(self, grievance_id: str, signature: Signature):
+        """Drop an id from the buckets its signature was filed under"""
+        for key in self._bands(signature):
+            members = self.buckets.get(key)
+            if members is None:
+                continue
+            members.discard(grievance_id)
+            if not members:
+                del self.buckets[key]
+
+    def query(self, signature: Signature) -> Set[str]:
+        """Ids sharing at least one band with the signature"""
+        candidates: Set[str] = set()
+        for key in self._bands(signature):
+            candidates |= self.buckets.get(key, set())
+        return candidates
+
+
+class DuplicateDetector:
+    """Finds an open grievance a new report duplicates, and attaches the report to it"""
+
+    def __init__(self):
+        self.notification_service = NotificationService()
+        self._cities: "OrderedDict[str, CityLSHIndex]" = OrderedDict()
+        self.counters = {"checked": 0, "duplicates": 0, "total_ms": 0.0}
+
+    def _city_index(self, city: str) -> CityLSHIndex:
+        """The LSH index for a city, least recently used cities evicted"""
+        key = (city or "").strip().lower()
+        index = self._cities.get(key)
+        if index is None:
+            index = CityLSHIndex(settings.DUPLICATE_INDEX_MAX_PER_CITY)
+            self._cities[key] = index
+            while len(self._cities) > settings.DUPLICATE_INDEX_MAX_CITIES:
+                self._cities.popitem(last=False)
+        self._cities.move_to_end(key)
+        return index
+
+    async def find_duplicate(
+        self,
+        db: AsyncIOMotorDatabase,
+        title: str,
+        description: str,
+        location: Dict[str, Any],
+        department: Optional[str] = None
+    ) -> Optional[Tuple[str, float]]:
+        """(grievance id, similarity) of the open grievance this report duplicates, if any
+
+        Only grievances assigned to the report's department, whose text the classifier files
+        under the same category and department, qualify: a report about a different issue at
+        the same spot is never folded into another department's grievance.
+        """
+        started = time.perf_counter()
+        self.counters["checked"] += 1
+        try:
+            report_shingles = shingles_for(title, description)
+            signature = minhash(report_shingles)
+            coordinates = location.get("coordinates")
+            if signature is None or not coordinates:
+                return None
+
+            # Open grievances within a few metres, straight off the 2dsphere index
+            query: Dict[str, Any] = {
+                "location.coordinates": {"$nearSphere": {
+                    "$geometry": {"type": "Point", "coordinates": list(coordinates)},
+                    "$maxDistance": settings.DUPLICATE_RADIUS_METERS
+                }},
+                "status": {"$in": OPEN_STATUSES}
+            }
+            if department:
+                query["assigned_department"] = department
+            nearby = await db.grievances.find(
+                query,
+                {"title": 1, "description": 1}
+            ).limit(settings.DUPLICATE_MAX_CANDIDATES).to_list(length=settings.DUPLICATE_MAX_CANDIDATES)
+            if not nearby:
+                return None
+
+            # Grievances reported through other workers join this worker's index here
+            index = self._city_index(location.get("city", ""))
+            for grievance in nearby:
+                grievance_id = str(grievance["_id"])
+                if grievance_id not in index.signatures:
+                    existing = signature_for(grievance.get("title", ""), grievance.get("description", ""))
+                    if existing is not None:
+                        index.insert(grievance_id, existing)
+
+            # Nearest first, so the closest of equally similar grievances wins; the LSH buckets
+            # narrow the shortlist and the exact word-set similarity decides
+            candidates = index.query(signature)
+            report_issue = issue_for(title, description)
+            best: Optional[Tuple[str, float]] = None
+            for grievance in nearby:
+                grievance_id = str(grievance["_id"])
+                if grievance_id not in candidates:
+                    continue
+                grievance_text = (grievance.get("title", ""), grievance.get("description", ""))
+                if issue_for(*grievance_text) != report_issue:
+                    continue
+                score = similarity(report_shingles, shingles_for(*grievance_text))
+                if score >= settings.DUPLICATE_SIMILARITY_THRESHOLD and (best is None or score > best[1]):
+                    best = (grievance_id, score)
+
+            if best is not None:
+                self.counters["duplicates"] += 1
+            return best
+        finally:
+            self.counters["total_ms"] += (time.perf_counter() - started) * 1000
+
+    def remember(self, grievance: Dict[str, Any]):
+        """Index a newly created grievance so later reports in this worker match it"""
+        signature = signature_for(grievance.get("title", ""), grievance.get("description", ""))
+        if signature is not None:
+            self._city_index((grievance.get("location") or {}).get("city", "")).insert(str(grievance["_id"]), signature)
+
+    async def attach_report(
+        self,
+        db: AsyncIOMotorDatabase,
+        grievance_id: str,
+        citizen_id: str,
+        report: Dict[str, Any],
+        score: float
+    ) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """Record a "+1" from another citizen on an open grievance; returns (grievance, attached)
+
+        The original reporter and citizens who already added a report are not counted twice:
+        they get the grievance back with attached False. None when the grievance was closed or
+        removed since it was matched.
+        """
+        now = datetime.utcnow()
+        grievance = await db.grievances.find_one_and_update(
+            {
+                "_id": ObjectId(grievance_id),
+                "status": {"$in": OPEN_STATUSES},
+                "citizen_id": {"$ne": citizen_id},
+                "supporters": {"$ne": citizen_id}
+            },
+            {
+                "$inc": {"duplicate_count": 1},
+                "$push": {
+                    "supporters": citizen_id,
+                    "duplicate_reports": {
+                        "$each": [{**report, "citizen_id": citizen_id, "similarity": round(score, 3), "created_at": now}],
+                        "$slice": -MAX_DUPLICATE_REPORTS
+                    }
+                },
+                "$set": {"updated_at": now}
+            },
+            projection={"duplicate_reports": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if grievance:
+            return grievance, True
+
+        grievance = await db.grievances.find_one(
+            {
+                "_id": ObjectId(grievance_id),
+                "status": {"$in": OPEN_STATUSES},
+                "$or": [{"citizen_id": citizen_id}, {"supporters": citizen_id}]
+            },
+            {"duplicate_reports": 0}
+        )
+        return (grievance, False) if grievance else None
+
+    async def notify_supporter(self, grievance: Dict[str, Any], citizen_id: str, db: AsyncIOMotorDatabase) -> int:
+        """Tell the citizen their report was added to an existing grievance (the department is not re-notified)"""
+        notification = self.notification_service.citizen_notification(
+            citizen_id=citizen_id,
+            grievance_id=str(grievance["_id"]),
+            notification_type="grievance_duplicate",
+            title="Report Added to Existing Grievance",
+            message=f"Your report matches the open grievance '{grievance['title']}' and has been added to it."
+        )
+        return await self.notification_service.insert_notifications([notification], db)
+
+    def stats(self) -> Dict[str, Any]:
+        """Detection counters and index sizes"""
+        checked = self.counters["checked"]
+        return {
+            "checked": checked,
+            "duplicates": self.counters["duplicates"],
+            "avg_ms": round(self.counters["total_ms"] / checked, 3) if checked else 0.0,
+            "cities": len(self._cities),
+            "indexed": sum(len(index.signatures) for index in self._cities.values())
+        }
+
+
+# Export singleton instance
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,221 @@
+"""
+Broadcast notifications to every user in a role, department or city
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.models.notification import NotificationBroadcast
+from app.models.user import UserStatus
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+FANOUTS_COLLECTION = "notification_fanouts"
+
+notification_service = NotificationService()
+
+
+class FanoutService:
+    """Streams recipient ids from a cursor and writes notifications in chunks"""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _user_filter(self, audience: Dict[str, Any]) -> Dict[str, Any]:
+        """Users query for the role/department part of an audience"""
+        query: Dict[str, Any] = {"status": UserStatus.ACTIVE.value}
+        if audience.get("role"):
+            query["role"] = audience["role"]
+        if audience.get("department"):
+            query["department"] = audience["department"]
+        return query
+
+    async def create_fanout(
+        self,
+        broadcast: NotificationBroadcast,
+        db: AsyncIOMotorDatabase,
+        created_by: str
+    ) -> Dict[str, Any]:
+        """Create a broadcast job document"""
+        audience = broadcast.audience.dict()
+        if audience.get("role"):
+            audience["role"] = broadcast.audience.role.value
+        fanout_doc = {
+            "status": "queued",
+            "audience": audience,
+            "notification": {
+                "title": broadcast.title,
+                "message": broadcast.message,
+                "type": broadcast.type.value,
+                "priority": broadcast.priority.value,
+                "channels": [channel.value for channel in broadcast.channels],
+                "data": broadcast.data or {}
+            },
+            # City audiences come from an aggregation and aren't counted up front
+            "total": None if audience.get("city") else await db.users.count_documents(self._user_filter(audience)),
+            "processed": 0,
+            "inserted": 0,
+            "last_id": None,
+            "error": None,
+            "created_by": created_by,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+            "finished_at": None
+        }
+        result = await db[FANOUTS_COLLECTION].insert_one(fanout_doc)
+        fanout_doc["_id"] = str(result.inserted_id)
+        return fanout_doc
+
+    async def get_fanout(self, fanout_id: str, db: AsyncIOMotorDatabase) -> Optional[Dict[str, Any]]:
+        """Get broadcast progress"""
+        fanout = await db[FANOUTS_COLLECTION].find_one({"_id": ObjectId(fanout_id)})
+        if not fanout:
+            return None
+        fanout["_id"] = str(fanout["_id"])
+        fanout["running"] = fanout_id in self._tasks and not self._tasks[fanout_id].done()
+        return fanout
+
+    def start_fanout(self, fanout_id: str, db: AsyncIOMotorDatabase) -> bool:
+        """Run a broadcast in the background of the current event loop"""
+        if fanout_id in self._tasks and not self._tasks[fanout_id].done():
+            return False
+
+        task = asyncio.create_task(self.run_fanout(fanout_id, db))
+        self._tasks[fanout_id] = task
+        task.add_done_callback(lambda done: self._on_fanout_done(fanout_id, done))
+        return True
+
+    def _on_fanout_done(self, fanout_id: str, task: asyncio.Task):
+        """Forget finished broadcasts; failures are already recorded on the document"""
+        self._tasks.pop(fanout_id, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _recipient_chunks(
+        self,
+        db: AsyncIOMotorDatabase,
+        audience: Dict[str, Any],
+        last_id: Optional[str],
+        chunk_size: int
+    ) -> AsyncIterator[Tuple[List[str], str]]:
+        """Yield (recipient ids, checkpoint) chunks in a stable order, after last_id"""
+        user_filter = self._user_filter(audience)
+
+        if not audience.get("city"):
+            if last_id:
+                user_filter["_id"] = {"$gt": ObjectId(last_id)}
+            cursor = db.users.find(user_filter, {"_id": 1}).sort("_id", 1).batch_size(chunk_size)
+            chunk: List[str] = []
+            async for user in cursor:
+                chunk.append(str(user["_id"]))
+                if len(chunk) == chunk_size:
+                    yield chunk, chunk[-1]
+                    chunk = []
+            if chunk:
+                yield chunk, chunk[-1]
+            return
+
+        # Citizens who reported in the city, deduplicated server-side, then checked
+        # against the users collection one chunk at a time
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": {"location.city": audience["city"], "citizen_id": {"$ne": None}}},
+            {"$group": {"_id": "$citizen_id"}},
+            {"$sort": {"_id": 1}}
+        ]
+        if last_id:
+            pipeline.append({"$match": {"_id": {"$gt": last_id}}})
+        cursor = db.grievances.aggregate(pipeline, allowDiskUse=True, batchSize=chunk_size)
+        candidates: List[str] = []
+        async for row in cursor:
+            candidates.append(row["_id"])
+            if len(candidates) == chunk_size:
+                yield await self._active_users(db, candidates, user_filter), candidates[-1]
+                candidates = []
+        if candidates:
+            yield await self._active_users(db, candidates, user_filter), candidates[-1]
+
+    async def _active_users(
+        self,
+        db: AsyncIOMotorDatabase,
+        user_ids: List[str],
+        user_filter: Dict[str, Any]
+    ) -> List[str]:
+        """The ids among user_ids that match the audience's user filter"""
+        object_ids = [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]
+        cursor = db.users.find({**user_filter, "_id": {"$in": object_ids}}, {"_id": 1})
+        return [str(user["_id"]) async for user in cursor]
+
+    def _build_notifications(self, fanout: Dict[str, Any], recipients: List[str]) -> List[Dict[str, Any]]:
+        """One notification document per recipient"""
+        created_at = datetime.utcnow()
+        return [
+            {
+                **fanout["notification"],
+                "user_id": user_id,
+                "grievance_id": None,
+                "fanout_id": str(fanout["_id"]),
+                "is_read": False,
+                "created_at": created_at,
+                "read_at": None,
+                "failed_channels": []
+            }
+            for user_id in recipients
+        ]
+
+    async def run_fanout(self, fanout_id: str, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Stream recipients after the broadcast's last_id and insert their notifications"""
+        fanouts = db[FANOUTS_COLLECTION]
+        fanout = await fanouts.find_one({"_id": ObjectId(fanout_id)})
+        if not fanout:
+            raise ValueError(f"Broadcast {fanout_id} not found")
+
+        processed = fanout.get("processed", 0)
+        inserted = fanout.get("inserted", 0)
+        await fanouts.update_one(
+            {"_id": fanout["_id"]},
+            {"$set": {"status": "running", "error": None, "updated_at": datetime.utcnow()}}
+        )
+
+        try:
+            chunks = self._recipient_chunks(
+                db, fanout["audience"], fanout.get("last_id"), settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+            )
+            async for recipients, checkpoint in chunks:
+                inserted += await notification_service.insert_notifications(
+                    self._build_notifications(fanout, recipients), db
+                )
+                processed += len(recipients)
+                await fanouts.update_one(
+                    {"_id": fanout["_id"]},
+                    {"$set": {
+                        "processed": processed,
+                        "inserted": inserted,
+                        "last_id": checkpoint,
+                        "updated_at": datetime.utcnow()
+                    }}
+                )
+
+            await fanouts.update_one(
+                {"_id": fanout["_id"]},
+                {"$set": {"status": "completed", "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+            )
+            logger.info(f"Broadcast {fanout_id} completed: {inserted} notifications for {processed} recipients")
+
+        except Exception as e:
+            logger.error(f"Broadcast {fanout_id} failed: {e}")
+            await fanouts.update_one(
+                {"_id": fanout["_id"]},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+            )
+            raise
+
+        return {"fanout_id": fanout_id, "processed": processed, "inserted": inserted}
+
+
+# Export singleton instance
+fanout_service = FanoutService()
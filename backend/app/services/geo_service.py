@@ -0,0 +1,253 @@
+"""
+Map queries over the location.coordinates 2dsphere index
+"""
+
+import base64
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core import geohash
+from app.core.config import settings
+from app.core.pagination import CursorPosition, NEWEST_FIRST, keyset_filter
+from app.models.grievance import GrievanceMapPoint
+from app.services.counter_service import COUNTERS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+GEO_FIELD = "location.coordinates"
+
+# Only what a map marker needs
+MAP_PROJECTION = {
+    "title": 1,
+    "category": 1,
+    "priority": 1,
+    "status": 1,
+    "location.coordinates": 1,
+    "location.address": 1,
+    "assigned_department": 1,
+    "created_at": 1
+}
+
+# Cell queries are split into at most this many _id ranges
+MAX_CELL_RANGES = 64
+
+# Distance of the last result, and the ids returned at exactly that distance
+NearbyPosition = Tuple[float, List[ObjectId]]
+
+
+def precision_for_zoom(zoom: int) -> int:
+    """Geohash precision giving roughly 8 cells across a web map tile at `zoom`"""
+    precision = settings.GEO_CELL_MIN_PRECISION
+    while precision < settings.GEO_CELL_MAX_PRECISION and (5 * precision + 1) // 2 < zoom + 3:
+        precision += 1
+    return precision
+
+
+def _intersects(a: geohash.Bounds, b: geohash.Bounds) -> bool:
+    """Whether two (west, south, east, north) boxes overlap"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def encode_nearby_cursor(distance: float, seen_ids: List[ObjectId]) -> str:
+    """Opaque token for the position just after a nearby page"""
+    payload = json.dumps({"d": distance, "ids": [str(i) for i in seen_ids]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_nearby_cursor(token: str) -> NearbyPosition:
+    """Inverse of encode_nearby_cursor; raises ValueError on a malformed token"""
+    padded = token + "=" * (-len(token) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return float(payload["d"]), [ObjectId(i) for i in payload["ids"]]
+
+
+class GeoService:
+    """Nearby ($geoNear) and bounding-box ($geoWithin) grievance queries"""
+
+    def _filters(
+        self,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        department: Optional[str] = None,
+        citizen_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Equality and scope filters applied alongside the geo predicate"""
+        query: Dict[str, Any] = {}
+        if status:
+            query["status"] = status
+        if category:
+            query["category"] = category
+        if department is not None:
+            query["assigned_department"] = department
+        if citizen_id is not None:
+            query["$or"] = [{"citizen_id": citizen_id}, {"supporters": citizen_id}]
+        return query
+
+    def to_point(self, grievance: Dict[str, Any]) -> GrievanceMapPoint:
+        """Map marker for a projected grievance document"""
+        location = grievance.get("location") or {}
+        return GrievanceMapPoint(
+            id=str(grievance["_id"]),
+            title=grievance["title"],
+            category=grievance["category"],
+            priority=grievance["priority"],
+            status=grievance["status"],
+            coordinates=location.get("coordinates"),
+            address=location.get("address"),
+            assigned_department=grievance.get("assigned_department"),
+            created_at=grievance["created_at"],
+            distance=grievance.get("distance")
+        )
+
+    def nearby_pipeline(
+        self,
+        lng: float,
+        lat: float,
+        radius: float,
+        filters: Dict[str, Any],
+        limit: int,
+        position: Optional[NearbyPosition] = None
+    ) -> List[Dict[str, Any]]:
+        """$geoNear pipeline for one page, nearest first
+
+        Pages resume at the previous page's last distance (minDistance). Results
+        at exactly that distance are told apart by the ids already returned, so
+        ties are neither skipped nor repeated whatever order the server emits them in.
+        """
+        geo_near: Dict[str, Any] = {
+            "near": {"type": "Point", "coordinates": [lng, lat]},
+            "distanceField": "distance",
+            "maxDistance": radius,
+            "spherical": True,
+            "key": GEO_FIELD,
+            "query": filters
+        }
+        pipeline: List[Dict[str, Any]] = [{"$geoNear": geo_near}]
+        if position is not None:
+            distance, seen_ids = position
+            geo_near["minDistance"] = distance
+            pipeline.append({"$match": {"$or": [
+                {"distance": {"$gt": distance}},
+                {"_id": {"$nin": seen_ids}}
+            ]}})
+        pipeline.append({"$limit": limit})
+        pipeline.append({"$project": {**MAP_PROJECTION, "distance": 1}})
+        return pipeline
+
+    async def nearby(
+        self,
+        db: AsyncIOMotorDatabase,
+        lng: float,
+        lat: float,
+        radius: float,
+        limit: int,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        department: Optional[str] = None,
+        citizen_id: Optional[str] = None,
+        position: Optional[NearbyPosition] = None
+    ) -> Tuple[List[GrievanceMapPoint], Optional[str]]:
+        """Grievances within `radius` meters, nearest first, and the next page cursor"""
+        pipeline = self.nearby_pipeline(
+            lng, lat, radius, self._filters(status, category, department, citizen_id), limit, position
+        )
+        grievances = await db.grievances.aggregate(pipeline).to_list(length=limit)
+
+        next_cursor = None
+        if len(grievances) == limit:
+            last_distance = grievances[-1]["distance"]
+            seen_ids = [g["_id"] for g in grievances if g["distance"] == last_distance]
+            if position is not None and position[0] == last_distance:
+                # The whole page sat at the previous boundary distance
+                seen_ids = position[1] + seen_ids
+            next_cursor = encode_nearby_cursor(last_distance, seen_ids)
+
+        return [self.to_point(g) for g in grievances], next_cursor
+
+    def box_query(
+        self,
+        west: float,
+        south: float,
+        east: float,
+        north: float,
+        filters: Dict[str, Any],
+        position: Optional[CursorPosition] = None
+    ) -> Dict[str, Any]:
+        """$geoWithin query for a longitude/latitude bounding box"""
+        box = {"type": "Polygon", "coordinates": [[
+            [west, south], [east, south], [east, north], [west, north], [west, south]
+        ]]}
+        return keyset_filter({GEO_FIELD: {"$geoWithin": {"$geometry": box}}, **filters}, position)
+
+    async def within_box(
+        self,
+        db: AsyncIOMotorDatabase,
+        west: float,
+        south: float,
+        east: float,
+        north: float,
+        limit: int,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        department: Optional[str] = None,
+        citizen_id: Optional[str] = None,
+        position: Optional[CursorPosition] = None
+    ) -> List[Dict[str, Any]]:
+        """Projected grievances inside a bounding box, newest first (keyset paged)"""
+        filters = self._filters(status, category, department, citizen_id)
+        query = self.box_query(west, south, east, north, filters, position)
+        cursor = db.grievances.find(query, MAP_PROJECTION).sort(NEWEST_FIRST).limit(limit)
+        return await cursor.to_list(length=limit)
+
+
+    def _cell_query(self, precision: int, box: Optional[geohash.Bounds]) -> Dict[str, Any]:
+        """Counter documents for the cells at `precision`, restricted to _id ranges covering `box`"""
+        query: Dict[str, Any] = {"scope": f"geo{precision}", "total": {"$gt": 0}}
+        if box is None:
+            return query
+
+        # Cells sharing a prefix are one contiguous _id range; use the finest
+        # prefix that still covers the box in a handful of ranges
+        prefix_precision = precision
+        while prefix_precision > 1 and geohash.covering_count(box, prefix_precision) > MAX_CELL_RANGES:
+            prefix_precision -= 1
+        query["$or"] = [
+            {"_id": {"$gte": f"geo{precision}:{prefix}", "$lt": f"geo{precision}:{prefix}~"}}
+            for prefix in geohash.covering(box, prefix_precision)
+        ]
+        return query
+
+    async def cell_stats(
+        self,
+        db: AsyncIOMotorDatabase,
+        precision: int,
+        box: Optional[geohash.Bounds] = None
+    ) -> Dict[str, Any]:
+        """Per-cell grievance counts by status and category from the map cell rollup"""
+        query = self._cell_query(precision, box)
+        cursor = db[COUNTERS_COLLECTION].find(query, {"key": 1, "total": 1, "status": 1, "category": 1})
+
+        cells = []
+        truncated = False
+        async for doc in cursor:
+            if len(cells) == settings.GEO_MAX_CELLS:
+                truncated = True
+                break
+            cell_bounds = geohash.bounds(doc["key"])
+            if box is not None and not _intersects(cell_bounds, box):
+                continue
+            cells.append({
+                "cell": doc["key"],
+                "center": list(geohash.center(doc["key"])),
+                "bounds": list(cell_bounds),
+                "total": int(doc["total"]),
+                "by_status": {k: int(v) for k, v in doc.get("status", {}).items() if v},
+                "by_category": {k: int(v) for k, v in doc.get("category", {}).items() if v}
+            })
+        return {"precision": precision, "cells": cells, "truncated": truncated}
+
+
+# Export singleton instance
+geo_service = GeoService()
@@ -137,7 +137,8 @@ class ImageService:
     async def process_image_for_ai(self, file: UploadFile) -> bytes:
         """Process image for AI analysis"""
         try:
-            # Read image
+            # Read image (from the start, it may already have been uploaded)
+            await file.seek(0)
             image_content = await file.read()
             image = Image.open(io.BytesIO(image_content))
             
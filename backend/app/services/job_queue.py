@@ -0,0 +1,274 @@
+"""
+In-process background job queue backed by a MongoDB collection
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "background_jobs"
+
+JobHandler = Callable[[Dict[str, Any], AsyncIOMotorDatabase], Awaitable[Any]]
+
+
+class JobQueue:
+    """Bounded-concurrency asyncio worker pool with persistent, retried jobs"""
+
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list = []
+        self._poller: Optional[asyncio.Task] = None
+        self._pending: Set[str] = set()
+        # Identifies this process on the jobs it claims
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{ObjectId()}"
+
+    @property
+    def running(self) -> bool:
+        """Whether workers are consuming jobs in this process"""
+        return bool(self._workers)
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Register the coroutine that processes a job type"""
+        self.handlers[job_type] = handler
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        """Recover persisted jobs and start the workers"""
+        if self.running:
+            return
+
+        self.db = db
+        self._queue = asyncio.Queue()
+
+        self._workers = [
+            asyncio.create_task(self._worker(i))
+            for i in range(settings.JOB_QUEUE_CONCURRENCY)
+        ]
+        self._poller = asyncio.create_task(self._poll_due_jobs())
+        logger.info(f"Job queue started with {settings.JOB_QUEUE_CONCURRENCY} workers")
+
+    async def stop(self):
+        """Stop workers; unfinished jobs stay queued in MongoDB"""
+        tasks = self._workers + ([self._poller] if self._poller else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._poller = None
+        self._pending.clear()
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        db: AsyncIOMotorDatabase,
+        max_attempts: Optional[int] = None
+    ) -> str:
+        """Persist a job and hand it to a worker"""
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type {job_type}")
+
+        job_doc = {
+            "type": job_type,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.JOB_QUEUE_MAX_ATTEMPTS,
+            "next_run_at": datetime.utcnow(),
+            "last_error": None,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+            "finished_at": None
+        }
+        result = await db[JOBS_COLLECTION].insert_one(job_doc)
+        job_id = str(result.inserted_id)
+
+        if self.running:
+            self._submit(job_id)
+        else:
+            # No workers in this process (e.g. serverless); the request doesn't wait on the job
+            logger.warning(
+                f"Job queue not running, {job_type} job {job_id} stays queued for a worker or /admin/jobs/drain"
+            )
+
+        return job_id
+
+    async def drain(self, db: AsyncIOMotorDatabase, limit: Optional[int] = None) -> Dict[str, int]:
+        """Run due jobs now, for deployments without workers (serverless, called by a cron)
+
+        Runs up to `limit` jobs, JOB_QUEUE_CONCURRENCY at a time. Failed jobs are rescheduled
+        as usual and picked up by a later drain once due.
+        """
+        limit = limit or settings.JOB_QUEUE_DRAIN_LIMIT
+        reclaimed = await self.reclaim_expired(db)
+        cursor = db[JOBS_COLLECTION].find(
+            {"status": "queued", "next_run_at": {"$lte": datetime.utcnow()}},
+            {"_id": 1}
+        ).sort("next_run_at", 1).limit(limit)
+        job_ids = [str(job["_id"]) async for job in cursor]
+
+        semaphore = asyncio.Semaphore(settings.JOB_QUEUE_CONCURRENCY)
+
+        async def run(job_id: str):
+            async with semaphore:
+                await self._process(job_id, db)
+
+        results = await asyncio.gather(*(run(job_id) for job_id in job_ids), return_exceptions=True)
+        for job_id, result in zip(job_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error draining job {job_id}: {result}")
+        return {"reclaimed": reclaimed, "processed": len(job_ids)}
+
+    def _submit(self, job_id: str):
+        """Put a job id on the local queue once"""
+        if job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _worker(self, worker_id: int):
+        """Consume job ids from the local queue"""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id, self.db)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} error on job {job_id}: {e}")
+            finally:
+                self._pending.discard(job_id)
+                self._queue.task_done()
+
+    async def reclaim_expired(self, db: AsyncIOMotorDatabase) -> int:
+        """Re-queue running jobs whose owner stopped renewing the lease (crashed or killed)"""
+        now = datetime.utcnow()
+        result = await db[JOBS_COLLECTION].update_many(
+            {"status": "running", "$or": [{"locked_until": {"$lt": now}}, {"locked_until": None}]},
+            {
+                "$set": {"status": "queued", "next_run_at": now, "updated_at": now},
+                "$unset": {"owner": "", "locked_until": ""}
+            }
+        )
+        if result.modified_count:
+            logger.warning(f"Re-queued {result.modified_count} background jobs with expired leases")
+        return result.modified_count
+
+    async def _poll_due_jobs(self):
+        """Pick up recovered, retried and other-process jobs that are due"""
+        while True:
+            try:
+                await self.reclaim_expired(self.db)
+                cursor = self.db[JOBS_COLLECTION].find(
+                    {"status": "queued", "next_run_at": {"$lte": datetime.utcnow()}},
+                    {"_id": 1}
+                ).sort("next_run_at", 1).limit(500)
+                async for job in cursor:
+                    self._submit(str(job["_id"]))
+            except Exception as e:
+                logger.error(f"Error polling background jobs: {e}")
+            await asyncio.sleep(settings.JOB_QUEUE_POLL_INTERVAL)
+
+    async def _process(self, job_id: str, db: AsyncIOMotorDatabase):
+        """Claim, run and record the outcome of one job"""
+        jobs = db[JOBS_COLLECTION]
+        job = await jobs.find_one_and_update(
+            {"_id": ObjectId(job_id), "status": "queued", "next_run_at": {"$lte": datetime.utcnow()}},
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": self.owner,
+                    "locked_until": datetime.utcnow() + timedelta(seconds=settings.JOB_QUEUE_LEASE_SECONDS),
+                    "updated_at": datetime.utcnow()
+                },
+                "$inc": {"attempts": 1}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        if not job:
+            return  # Claimed elsewhere, finished, or not due yet
+
+        # Outcome writes only land while this process still holds the lease
+        owned = {"_id": job["_id"], "owner": self.owner}
+        release = {"owner": "", "locked_until": ""}
+        handler = self.handlers.get(job["type"])
+        renewer = asyncio.create_task(self._renew_lease(job["_id"], db))
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type {job['type']}")
+            await asyncio.wait_for(handler(job["payload"], db), timeout=settings.JOB_QUEUE_JOB_TIMEOUT)
+
+            await jobs.update_one(
+                owned,
+                {
+                    "$set": {"status": "completed", "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                    "$unset": release
+                }
+            )
+
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            if job["attempts"] >= job["max_attempts"]:
+                logger.error(f"Job {job_id} ({job['type']}) failed permanently: {error}")
+                await jobs.update_one(
+                    owned,
+                    {
+                        "$set": {
+                            "status": "failed",
+                            "last_error": error,
+                            "finished_at": datetime.utcnow(),
+                            "updated_at": datetime.utcnow()
+                        },
+                        "$unset": release
+                    }
+                )
+                return
+
+            delay = min(
+                settings.JOB_QUEUE_RETRY_BASE_DELAY * (2 ** (job["attempts"] - 1)),
+                settings.JOB_QUEUE_RETRY_MAX_DELAY
+            )
+            logger.warning(f"Job {job_id} ({job['type']}) attempt {job['attempts']} failed, retrying in {delay}s: {error}")
+            result = await jobs.update_one(
+                owned,
+                {
+                    "$set": {
+                        "status": "queued",
+                        "last_error": error,
+                        "next_run_at": datetime.utcnow() + timedelta(seconds=delay),
+                        "updated_at": datetime.utcnow()
+                    },
+                    "$unset": release
+                }
+            )
+            if result.modified_count and self.running:
+                asyncio.get_running_loop().call_later(delay, self._submit, job_id)
+
+        finally:
+            renewer.cancel()
+
+    async def _renew_lease(self, job_id: ObjectId, db: AsyncIOMotorDatabase):
+        """Extend the lease on a running job until cancelled"""
+        while True:
+            await asyncio.sleep(settings.JOB_QUEUE_LEASE_SECONDS / 3)
+            try:
+                result = await db[JOBS_COLLECTION].update_one(
+                    {"_id": job_id, "owner": self.owner, "status": "running"},
+                    {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=settings.JOB_QUEUE_LEASE_SECONDS)}}
+                )
+                if not result.matched_count:
+                    logger.warning(f"Lost the lease on job {job_id}; another worker may run it again")
+                    return
+            except Exception as e:
+                logger.error(f"Error renewing lease on job {job_id}: {e}")
+
+
+# Export singleton instance
+job_queue = JobQueue()
@@ -0,0 +1,309 @@
+"""
+Outbox dispatcher delivering notifications over email, SMS and push
+
+Notification documents are the outbox: create paths only record which external
+channels are still pending, and per-channel workers claim due documents in
+batches, send them and record the outcome. Nothing is sent inside a request.
+"""
+
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.models.notification import NotificationChannel
+
+try:
+    import aiosmtplib
+    AIOSMTPLIB_AVAILABLE = True
+except ImportError:
+    aiosmtplib = None
+    AIOSMTPLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# {notification id: error message, or None when delivered}
+SendResults = Dict[str, Optional[str]]
+
+
+class ChannelSender(ABC):
+    """Delivers batches of notifications over one channel"""
+
+    channel: NotificationChannel
+
+    def enabled(self) -> bool:
+        """Whether new notifications should be queued for this channel"""
+        return True
+
+    @abstractmethod
+    async def send_batch(self, notifications: List[Dict[str, Any]], db: AsyncIOMotorDatabase) -> SendResults:
+        """Send every notification; never raise for a single failed recipient"""
+
+    async def close(self):
+        """Release connections"""
+
+
+class EmailSender(ChannelSender):
+    """SMTP delivery over a small pool of reused aiosmtplib connections"""
+
+    channel = NotificationChannel.EMAIL
+
+    def __init__(self):
+        self._idle: List[Any] = []
+        self._available: Optional[asyncio.Semaphore] = None
+
+    def enabled(self) -> bool:
+        """Email needs the flag, an SMTP host and aiosmtplib"""
+        return bool(settings.ENABLE_EMAIL_NOTIFICATIONS and settings.SMTP_HOST and AIOSMTPLIB_AVAILABLE)
+
+    async def _acquire(self):
+        """Take an idle connection or open a new one (at most SMTP_POOL_SIZE)"""
+        if self._available is None:
+            self._available = asyncio.Semaphore(settings.SMTP_POOL_SIZE)
+        await self._available.acquire()
+        try:
+            while self._idle:
+                client = self._idle.pop()
+                if client.is_connected:
+                    return client
+            client = aiosmtplib.SMTP(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT or (587 if settings.SMTP_TLS else 25),
+                start_tls=settings.SMTP_TLS,
+                timeout=settings.SMTP_TIMEOUT
+            )
+            await client.connect()
+            if settings.SMTP_USER:
+                await client.login(settings.SMTP_USER, settings.SMTP_PASSWORD or "")
+            return client
+        except Exception:
+            self._available.release()
+            raise
+
+    def _release(self, client, broken: bool = False):
+        """Return a connection to the pool, or drop it after an error"""
+        if broken or not client.is_connected:
+            client.close()
+        else:
+            self._idle.append(client)
+        self._available.release()
+
+    def _build_message(self, notification: Dict[str, Any], recipient: str) -> EmailMessage:
+        """Plain-text email for a notification"""
+        message = EmailMessage()
+        sender = settings.EMAILS_FROM_EMAIL or settings.SMTP_USER
+        message["From"] = f"{settings.EMAILS_FROM_NAME} <{sender}>" if settings.EMAILS_FROM_NAME else sender
+        message["To"] = recipient
+        message["Subject"] = notification["title"]
+        message.set_content(notification["message"])
+        return message
+
+    async def _send_one(self, notification: Dict[str, Any], recipient: Optional[str]) -> Optional[str]:
+        """Send one email; return an error message on failure"""
+        if not recipient:
+            return "user has no email address"
+        try:
+            client = await self._acquire()
+        except Exception as e:
+            return f"SMTP connection failed: {e}"
+        try:
+            await client.send_message(self._build_message(notification, recipient))
+        except aiosmtplib.SMTPRecipientsRefused as e:
+            self._release(client)
+            return str(e)
+        except Exception as e:
+            self._release(client, broken=True)
+            return str(e) or e.__class__.__name__
+        self._release(client)
+        return None
+
+    async def send_batch(self, notifications: List[Dict[str, Any]], db: AsyncIOMotorDatabase) -> SendResults:
+        """Resolve recipients in one query, then send over the pooled connections"""
+        user_ids = {n["user_id"] for n in notifications if ObjectId.is_valid(n.get("user_id") or "")}
+        emails = {
+            str(user["_id"]): user.get("email")
+            async for user in db.users.find({"_id": {"$in": [ObjectId(i) for i in user_ids]}}, {"email": 1})
+        }
+        errors = await asyncio.gather(*(
+            self._send_one(notification, emails.get(notification["user_id"]))
+            for notification in notifications
+        ))
+        return {str(n["_id"]): error for n, error in zip(notifications, errors)}
+
+    async def close(self):
+        """Close idle connections"""
+        while self._idle:
+            client = self._idle.pop()
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+class NotificationDispatcher:
+    """One polling worker per registered channel, draining the notification outbox"""
+
+    def __init__(self):
+        self.senders: Dict[str, ChannelSender] = {}
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self.counters = {"sent": 0, "failed": 0, "retried": 0}
+
+    @property
+    def running(self) -> bool:
+        """Whether channel workers are running in this process"""
+        return bool(self._workers)
+
+    def register(self, sender: ChannelSender):
+        """Register the sender for a channel (e.g. an SMS or push provider)"""
+        self.senders[sender.channel.value] = sender
+
+    def outbox_fields(self, channels: List[str], now: datetime) -> Dict[str, Any]:
+        """Fields a new notification needs so the workers pick up its external channels"""
+        pending = [
+            channel for channel in channels
+            if channel in self.senders and self.senders[channel].enabled()
+        ]
+        return {
+            "pending_channels": pending,
+            "delivery": {channel: {"attempts": 0, "next_attempt_at": now} for channel in pending},
+            # In-app delivery happens on insert; sent_at waits for the external channels
+            "sent_at": None if pending else now
+        }
+
+    def wake(self, channels: List[str]):
+        """Tell local workers new work is due instead of waiting for the next poll"""
+        for channel in channels:
+            event = self._wakeups.get(channel)
+            if event is not None:
+                event.set()
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start a worker for every enabled channel"""
+        if self.running:
+            return
+        self.db = db
+        for channel, sender in self.senders.items():
+            if sender.enabled():
+                self._wakeups[channel] = asyncio.Event()
+                self._workers[channel] = asyncio.create_task(self._worker(channel))
+        if self._workers:
+            logger.info(f"Notification dispatcher started for {', '.join(self._workers)}")
+
+    async def stop(self):
+        """Stop workers; claimed notifications are retried once their lease expires"""
+        tasks = list(self._workers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = {}
+        self._wakeups = {}
+        for sender in self.senders.values():
+            await sender.close()
+
+    async def _worker(self, channel: str):
+        """Drain due notifications for a channel, then sleep until woken or polled"""
+        wakeup = self._wakeups[channel]
+        while True:
+            try:
+                if await self.dispatch_batch(channel, self.db):
+                    continue
+            except Exception as e:
+                logger.error(f"Error dispatching {channel} notifications: {e}")
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=settings.NOTIFICATION_DISPATCH_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, channel: str, db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+        """Lease a batch of due notifications so other workers skip them"""
+        now = datetime.utcnow()
+        due = {"pending_channels": channel, f"delivery.{channel}.next_attempt_at": {"$lte": now}}
+        ids = [
+            doc["_id"] async for doc in db.notifications.find(due, {"_id": 1})
+            .limit(settings.NOTIFICATION_DISPATCH_BATCH_SIZE)
+        ]
+        if not ids:
+            return []
+
+        claim = uuid.uuid4().hex
+        lease_until = now + timedelta(seconds=settings.NOTIFICATION_DISPATCH_LEASE_SECONDS)
+        await db.notifications.update_many(
+            {"_id": {"$in": ids}, **due},
+            {"$set": {f"delivery.{channel}.next_attempt_at": lease_until, f"delivery.{channel}.claim": claim}}
+        )
+        return await db.notifications.find({"_id": {"$in": ids}, f"delivery.{channel}.claim": claim}).to_list(length=None)
+
+    async def dispatch_batch(self, channel: str, db: AsyncIOMotorDatabase) -> int:
+        """Claim, send and record one batch; returns how many notifications were handled"""
+        notifications = await self._claim(channel, db)
+        if not notifications:
+            return 0
+
+        try:
+            results = await self.senders[channel].send_batch(notifications, db)
+        except Exception as e:
+            results = {str(n["_id"]): str(e) or e.__class__.__name__ for n in notifications}
+
+        now = datetime.utcnow()
+        operations = []
+        for notification in notifications:
+            error = results.get(str(notification["_id"]), "not sent")
+            attempts = notification["delivery"][channel].get("attempts", 0) + 1
+            if error is None:
+                self.counters["sent"] += 1
+                update = {
+                    "$pull": {"pending_channels": channel},
+                    "$set": {f"delivery.{channel}.attempts": attempts, f"delivery.{channel}.delivered_at": now},
+                    "$unset": {f"delivery.{channel}.claim": "", f"delivery.{channel}.next_attempt_at": ""}
+                }
+            elif attempts >= settings.NOTIFICATION_DISPATCH_MAX_ATTEMPTS:
+                logger.error(f"Giving up on {channel} notification {notification['_id']}: {error}")
+                self.counters["failed"] += 1
+                update = {
+                    "$pull": {"pending_channels": channel},
+                    "$addToSet": {"failed_channels": channel},
+                    "$set": {f"delivery.{channel}.attempts": attempts, f"delivery.{channel}.last_error": error},
+                    "$unset": {f"delivery.{channel}.claim": "", f"delivery.{channel}.next_attempt_at": ""}
+                }
+            else:
+                delay = min(
+                    settings.NOTIFICATION_DISPATCH_RETRY_BASE_DELAY * (2 ** (attempts - 1)),
+                    settings.NOTIFICATION_DISPATCH_RETRY_MAX_DELAY
+                )
+                self.counters["retried"] += 1
+                update = {
+                    "$set": {
+                        f"delivery.{channel}.attempts": attempts,
+                        f"delivery.{channel}.last_error": error,
+                        f"delivery.{channel}.next_attempt_at": now + timedelta(seconds=delay)
+                    },
+                    "$unset": {f"delivery.{channel}.claim": ""}
+                }
+            operations.append(UpdateOne({"_id": notification["_id"]}, update))
+
+        await db.notifications.bulk_write(operations, ordered=False)
+        # Sent once nothing is pending anymore (a channel that gave up counts as done, even
+        # when this batch's failure was the last one outstanding)
+        await db.notifications.update_many(
+            {"_id": {"$in": [n["_id"] for n in notifications]}, "pending_channels": {"$size": 0}, "sent_at": None},
+            {"$set": {"sent_at": now}}
+        )
+        return len(notifications)
+
+    def stats(self) -> Dict[str, Any]:
+        """Delivery counters and active channels"""
+        return {**self.counters, "channels": sorted(self._workers)}
+
+
+# Export singleton instance
+notification_dispatcher = NotificationDispatcher()
+notification_dispatcher.register(EmailSender())
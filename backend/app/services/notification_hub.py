@@ -0,0 +1,128 @@
+"""
+In-process pub/sub hub pushing new notifications to connected clients
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def to_event(notification: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready payload for a notification document (same fields as NotificationResponse)"""
+    created_at = notification.get("created_at")
+    return {
+        "id": str(notification["_id"]),
+        "title": notification.get("title"),
+        "message": notification.get("message"),
+        "type": notification.get("type"),
+        "priority": notification.get("priority"),
+        "channels": notification.get("channels", []),
+        "data": notification.get("data") or {},
+        "user_id": notification.get("user_id"),
+        "grievance_id": notification.get("grievance_id"),
+        "is_read": notification.get("is_read", False),
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at
+    }
+
+
+class NotificationHub:
+    """Per-user subscriber queues, fed locally or by a MongoDB change stream"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._bridge: Optional[asyncio.Task] = None
+        self.bridge_active = False
+        self.counters = {"published": 0, "delivered": 0, "dropped": 0}
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        """Register a connection and return the queue its events arrive on"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.NOTIFICATION_STREAM_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        """Forget a closed connection"""
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def publish(self, notification: Dict[str, Any]):
+        """Announce a freshly inserted notification
+
+        With the change-stream bridge running every worker learns about inserts
+        from MongoDB, so local publishes are skipped to avoid duplicates.
+        """
+        if not self.bridge_active:
+            self._deliver(notification)
+
+    def _deliver(self, notification: Dict[str, Any]):
+        """Push a notification to every connection of its user"""
+        self.counters["published"] += 1
+        queues = self._subscribers.get(str(notification.get("user_id")))
+        if not queues:
+            return
+        event = to_event(notification)
+        for queue in queues:
+            if queue.full():
+                # Slow client: drop its oldest event rather than grow without bound
+                queue.get_nowait()
+                self.counters["dropped"] += 1
+            queue.put_nowait(event)
+            self.counters["delivered"] += 1
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the change-stream bridge (needs a replica set)"""
+        if self._bridge is None:
+            self._bridge = asyncio.create_task(self._watch(db))
+
+    async def stop(self):
+        """Stop the change-stream bridge"""
+        if self._bridge is not None:
+            self._bridge.cancel()
+            await asyncio.gather(self._bridge, return_exceptions=True)
+            self._bridge = None
+        self.bridge_active = False
+
+    async def _watch(self, db: AsyncIOMotorDatabase):
+        """Relay notification inserts from any worker to this worker's subscribers"""
+        resume_token = None
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with db.notifications.watch(pipeline, resume_after=resume_token) as stream:
+                    if not self.bridge_active:
+                        logger.info("Notification change stream bridge started")
+                    self.bridge_active = True
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self._deliver(change["fullDocument"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self.bridge_active:
+                    logger.warning(f"Notification change stream unavailable, publishing in-process only: {e}")
+                    self._bridge = None
+                    return
+                # Keep suppressing local publishes; the resume token replays what was missed
+                logger.error(f"Notification change stream interrupted, resuming: {e}")
+                await asyncio.sleep(settings.NOTIFICATION_STREAM_RETRY_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection and delivery counters"""
+        return {
+            **self.counters,
+            "users": len(self._subscribers),
+            "connections": sum(len(queues) for queues in self._subscribers.values()),
+            "bridge_active": self.bridge_active
+        }
+
+
+# Export singleton instance
+notification_hub = NotificationHub()
@@ -0,0 +1,183 @@
+"""
+Notification retention: archive stale unread notifications and cap each user's inbox
+
+Read notifications are removed by the TTL index on read_at (see app.core.indexes);
+this service moves what the TTL index cannot touch into notifications_archive.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.services.unread_counter_service import unread_counter_service
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLLECTION = "notifications_archive"
+DUPLICATE_KEY_ERROR = 11000
+
+OLDEST_FIRST = [("created_at", 1), ("_id", 1)]
+
+# Notifications the dispatcher still has to deliver stay in the hot collection
+NOTHING_PENDING = {"pending_channels.0": {"$exists": False}}
+
+# Fields kept in the archive; delivery bookkeeping is dropped
+ARCHIVED_FIELDS = (
+    "user_id", "grievance_id", "title", "message", "type", "priority", "is_read", "created_at", "read_at"
+)
+
+
+class NotificationRetentionService:
+    """Batched moves from notifications to notifications_archive"""
+
+    def __init__(self):
+        self._runner: Optional[asyncio.Task] = None
+        self.counters = {"archived": 0, "trimmed": 0}
+
+    def _compact(self, notification: Dict[str, Any], archived_at: datetime) -> Dict[str, Any]:
+        """Archive document for a notification (same _id, so a repeated move is a no-op)"""
+        archived = {field: notification.get(field) for field in ARCHIVED_FIELDS}
+        archived["_id"] = notification["_id"]
+        if notification.get("data"):
+            archived["data"] = notification["data"]
+        archived["archived_at"] = archived_at
+        return archived
+
+    async def _move_batch(self, db: AsyncIOMotorDatabase, query: Dict[str, Any], limit: int) -> int:
+        """Move up to `limit` of the oldest matching notifications; returns how many moved"""
+        notifications = await db.notifications.find(query).sort(OLDEST_FIRST).limit(limit).to_list(length=limit)
+        if not notifications:
+            return 0
+
+        archived_at = datetime.utcnow()
+        try:
+            await db[ARCHIVE_COLLECTION].insert_many(
+                [self._compact(notification, archived_at) for notification in notifications], ordered=False
+            )
+        except BulkWriteError as e:
+            # Copies left by an interrupted run are fine; anything else aborts the move
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+
+        # Delete each notification only in the read state it was archived in, so one
+        # marked read meanwhile stays (and its counter is not decremented twice)
+        read_ids = []
+        unread_ids: Dict[Any, List[Any]] = defaultdict(list)
+        for notification in notifications:
+            if notification.get("is_read"):
+                read_ids.append(notification["_id"])
+            else:
+                unread_ids[notification.get("user_id")].append(notification["_id"])
+
+        deleted = 0
+        if read_ids:
+            deleted += (await db.notifications.delete_many({"_id": {"$in": read_ids}})).deleted_count
+        # Unread ones go per user, and each counter drops by what this pass actually deleted,
+        # so a pass racing over the same batch can't decrement it a second time
+        unread: Dict[Any, int] = {}
+        for user_id, ids in unread_ids.items():
+            result = await db.notifications.delete_many({"_id": {"$in": ids}, "is_read": False})
+            deleted += result.deleted_count
+            if user_id and result.deleted_count:
+                unread[user_id] = -result.deleted_count
+
+        if deleted < len(notifications):
+            kept = [
+                doc["_id"] async for doc in db.notifications.find(
+                    {"_id": {"$in": [n["_id"] for n in notifications]}}, {"_id": 1}
+                )
+            ]
+            if kept:
+                await db[ARCHIVE_COLLECTION].delete_many({"_id": {"$in": kept}})
+
+        await unread_counter_service.increment_many(db, unread)
+        return deleted
+
+    async def archive_stale(self, db: AsyncIOMotorDatabase) -> int:
+        """Move unread notifications older than NOTIFICATION_ARCHIVE_AFTER_DAYS to the archive"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.NOTIFICATION_ARCHIVE_AFTER_DAYS)
+        query = {"is_read": False, "created_at": {"$lt": cutoff}, **NOTHING_PENDING}
+        archived = 0
+        while True:
+            moved = await self._move_batch(db, query, settings.NOTIFICATION_RETENTION_BATCH_SIZE)
+            archived += moved
+            if moved < settings.NOTIFICATION_RETENTION_BATCH_SIZE:
+                break
+        self.counters["archived"] += archived
+        return archived
+
+    async def trim_inboxes(self, db: AsyncIOMotorDatabase) -> int:
+        """Archive each user's oldest notifications beyond NOTIFICATION_MAX_PER_USER"""
+        cap = settings.NOTIFICATION_MAX_PER_USER
+        if cap <= 0:
+            return 0
+
+        over_cap: List[Dict[str, Any]] = [
+            row async for row in db.notifications.aggregate([
+                {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+                {"$match": {"count": {"$gt": cap}}}
+            ], allowDiskUse=True)
+            if row["_id"] is not None
+        ]
+
+        trimmed = 0
+        for row in over_cap:
+            excess = row["count"] - cap
+            query = {"user_id": row["_id"], **NOTHING_PENDING}
+            while excess > 0:
+                moved = await self._move_batch(
+                    db, query, min(excess, settings.NOTIFICATION_RETENTION_BATCH_SIZE)
+                )
+                if not moved:
+                    break
+                excess -= moved
+                trimmed += moved
+        self.counters["trimmed"] += trimmed
+        return trimmed
+
+    async def run(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """One retention pass: stale unread notifications first, then per-user caps"""
+        archived = await self.archive_stale(db)
+        trimmed = await self.trim_inboxes(db)
+        if archived or trimmed:
+            logger.info(f"Notification retention archived {archived} stale and {trimmed} over-cap notifications")
+        return {"archived": archived, "trimmed": trimmed}
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the periodic retention pass"""
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run_periodically(db))
+
+    async def stop(self):
+        """Stop the periodic retention pass"""
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+    async def _run_periodically(self, db: AsyncIOMotorDatabase):
+        """Run on startup, then every NOTIFICATION_RETENTION_INTERVAL seconds (0: startup only)"""
+        while True:
+            try:
+                await self.run(db)
+            except Exception as e:
+                logger.error(f"Error applying notification retention: {e}")
+            if settings.NOTIFICATION_RETENTION_INTERVAL <= 0:
+                return
+            await asyncio.sleep(settings.NOTIFICATION_RETENTION_INTERVAL)
+
+    async def stats(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Moved counts for this process and approximate collection sizes"""
+        return {
+            **self.counters,
+            "notifications": await db.notifications.estimated_document_count(),
+            "archived_total": await db[ARCHIVE_COLLECTION].estimated_document_count()
+        }
+
+
+# Export singleton instance
+notification_retention_service = NotificationRetentionService()
@@ -2,19 +2,29 @@
 Notification service for managing user notifications
 """
 
+from collections import Counter
 from datetime import datetime
 from typing import List, Optional, Dict, Any
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.database import get_database
 from app.models.notification import (
     NotificationCreate, NotificationInDB, NotificationResponse, 
-    NotificationUpdate, NotificationType, NotificationPriority
+    NotificationUpdate, NotificationType, NotificationPriority, NotificationChannel
 )
 from app.core.exceptions import NotFoundError
+from app.core.pagination import CursorPosition, NEWEST_FIRST, keyset_filter
+from app.services.job_queue import job_queue
+from app.services.notification_hub import notification_hub
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.unread_counter_service import unread_counter_service
 import logging
 
 logger = logging.getLogger(__name__)
 
+DUPLICATE_KEY_ERROR = 11000
+
 
 class NotificationService:
     """Notification service class"""
@@ -38,16 +48,15 @@ class NotificationService:
                 "is_read": False,
                 "created_at": datetime.utcnow(),
                 "read_at": None,
-                "sent_at": None,
                 "failed_channels": []
             }
             
             # Insert notification
-            result = await db.notifications.insert_one(notification_doc)
-            notification_doc["_id"] = str(result.inserted_id)
+            result = await db.notifications.insert_one(self._with_outbox(notification_doc))
+            await unread_counter_service.increment(db, notification_doc["user_id"])
             
-            # TODO: Send notification through configured channels
-            await self._send_notification(notification_doc)
+            # Send notification through configured channels
+            await self._send_notification(notification_doc, db)
             
             return NotificationResponse(
                 id=str(result.inserted_id),
@@ -74,7 +83,8 @@ class NotificationService:
         db: AsyncIOMotorDatabase,
         skip: int = 0, 
         limit: int = 20,
-        unread_only: bool = False
+        unread_only: bool = False,
+        position: Optional[CursorPosition] = None
     ) -> List[NotificationResponse]:
         """Get notifications for a user"""
         try:
@@ -83,8 +93,8 @@ class NotificationService:
             if unread_only:
                 filter_query["is_read"] = False
             
-            # Get notifications
-            cursor = db.notifications.find(filter_query).sort("created_at", -1).skip(skip).limit(limit)
+            # Get notifications (keyset page when a cursor position is given)
+            cursor = db.notifications.find(keyset_filter(filter_query, position)).sort(NEWEST_FIRST).skip(skip).limit(limit)
             notifications = await cursor.to_list(length=limit)
             
             # Convert to response format
@@ -111,11 +121,13 @@ class NotificationService:
             logger.error(f"Error getting user notifications: {e}")
             return []
     
-    async def mark_as_read(self, notification_id: str, user_id: str) -> bool:
+    async def mark_as_read(self, notification_id: str, user_id: str, db: AsyncIOMotorDatabase) -> bool:
         """Mark a notification as read"""
         try:
-            result = await self.db.notifications.update_one(
-                {"_id": notification_id, "user_id": user_id},
+            if not ObjectId.is_valid(notification_id):
+                return False
+            result = await db.notifications.update_one(
+                {"_id": ObjectId(notification_id), "user_id": user_id, "is_read": False},
                 {
                     "$set": {
                         "is_read": True,
@@ -123,16 +135,23 @@ class NotificationService:
                     }
                 }
             )
-            return result.modified_count > 0
+            if result.modified_count > 0:
+                await unread_counter_service.increment(db, user_id, -1)
+                return True
+            
+            # Already read is still a success as long as the notification exists
+            return await db.notifications.count_documents(
+                {"_id": ObjectId(notification_id), "user_id": user_id}, limit=1
+            ) > 0
             
         except Exception as e:
             logger.error(f"Error marking notification as read: {e}")
             return False
     
-    async def mark_all_as_read(self, user_id: str) -> int:
+    async def mark_all_as_read(self, user_id: str, db: AsyncIOMotorDatabase) -> int:
         """Mark all notifications as read for a user"""
         try:
-            result = await self.db.notifications.update_many(
+            result = await db.notifications.update_many(
                 {"user_id": user_id, "is_read": False},
                 {
                     "$set": {
@@ -141,6 +160,8 @@ class NotificationService:
                     }
                 }
             )
+            # Decrement rather than reset, so notifications created meanwhile still count
+            await unread_counter_service.increment(db, user_id, -result.modified_count)
             return result.modified_count
             
         except Exception as e:
@@ -150,24 +171,26 @@ class NotificationService:
     async def get_unread_count(self, user_id: str, db: AsyncIOMotorDatabase) -> int:
         """Get count of unread notifications for a user"""
         try:
-            count = await db.notifications.count_documents({
-                "user_id": user_id,
-                "is_read": False
-            })
-            return count
+            return await unread_counter_service.get(db, user_id)
             
         except Exception as e:
             logger.error(f"Error getting unread count: {e}")
             return 0
     
-    async def delete_notification(self, notification_id: str, user_id: str) -> bool:
+    async def delete_notification(self, notification_id: str, user_id: str, db: AsyncIOMotorDatabase) -> bool:
         """Delete a notification"""
         try:
-            result = await self.db.notifications.delete_one({
-                "_id": notification_id,
-                "user_id": user_id
-            })
-            return result.deleted_count > 0
+            if not ObjectId.is_valid(notification_id):
+                return False
+            deleted = await db.notifications.find_one_and_delete(
+                {"_id": ObjectId(notification_id), "user_id": user_id},
+                projection={"is_read": 1}
+            )
+            if deleted is None:
+                return False
+            if not deleted.get("is_read"):
+                await unread_counter_service.increment(db, user_id, -1)
+            return True
             
         except Exception as e:
             logger.error(f"Error deleting notification: {e}")
@@ -180,6 +203,7 @@ class NotificationService:
         notification_type: NotificationType,
         title: str,
         message: str,
+        db: AsyncIOMotorDatabase,
         priority: NotificationPriority = NotificationPriority.MEDIUM,
         data: Optional[Dict[str, Any]] = None
     ) -> NotificationResponse:
@@ -189,40 +213,37 @@ class NotificationService:
             message=message,
             type=notification_type,
             priority=priority,
-            channels=[NotificationType.IN_APP],
+            channels=[NotificationChannel.IN_APP],
             data=data or {},
             user_id=user_id,
             grievance_id=grievance_id
         )
         
-        return await self.create_notification(notification_data)
+        return await self.create_notification(notification_data, db)
     
-    async def create_department_assignment_notification(
+    async def department_assignment_notifications(
         self,
         department_name: str,
         grievance_id: str,
         grievance_title: str,
         citizen_name: str,
         db: AsyncIOMotorDatabase
-    ) -> bool:
-        """Create notification for department assignment"""
-        try:
-            # Find department head or admin
-            department_head = await db.users.find_one({
-                "role": "department_head",
-                "department": department_name
-            })
-            
-            if not department_head:
-                # Fallback to any admin
-                department_head = await db.users.find_one({"role": "admin"})
-            
-            if not department_head:
-                logger.warning(f"No department head or admin found for {department_name}")
-                return False
-            
-            # Create notification for department head
-            notification_data = {
+    ) -> List[Dict[str, Any]]:
+        """Notification documents for every head of a department, or an admin when it has none"""
+        recipients = [
+            str(user["_id"]) async for user in db.users.find(
+                {"role": "department_head", "department": department_name}, {"_id": 1}
+            )
+        ]
+        
+        if not recipients:
+            # Fallback to any admin
+            admin = await db.users.find_one({"role": "admin"}, {"_id": 1})
+            recipients = [str(admin["_id"])] if admin else []
+        
+        created_at = datetime.utcnow()
+        return [
+            {
                 "title": "New Grievance Assigned",
                 "message": f"Grievance '{grievance_title}' from {citizen_name} has been assigned to {department_name}",
                 "type": "assignment",
@@ -234,23 +255,67 @@ class NotificationService:
                     "citizen_name": citizen_name,
                     "grievance_title": grievance_title
                 },
-                "user_id": str(department_head["_id"]),
+                "user_id": user_id,
                 "grievance_id": grievance_id,
                 "is_read": False,
-                "created_at": datetime.utcnow(),
+                "created_at": created_at,
                 "read_at": None,
-                "sent_at": None,
                 "failed_channels": []
             }
+            for user_id in recipients
+        ]
+    
+    async def create_department_assignment_notification(
+        self,
+        department_name: str,
+        grievance_id: str,
+        grievance_title: str,
+        citizen_name: str,
+        db: AsyncIOMotorDatabase
+    ) -> bool:
+        """Create notification for department assignment"""
+        try:
+            notifications = await self.department_assignment_notifications(
+                department_name, grievance_id, grievance_title, citizen_name, db
+            )
+            if not notifications:
+                logger.warning(f"No department head or admin found for {department_name}")
+                return False
             
-            await db.notifications.insert_one(notification_data)
-            logger.info(f"Department assignment notification created for {department_name}")
+            await self.insert_notifications(notifications, db)
+            logger.info(f"Department assignment notification created for {department_name} ({len(notifications)} recipients)")
             return True
             
         except Exception as e:
             logger.error(f"Error creating department assignment notification: {e}")
             return False
     
+    def citizen_notification(
+        self,
+        citizen_id: str,
+        grievance_id: str,
+        notification_type: str,
+        title: str,
+        message: str
+    ) -> Dict[str, Any]:
+        """Notification document for the citizen who reported a grievance"""
+        return {
+            "title": title,
+            "message": message,
+            "type": notification_type,
+            "priority": "medium",
+            "channels": ["in_app"],
+            "data": {
+                "grievance_id": grievance_id
+            },
+            "user_id": citizen_id,
+            "grievance_id": grievance_id,
+            "is_read": False,
+            "created_at": datetime.utcnow(),
+            "read_at": None,
+            "failed_channels": []
+        }
+    
     async def create_citizen_notification(
         self,
         citizen_id: str,
@@ -262,25 +327,11 @@ class NotificationService:
     ) -> bool:
         """Create notification for citizen"""
         try:
-            notification_data = {
-                "title": title,
-                "message": message,
-                "type": notification_type,
-                "priority": "medium",
-                "channels": ["in_app"],
-                "data": {
-                    "grievance_id": grievance_id
-                },
-                "user_id": citizen_id,
-                "grievance_id": grievance_id,
-                "is_read": False,
-                "created_at": datetime.utcnow(),
-                "read_at": None,
-                "sent_at": None,
-                "failed_channels": []
-            }
+            notification_data = self.citizen_notification(citizen_id, grievance_id, notification_type, title, message)
             
-            await db.notifications.insert_one(notification_data)
+            await db.notifications.insert_one(self._with_outbox(notification_data))
+            await unread_counter_service.increment(db, notification_data["user_id"])
+            await self._send_notification(notification_data, db)
             logger.info(f"Citizen notification created for user {citizen_id}")
             return True
             
@@ -288,25 +339,67 @@ class NotificationService:
             logger.error(f"Error creating citizen notification: {e}")
             return False
     
-    async def _send_notification(self, notification_doc: Dict[str, Any]) -> None:
-        """Send notification through configured channels"""
+    async def run_citizen_notification_job(self, payload: Dict[str, Any], db: AsyncIOMotorDatabase) -> None:
+        """Background job handler for citizen notifications"""
+        created = await self.create_citizen_notification(
+            citizen_id=payload["citizen_id"],
+            grievance_id=payload["grievance_id"],
+            notification_type=payload["notification_type"],
+            title=payload["title"],
+            message=payload["message"],
+            db=db
+        )
+        if not created:
+            raise RuntimeError(f"Could not create citizen notification for grievance {payload['grievance_id']}")
+    
+    async def insert_notifications(self, notification_docs: List[Dict[str, Any]], db: AsyncIOMotorDatabase) -> int:
+        """Insert notification documents in one unordered write, then count, push and queue them
+
+        Duplicate-key errors (a resumed fan-out re-sending to the same user) are
+        skipped; returns how many notifications were actually inserted.
+        """
+        if not notification_docs:
+            return 0
+        
+        for notification_doc in notification_docs:
+            self._with_outbox(notification_doc)
+        
+        write_error = None
         try:
-            # TODO: Implement actual notification sending
-            # - Email notifications
-            # - SMS notifications
-            # - Push notifications
-            # - WebSocket real-time updates
-            
-            # For now, just mark as sent
-            await self.db.notifications.update_one(
-                {"_id": notification_doc["_id"]},
-                {"$set": {"sent_at": datetime.utcnow()}}
-            )
-            
-        except Exception as e:
-            logger.error(f"Error sending notification: {e}")
-            # Mark failed channels
-            await self.db.notifications.update_one(
-                {"_id": notification_doc["_id"]},
-                {"$set": {"failed_channels": notification_doc["channels"]}}
-            )
+            await db.notifications.insert_many(notification_docs, ordered=False)
+            inserted = notification_docs
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            failed = {error["index"] for error in errors}
+            inserted = [doc for index, doc in enumerate(notification_docs) if index not in failed]
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                write_error = e
+        
+        unread = Counter(doc["user_id"] for doc in inserted)
+        await unread_counter_service.increment_many(db, unread)
+        pending_channels = set()
+        for notification_doc in inserted:
+            notification_hub.publish(notification_doc)
+            pending_channels.update(notification_doc["pending_channels"])
+        notification_dispatcher.wake(list(pending_channels))
+        
+        if write_error is not None:
+            raise write_error
+        return len(inserted)
+    
+    def _with_outbox(self, notification_doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the outbox fields (pending external channels, sent_at) before insert"""
+        notification_doc.update(notification_dispatcher.outbox_fields(
+            notification_doc["channels"], notification_doc["created_at"]
+        ))
+        return notification_doc
+    
+    async def _send_notification(self, notification_doc: Dict[str, Any], db: AsyncIOMotorDatabase) -> None:
+        """Send notification through configured channels"""
+        # Real-time in-app delivery to connected /notifications/stream clients
+        notification_hub.publish(notification_doc)
+        
+        # Email/SMS/push are delivered by the dispatcher workers, never inside the request
+        notification_dispatcher.wake(notification_doc["pending_channels"])
+
+job_queue.register("citizen_notification", NotificationService().run_citizen_notification_job)
@@ -0,0 +1,339 @@
+"""
+Bulk re-scoring of existing grievances with the text classifier
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.services.counter_service import counter_service, COUNTED_FIELDS
+from app.services.auto_assignment_service import auto_assignment_service
+from app.services.user_resolver import UserNameResolver
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "reclassify_jobs"
+
+
+def _field_value(document: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted path (None when missing)"""
+    for part in path.split("."):
+        if not isinstance(document, dict):
+            return None
+        document = document.get(part)
+    return document
+
+
+def _snapshot_filter(before: Dict[str, Any]) -> Dict[str, Any]:
+    """Match a grievance only while its counted fields still hold the values that were read"""
+    return {"_id": before["_id"], **{field: _field_value(before, field) for field in COUNTED_FIELDS}}
+
+
+def _classify_batch(items: List[Tuple[str, str, str]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Classify (id, title, description) tuples inside a worker process"""
+    from app.services.text_classifier import text_classifier
+
+    results = []
+    for grievance_id, title, description in items:
+        ai_analysis = text_classifier.classify(title or "", description or "")
+        analysis = ai_analysis.dict()
+        analysis["auto_priority"] = ai_analysis.auto_priority.value if ai_analysis.auto_priority else None
+        results.append((grievance_id, analysis))
+    return results
+
+
+class ReclassificationService:
+    """Service for streaming grievances through the classifier in bulk"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _get_pool(self, workers: Optional[int]) -> ProcessPoolExecutor:
+        """Lazily create the shared process pool"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=workers or settings.RECLASSIFY_WORKERS)
+        return self._pool
+
+    def shutdown(self):
+        """Stop the process pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def create_job(
+        self,
+        db: AsyncIOMotorDatabase,
+        batch_size: Optional[int] = None,
+        apply_changes: bool = True,
+        reassign_pending: bool = False
+    ) -> Dict[str, Any]:
+        """Create a new reclassification job document"""
+        job_doc = {
+            "status": "queued",
+            "batch_size": batch_size or settings.RECLASSIFY_BATCH_SIZE,
+            "apply_changes": apply_changes,
+            "reassign_pending": reassign_pending,
+            "total": await db.grievances.estimated_document_count(),
+            "processed": 0,
+            "modified": 0,
+            "skipped": 0,
+            "last_id": None,
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+            "finished_at": None
+        }
+        result = await db[JOBS_COLLECTION].insert_one(job_doc)
+        job_doc["_id"] = str(result.inserted_id)
+        return job_doc
+
+    async def get_job(self, job_id: str, db: AsyncIOMotorDatabase) -> Optional[Dict[str, Any]]:
+        """Get job progress"""
+        job = await db[JOBS_COLLECTION].find_one({"_id": ObjectId(job_id)})
+        if not job:
+            return None
+        job["_id"] = str(job["_id"])
+        if job.get("last_id") is not None:
+            job["last_id"] = str(job["last_id"])
+        job["running"] = job_id in self._tasks and not self._tasks[job_id].done()
+        return job
+
+    def start_job(self, job_id: str, db: AsyncIOMotorDatabase, workers: Optional[int] = None) -> bool:
+        """Run a job in the background of the current event loop"""
+        if job_id in self._tasks and not self._tasks[job_id].done():
+            return False
+
+        task = asyncio.create_task(self.run_job(job_id, db, workers=workers))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda done: self._on_job_done(job_id, done))
+        return True
+
+    def _on_job_done(self, job_id: str, task: asyncio.Task):
+        """Forget finished jobs; failures are already recorded on the job document"""
+        self._tasks.pop(job_id, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def run_job(
+        self,
+        job_id: str,
+        db: AsyncIOMotorDatabase,
+        workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Stream grievances after the job's last_id, classify and write back"""
+        jobs = db[JOBS_COLLECTION]
+        job = await jobs.find_one({"_id": ObjectId(job_id)})
+        if not job:
+            raise ValueError(f"Reclassification job {job_id} not found")
+
+        pool = self._get_pool(workers)
+        loop = asyncio.get_running_loop()
+        chunks = workers or settings.RECLASSIFY_WORKERS or os.cpu_count() or 1
+        batch_size = job["batch_size"]
+        last_id = job.get("last_id")
+        processed = job.get("processed", 0)
+        modified = job.get("modified", 0)
+        skipped = job.get("skipped", 0)
+
+        await jobs.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "running", "error": None, "updated_at": datetime.utcnow()}}
+        )
+
+        next_batch_task: Optional[asyncio.Future] = None
+        try:
+            batch = await self._fetch_batch(db, last_id, batch_size)
+            while batch:
+                # Classify this batch across the pool while the next one is fetched
+                items = [(str(g["_id"]), g.get("title", ""), g.get("description", "")) for g in batch]
+                step = max(1, -(-len(items) // chunks))
+                futures = [
+                    loop.run_in_executor(pool, _classify_batch, items[i:i + step])
+                    for i in range(0, len(items), step)
+                ]
+                next_batch_task = asyncio.ensure_future(self._fetch_batch(db, batch[-1]["_id"], batch_size))
+                classified = [result for chunk in await asyncio.gather(*futures) for result in chunk]
+
+                previous = {str(g["_id"]): g for g in batch}
+                departments = await self._resolve_departments(classified, previous, job, db)
+                updates = [
+                    (previous[grievance_id], self._build_update(ai_analysis, departments.get(grievance_id), job))
+                    for grievance_id, ai_analysis in classified
+                ]
+                if updates:
+                    matched, batch_modified, written = await self._write_batch(updates, db)
+                    modified += batch_modified
+                    skipped += len(updates) - matched
+                    await self._notify_reassigned(written, db)
+
+                processed += len(batch)
+                last_id = batch[-1]["_id"]
+                await jobs.update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {
+                        "processed": processed,
+                        "modified": modified,
+                        "skipped": skipped,
+                        "last_id": last_id,
+                        "updated_at": datetime.utcnow()
+                    }}
+                )
+                if progress_callback:
+                    progress_callback({"processed": processed, "modified": modified, "skipped": skipped, "total": job["total"]})
+
+                batch = await next_batch_task
+
+            await jobs.update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": "completed", "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+            )
+            logger.info(
+                f"Reclassification job {job_id} completed: {processed} processed, {modified} modified, "
+                f"{skipped} skipped (edited while running)"
+            )
+
+        except Exception as e:
+            logger.error(f"Reclassification job {job_id} failed: {e}")
+            await jobs.update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+            )
+            raise
+
+        finally:
+            # A failed or cancelled batch leaves the prefetch of the next one behind
+            if next_batch_task is not None:
+                next_batch_task.cancel()
+                if next_batch_task.done() and not next_batch_task.cancelled():
+                    next_batch_task.exception()
+
+        return {"job_id": job_id, "processed": processed, "modified": modified, "skipped": skipped}
+
+    async def _fetch_batch(
+        self,
+        db: AsyncIOMotorDatabase,
+        last_id: Optional[ObjectId],
+        batch_size: int
+    ) -> List[Dict[str, Any]]:
+        """Fetch the next batch of grievances in _id order"""
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        cursor = db.grievances.find(
+            query,
+            {"title": 1, "description": 1, **COUNTED_FIELDS}
+        ).sort("_id", 1).limit(batch_size)
+        return await cursor.to_list(length=batch_size)
+
+    async def _write_batch(
+        self,
+        updates: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        db: AsyncIOMotorDatabase
+    ) -> Tuple[int, int, List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        """Apply a batch's updates with their counter changes; returns (matched, modified, written updates)
+
+        Each write re-checks the counted fields it was computed from, so a grievance edited
+        since the batch was read is left alone and its counters stay right. The batch token
+        that tells the written grievances apart is removed again in the same write.
+        """
+        batch_token = ObjectId()
+        operations = [
+            UpdateOne(_snapshot_filter(before), {"$set": {**update_data, "reclassify_batch": batch_token}})
+            for before, update_data in updates
+        ]
+        batch_filter = {"_id": {"$in": [before["_id"] for before, _ in updates]}, "reclassify_batch": batch_token}
+        outcome = {}
+
+        async def write(session):
+            result = await db.grievances.bulk_write(operations, ordered=False, session=session)
+            written = updates
+            if result.matched_count < len(operations):
+                written_ids = {
+                    g["_id"] async for g in db.grievances.find(batch_filter, {"_id": 1}, session=session)
+                }
+                written = [(before, update_data) for before, update_data in updates if before["_id"] in written_ids]
+            if result.matched_count:
+                await db.grievances.update_many(
+                    batch_filter, {"$unset": {"reclassify_batch": ""}}, session=session
+                )
+            outcome.update(result=result, written=written)
+            return [(before, {**before, **update_data}) for before, update_data in written]
+
+        await counter_service.record_write(db, write)
+        return outcome["result"].matched_count, outcome["result"].modified_count, outcome["written"]
+
+    async def _resolve_departments(
+        self,
+        classified: List[Tuple[str, Dict[str, Any]]],
+        previous: Dict[str, Dict[str, Any]],
+        job: Dict[str, Any],
+        db: AsyncIOMotorDatabase
+    ) -> Dict[str, str]:
+        """Existing departments for the pending grievances a reassigning job moves, by grievance id"""
+        if not job.get("reassign_pending"):
+            return {}
+        resolved: Dict[Tuple[Optional[str], Optional[str]], Optional[str]] = {}
+        departments = {}
+        for grievance_id, ai_analysis in classified:
+            if previous[grievance_id].get("status") != "pending":
+                continue
+            key = (ai_analysis.get("suggested_department"), ai_analysis.get("category"))
+            if key not in resolved:
+                resolved[key] = await auto_assignment_service.resolve_department(key[0], db, key[1])
+            if resolved[key]:
+                departments[grievance_id] = resolved[key]
+        return departments
+
+    def _build_update(
+        self,
+        ai_analysis: Dict[str, Any],
+        department: Optional[str],
+        job: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build the $set for one classified grievance"""
+        update_data = {"ai_analysis": ai_analysis, "updated_at": datetime.utcnow()}
+
+        if job.get("apply_changes"):
+            if ai_analysis["category"] != "other":
+                update_data["category"] = ai_analysis["category"]
+            if ai_analysis.get("auto_priority"):
+                update_data["priority"] = ai_analysis["auto_priority"]
+
+        if department:
+            update_data["assigned_department"] = department
+
+        return update_data
+
+    async def _notify_reassigned(self, updates: List[Tuple[Dict[str, Any], Dict[str, Any]]], db: AsyncIOMotorDatabase):
+        """Department notifications for grievances written with a new department, in one insert"""
+        moved = [
+            (before, update_data) for before, update_data in updates
+            if update_data.get("assigned_department") and update_data["assigned_department"] != before.get("assigned_department")
+        ]
+        if not moved:
+            return
+        try:
+            user_names = UserNameResolver(db)
+            await user_names.resolve(before.get("citizen_id") for before, _ in moved)
+            notifications = []
+            for before, update_data in moved:
+                notifications += await auto_assignment_service.notification_service.department_assignment_notifications(
+                    update_data["assigned_department"],
+                    str(before["_id"]),
+                    before.get("title", ""),
+                    user_names.name(before.get("citizen_id")),
+                    db
+                )
+            await auto_assignment_service.notification_service.insert_notifications(notifications, db)
+        except Exception as e:
+            logger.error(f"Error notifying departments about reassigned grievances: {e}")
+
+
+# Export singleton instance
+reclassification_service = ReclassificationService()
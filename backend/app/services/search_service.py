@@ -0,0 +1,189 @@
+"""
+Full-text search over grievances and departments, served by MongoDB text indexes
+"""
+
+import html
+import logging
+import re
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.models.grievance import GrievanceSearchHit
+
+logger = logging.getLogger(__name__)
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+# Only what a result row needs, plus the fields that are highlighted
+SEARCH_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "category": 1,
+    "priority": 1,
+    "status": 1,
+    "location.address": 1,
+    "location.landmark": 1,
+    "assigned_department": 1,
+    "created_at": 1,
+    "score": TEXT_SCORE
+}
+
+# Highlighted fields, in the order they are shown
+HIGHLIGHT_FIELDS = ["title", "description", "address", "landmark"]
+
+STEM_SUFFIXES = ("ing", "es", "ed", "s")
+
+WORD = re.compile(r"\w+")
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping, enough to line highlights up with the server's stemmed matches"""
+    for suffix in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _matches(word: str, stem: str) -> bool:
+    """Whether a word is the stem plus at most a short inflection"""
+    return word.startswith(stem) and len(word) - len(stem) <= 3
+
+
+def query_stems(search: str) -> List[str]:
+    """Stems of the terms a $text search matches on (negated terms excluded)"""
+    stems = []
+    for token in search.lower().split():
+        if token.startswith("-"):
+            continue
+        stems += [_stem(word) for word in WORD.findall(token)]
+    return [stem for stem in dict.fromkeys(stems) if len(stem) > 1]
+
+
+def highlight(text: Optional[str], stems: List[str], max_length: Optional[int] = None) -> Optional[str]:
+    """HTML-escaped text with matching words in <em>, cut to a window around the first match
+
+    Returns None when nothing in the text matches.
+    """
+    if not text or not stems:
+        return None
+    matches = [
+        m for m in WORD.finditer(text)
+        if any(_matches(m.group().lower(), stem) for stem in stems)
+    ]
+    if not matches:
+        return None
+
+    start, end = 0, len(text)
+    if max_length and len(text) > max_length:
+        start = max(0, matches[0].start() - max_length // 4)
+        end = min(len(text), start + max_length)
+        matches = [m for m in matches if m.end() <= end]
+
+    parts = ["…" if start > 0 else ""]
+    position = start
+    for m in matches:
+        parts.append(html.escape(text[position:m.start()]))
+        parts.append(f"<em>{html.escape(m.group())}</em>")
+        position = m.end()
+    parts.append(html.escape(text[position:end]))
+    parts.append("…" if end < len(text) else "")
+    return "".join(parts)
+
+
+class SearchService:
+    """Relevance-ranked $text queries with filters and highlighting"""
+
+    def grievance_query(
+        self,
+        search: str,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        priority: Optional[str] = None,
+        department: Optional[str] = None,
+        citizen_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """$text query with equality filters"""
+        query: Dict[str, Any] = {"$text": {"$search": search}}
+        if status:
+            query["status"] = status
+        if category:
+            query["category"] = category
+        if priority:
+            query["priority"] = priority
+        if department is not None:
+            query["assigned_department"] = department
+        if citizen_id is not None:
+            query["$or"] = [{"citizen_id": citizen_id}, {"supporters": citizen_id}]
+        return query
+
+    def to_hit(self, grievance: Dict[str, Any], stems: List[str]) -> GrievanceSearchHit:
+        """Search result for a projected grievance document"""
+        location = grievance.get("location") or {}
+        fields = {
+            "title": grievance.get("title"),
+            "description": grievance.get("description"),
+            "address": location.get("address"),
+            "landmark": location.get("landmark")
+        }
+        highlights = {}
+        for field in HIGHLIGHT_FIELDS:
+            snippet = highlight(
+                fields[field], stems,
+                settings.SEARCH_SNIPPET_LENGTH if field == "description" else None
+            )
+            if snippet:
+                highlights[field] = snippet
+        return GrievanceSearchHit(
+            id=str(grievance["_id"]),
+            title=grievance["title"],
+            category=grievance["category"],
+            priority=grievance["priority"],
+            status=grievance["status"],
+            address=location.get("address"),
+            landmark=location.get("landmark"),
+            assigned_department=grievance.get("assigned_department"),
+            created_at=grievance["created_at"],
+            score=round(grievance.get("score", 0.0), 4),
+            highlights=highlights
+        )
+
+    async def search_grievances(
+        self,
+        db: AsyncIOMotorDatabase,
+        search: str,
+        limit: int,
+        skip: int = 0,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        priority: Optional[str] = None,
+        department: Optional[str] = None,
+        citizen_id: Optional[str] = None
+    ) -> List[GrievanceSearchHit]:
+        """Grievances matching `search` in title, description, address or landmark, most relevant first"""
+        query = self.grievance_query(search, status, category, priority, department, citizen_id)
+        cursor = (
+            db.grievances.find(query, SEARCH_PROJECTION)
+            .sort([("score", TEXT_SCORE), ("created_at", -1)])
+            .skip(skip)
+            .limit(limit)
+        )
+        grievances = await cursor.to_list(length=limit)
+        stems = query_stems(search)
+        return [self.to_hit(g, stems) for g in grievances]
+
+    async def search_departments(
+        self,
+        db: AsyncIOMotorDatabase,
+        search: str,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Departments matching `search` in name, description, head or categories, most relevant first"""
+        query: Dict[str, Any] = {"$text": {"$search": search}}
+        if status:
+            query["status"] = status
+        cursor = db.departments.find(query, {"score": TEXT_SCORE}).sort([("score", TEXT_SCORE), ("name", 1)])
+        return await cursor.to_list(length=None)
+
+
+# Export singleton instance
+search_service = SearchService()
@@ -0,0 +1,89 @@
+"""
+Grievance statistics computed in a single aggregation per scope
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.models.grievance import GrievanceStatus
+
+logger = logging.getLogger(__name__)
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+def _group_count(field: str) -> List[Dict[str, Any]]:
+    """Facet branch counting documents per value of a field"""
+    return [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+
+
+def _to_counts(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Turn [{_id, count}] facet output into {value: count}"""
+    return {result["_id"]: result["count"] for result in results if result["_id"] is not None}
+
+
+class StatsService:
+    """Builds and runs the $facet statistics pipeline"""
+
+    def build_pipeline(self, match: Dict[str, Any], recent_since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Pipeline computing every grievance stat for the documents matching `match`"""
+        facets = {
+            "total": [{"$count": "count"}],
+            "by_status": _group_count("status"),
+            "by_category": _group_count("category"),
+            "by_priority": _group_count("priority"),
+            "by_department": [
+                {"$match": {"assigned_department": {"$ne": None}}},
+                *_group_count("assigned_department")
+            ],
+            "resolution": [
+                {"$match": {"status": "resolved", "resolved_at": {"$ne": None}, "created_at": {"$ne": None}}},
+                {"$group": {
+                    "_id": None,
+                    "avg_ms": {"$avg": {"$subtract": ["$resolved_at", "$created_at"]}}
+                }}
+            ]
+        }
+        if recent_since is not None:
+            facets["recent"] = [
+                {"$match": {"created_at": {"$gte": recent_since}}},
+                {"$count": "count"}
+            ]
+        return [{"$match": match}, {"$facet": facets}]
+
+    async def grievance_stats(
+        self,
+        db: AsyncIOMotorDatabase,
+        match: Optional[Dict[str, Any]] = None,
+        recent_since: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Status/category/priority/department counts and average resolution days in one round trip"""
+        pipeline = self.build_pipeline(match or {}, recent_since)
+        results = await db.grievances.aggregate(pipeline).to_list(length=1)
+        facets = results[0] if results else {}
+
+        by_status = _to_counts(facets.get("by_status", []))
+        resolution = facets.get("resolution") or [{}]
+        avg_ms = resolution[0].get("avg_ms")
+        total = facets.get("total") or [{}]
+        recent = facets.get("recent") or [{}]
+
+        stats = {
+            "total": total[0].get("count", 0),
+            "by_status": by_status,
+            "by_category": _to_counts(facets.get("by_category", [])),
+            "by_priority": _to_counts(facets.get("by_priority", [])),
+            "by_department": _to_counts(facets.get("by_department", [])),
+            "avg_resolution_time": round(avg_ms / MS_PER_DAY, 2) if avg_ms is not None else None
+        }
+        for grievance_status in GrievanceStatus:
+            stats[grievance_status.value] = by_status.get(grievance_status.value, 0)
+        if recent_since is not None:
+            stats["recent"] = recent[0].get("count", 0)
+        stats["resolution_rate"] = round(stats["resolved"] / stats["total"] * 100, 2) if stats["total"] else 0
+        return stats
+
+
+# Export singleton instance
+stats_service = StatsService()
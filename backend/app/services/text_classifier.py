@@ -0,0 +1,211 @@
+"""
+Compiled keyword classifier for grievance text
+"""
+
+import re
+from typing import Dict, List, Set, Tuple
+from app.models.grievance import AIAnalysis, GrievancePriority
+
+# Category keyword lists (order matters for tie-breaking and labels)
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "infrastructure": [
+        "pothole", "road", "street", "bridge", "sidewalk", "pavement",
+        "crack", "hole", "asphalt", "concrete", "damaged", "broken"
+    ],
+    "utilities": [
+        "street light", "lamp", "lighting", "power", "electricity",
+        "electrical", "pole", "utility pole", "electricity pole", "power pole",
+        "electric pole", "wire", "cable", "transformer", "outage", "blackout", "voltage",
+        "fuse", "electrical hazard", "fallen pole", "broken wire",
+        "exposed wire", "electrical emergency", "tangled", "hanging",
+        "dangerous", "hazard", "infrastructure", "utility", "power line",
+        "electrical line", "overhead", "downed", "electrical pole",
+        "water supply", "water", "pipe", "pipeline", "drainage", "sewer",
+        "water leak", "water shortage", "no water", "water problem"
+    ],
+    "transportation": [
+        "traffic", "signal", "sign", "parking", "bus stop", "intersection",
+        "stoplight", "pedestrian", "crossing"
+    ],
+    "environment": [
+        "garbage", "trash", "waste", "drainage", "sewer", "dirty",
+        "litter", "dumpster", "cleaning", "sanitation", "dumping",
+        "pollution", "environment", "green", "park", "public space"
+    ],
+    "safety": [
+        "accident", "danger", "hazard", "unsafe", "emergency", "fire",
+        "flood", "water", "puddle", "risk"
+    ],
+}
+
+# Utilities weighting tiers
+ELECTRICAL_POLE_KEYWORDS = {
+    "electricity pole", "utility pole", "power pole", "electrical pole", "fallen pole", "electric pole"
+}
+ELECTRICAL_KEYWORDS = {
+    "electricity", "electrical", "power", "wire", "cable", "transformer", "street light", "lighting"
+}
+WATER_UTILITY_KEYWORDS = {
+    "water supply", "water", "pipe", "pipeline", "water leak", "water shortage", "no water", "water problem"
+}
+POLE_CONTEXT_KEYWORDS = ["electric", "electrical", "power", "utility"]
+
+# Department routing hints
+WATER_DEPARTMENT_KEYWORDS = [
+    "water supply", "water", "pipe", "pipeline", "water leak", "water shortage",
+    "no water", "water problem", "drainage", "sewer"
+]
+ELECTRICAL_DEPARTMENT_KEYWORDS = [
+    "electricity", "electrical", "power", "street light", "lighting", "pole", "wire", "cable", "transformer"
+]
+
+DEPARTMENT_MAPPING = {
+    "infrastructure": "Public Works Department (PWD)",
+    "transportation": "Transport Department",
+    "environment": "Environment Department",
+    "safety": "Police Department",
+    "other": "Municipal Corporation"
+}
+
+HIGH_PRIORITY_CATEGORIES = ["safety", "utilities"]
+MEDIUM_PRIORITY_CATEGORIES = ["infrastructure", "transportation"]
+LOW_PRIORITY_CATEGORIES = ["environment", "other"]
+
+
+def _keyword_weight(category: str, keyword: str) -> int:
+    """Static weight of a keyword within a category (pole context handled separately)"""
+    if category == "infrastructure":
+        return 2 if keyword in ["broken", "damaged", "crack", "hole"] else 1
+    if category == "utilities":
+        if keyword in ELECTRICAL_POLE_KEYWORDS:
+            return 10
+        if keyword in ELECTRICAL_KEYWORDS:
+            return 5
+        if keyword in WATER_UTILITY_KEYWORDS:
+            return 3
+        return 1
+    if category == "environment":
+        return 3 if keyword in ["garbage", "trash", "waste", "dumping", "pollution"] else 2
+    return 1
+
+
+def _build_trie_pattern(terms: List[str]) -> str:
+    """Build a regex from a trie of terms so the engine only follows matching branches"""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def render(node: Dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail keeps the longest term starting at each position
+        if is_end:
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+class TextClassifier:
+    """Single-pass keyword classifier built once at import time"""
+
+    def __init__(self, category_keywords: Dict[str, List[str]] = CATEGORY_KEYWORDS):
+        self.category_keywords = category_keywords
+        self.categories = list(category_keywords.keys()) + ["other"]
+
+        # Per-term (category, weight) contributions, duplicates preserved
+        self._contributions: Dict[str, List[Tuple[str, int]]] = {}
+        for category, keywords in category_keywords.items():
+            for keyword in keywords:
+                self._contributions.setdefault(keyword, []).append(
+                    (category, _keyword_weight(category, keyword))
+                )
+
+        vocabulary: Set[str] = set()
+        for keywords in category_keywords.values():
+            vocabulary.update(keywords)
+        vocabulary.update(POLE_CONTEXT_KEYWORDS)
+        vocabulary.update(WATER_DEPARTMENT_KEYWORDS)
+        vocabulary.update(ELECTRICAL_DEPARTMENT_KEYWORDS)
+
+        # Zero-width lookahead visits every offset; the longest term found there implies its prefixes
+        self._pattern = re.compile("(?=(" + _build_trie_pattern(sorted(vocabulary)) + "))")
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            term: tuple(other for other in vocabulary if term.startswith(other))
+            for term in vocabulary
+        }
+
+    def find_terms(self, content: str) -> Set[str]:
+        """Return every vocabulary term occurring as a substring of content"""
+        hits: Set[str] = set()
+        seen: Set[str] = set()
+        for match in self._pattern.finditer(content):
+            term = match.group(1)
+            if term and term not in seen:
+                seen.add(term)
+                hits.update(self._prefixes[term])
+        return hits
+
+    def score(self, content: str) -> Tuple[Dict[str, int], Set[str]]:
+        """Score every category for already-lowercased content"""
+        hits = self.find_terms(content)
+        category_scores = {category: 0 for category in self.categories}
+
+        for term in hits:
+            for category, weight in self._contributions.get(term, ()):
+                if term == "pole" and category == "utilities":
+                    # Pole only counts as electrical with electrical context
+                    weight = 8 if any(word in hits for word in POLE_CONTEXT_KEYWORDS) else 1
+                category_scores[category] += weight
+
+        return category_scores, hits
+
+    def classify(self, title: str, description: str) -> AIAnalysis:
+        """Classify grievance text into category, priority and department"""
+        content = f"{title} {description}".lower()
+        category_scores, hits = self.score(content)
+
+        max_score = max(category_scores.values())
+        if max_score == 0:
+            category = "other"
+        else:
+            category = max(category_scores, key=category_scores.get)
+
+        return AIAnalysis(
+            category=category,
+            confidence=min(max_score / 10, 1.0),
+            labels=[f"{cat}:{score}" for cat, score in category_scores.items() if score > 0],
+            auto_priority=self.determine_priority(category),
+            suggested_department=self.suggest_department(category, hits)
+        )
+
+    def determine_priority(self, category: str) -> GrievancePriority:
+        """Determine priority based on category"""
+        if category in HIGH_PRIORITY_CATEGORIES:
+            return GrievancePriority.HIGH
+        elif category in MEDIUM_PRIORITY_CATEGORIES:
+            return GrievancePriority.MEDIUM
+        elif category in LOW_PRIORITY_CATEGORIES:
+            return GrievancePriority.LOW
+        return GrievancePriority.MEDIUM
+
+    def suggest_department(self, category: str, hits: Set[str]) -> str:
+        """Suggest department based on category and matched terms"""
+        if category == "utilities":
+            has_water_keywords = any(keyword in hits for keyword in WATER_DEPARTMENT_KEYWORDS)
+            has_electrical_keywords = any(keyword in hits for keyword in ELECTRICAL_DEPARTMENT_KEYWORDS)
+            if has_water_keywords and not has_electrical_keywords:
+                return "Water Supply Department"
+            return "Electricity Department"
+
+        return DEPARTMENT_MAPPING.get(category, "Municipal Corporation")
+
+
+# Export singleton instance
+text_classifier = TextClassifier()
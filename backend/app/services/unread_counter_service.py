@@ -0,0 +1,173 @@
+"""
+Per-user unread notification counters maintained with $inc on every write
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "notification_counters"
+
+
+class UnreadCounterService:
+    """{_id: user_id, unread} documents fronted by a short-TTL in-memory cache"""
+
+    def __init__(self):
+        self._cache: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._reconciler: Optional[asyncio.Task] = None
+        self.counters = {"hits": 0, "misses": 0, "reconciled": 0}
+
+    def _remember(self, user_id: str, unread: int):
+        """Cache a counter value read from or written to MongoDB"""
+        if settings.NOTIFICATION_UNREAD_CACHE_TTL <= 0:
+            return
+        self._cache[user_id] = (time.monotonic() + settings.NOTIFICATION_UNREAD_CACHE_TTL, max(unread, 0))
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > settings.NOTIFICATION_UNREAD_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def increment(self, db: AsyncIOMotorDatabase, user_id: str, amount: int = 1, session=None):
+        """Add (or with a negative amount, remove) unread notifications for a user"""
+        if not amount:
+            return
+        try:
+            doc = await db[COUNTERS_COLLECTION].find_one_and_update(
+                {"_id": user_id},
+                {"$inc": {"unread": amount}, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+                session=session
+            )
+            self._remember(user_id, doc["unread"])
+        except Exception as e:
+            # The notification write already happened; the reconciler repairs the counter
+            self._cache.pop(user_id, None)
+            logger.error(f"Error updating unread counter for user {user_id}: {e}")
+
+    async def increment_many(self, db: AsyncIOMotorDatabase, amounts: Dict[str, int], session=None):
+        """Apply several users' increments in one bulk write"""
+        operations = [
+            UpdateOne(
+                {"_id": user_id},
+                {"$inc": {"unread": amount}, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+            for user_id, amount in amounts.items() if amount
+        ]
+        for user_id in amounts:
+            self._cache.pop(user_id, None)
+        if operations:
+            try:
+                await db[COUNTERS_COLLECTION].bulk_write(operations, ordered=False, session=session)
+            except Exception as e:
+                logger.error(f"Error updating unread counters: {e}")
+
+    async def get(self, db: AsyncIOMotorDatabase, user_id: str) -> int:
+        """Unread count from the cache, the counter document, or (first time only) a count"""
+        entry = self._cache.get(user_id)
+        if entry is not None and entry[0] >= time.monotonic():
+            self._cache.move_to_end(user_id)
+            self.counters["hits"] += 1
+            return entry[1]
+        self.counters["misses"] += 1
+
+        doc = await db[COUNTERS_COLLECTION].find_one({"_id": user_id})
+        if doc is None:
+            # Users with no counter yet (e.g. created before counters existed)
+            unread = await db.notifications.count_documents({"user_id": user_id, "is_read": False})
+            doc = await db[COUNTERS_COLLECTION].find_one_and_update(
+                {"_id": user_id},
+                {"$setOnInsert": {"unread": unread, "updated_at": datetime.utcnow()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        unread = max(int(doc.get("unread", 0)), 0)
+        self._remember(user_id, unread)
+        return unread
+
+    async def reconcile(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Repair job: compare every counter with the unread notifications and fix drift"""
+        # Read the counters before counting, and only overwrite a counter that still
+        # holds the value read, so increments made meanwhile are never lost
+        stored = {
+            doc["_id"]: doc.get("unread", 0)
+            async for doc in db[COUNTERS_COLLECTION].find({}, {"unread": 1})
+        }
+        actual = {
+            row["_id"]: row["count"]
+            async for row in db.notifications.aggregate([
+                {"$match": {"is_read": False}},
+                {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+            ])
+            if row["_id"] is not None
+        }
+
+        operations = []
+        for user_id in set(stored) | set(actual):
+            expected = actual.get(user_id, 0)
+            if user_id in stored and stored[user_id] == expected:
+                continue
+            operations.append(UpdateOne(
+                {"_id": user_id, "unread": stored[user_id]} if user_id in stored else {"_id": user_id},
+                {"$set": {"unread": expected, "updated_at": datetime.utcnow()}},
+                upsert=user_id not in stored
+            ))
+            self._cache.pop(user_id, None)
+
+        fixed = 0
+        for i in range(0, len(operations), 1000):
+            try:
+                result = await db[COUNTERS_COLLECTION].bulk_write(operations[i:i + 1000], ordered=False)
+                fixed += result.modified_count + result.upserted_count
+            except Exception as e:
+                # A counter created concurrently makes its upsert collide; the next run retries it
+                logger.warning(f"Some notification counters were not reconciled: {e}")
+
+        self.counters["reconciled"] += fixed
+        if fixed:
+            logger.info(f"Reconciled {fixed} unread notification counters")
+        return {"checked": len(set(stored) | set(actual)), "fixed": fixed}
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start the periodic reconciler"""
+        if self._reconciler is None:
+            self._reconciler = asyncio.create_task(self._reconcile_periodically(db))
+
+    async def stop(self):
+        """Stop the periodic reconciler"""
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+            await asyncio.gather(self._reconciler, return_exceptions=True)
+            self._reconciler = None
+
+    async def _reconcile_periodically(self, db: AsyncIOMotorDatabase):
+        """Reconcile on startup, then every NOTIFICATION_COUNTER_RECONCILE_INTERVAL seconds (0: startup only)"""
+        while True:
+            try:
+                await self.reconcile(db)
+            except Exception as e:
+                logger.error(f"Error reconciling notification counters: {e}")
+            if settings.NOTIFICATION_COUNTER_RECONCILE_INTERVAL <= 0:
+                return
+            await asyncio.sleep(settings.NOTIFICATION_COUNTER_RECONCILE_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and size"""
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._cache)
+        }
+
+
+# Export singleton instance
+unread_counter_service = UnreadCounterService()
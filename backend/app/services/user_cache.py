@@ -0,0 +1,93 @@
+"""
+Short-lived cache of authenticated users for get_current_user
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from app.core.config import settings
+from app.models.user import UserResponse
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, Optional[str]]
+
+
+class UserCache:
+    """TTL + LRU cache of UserResponse keyed by (user id, token jti)"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or settings.USER_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.USER_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[CacheKey, Tuple[float, UserResponse]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[CacheKey]] = {}
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, user_id: str, jti: Optional[str] = None) -> Optional[UserResponse]:
+        """Return the cached user for this token, if still fresh"""
+        key = (user_id, jti)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return user
+            self._discard(key)
+        self.counters["misses"] += 1
+        return None
+
+    def set(self, user_id: str, jti: Optional[str], user: UserResponse):
+        """Cache a freshly loaded user"""
+        if self.ttl_seconds <= 0:
+            return
+        key = (user_id, jti)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(key)
+        self._keys_by_user.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.counters["evictions"] += 1
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached token of a user, e.g. after a role/department/status change"""
+        keys = self._keys_by_user.pop(user_id, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        if keys:
+            self.counters["invalidations"] += 1
+
+    def invalidate_token(self, user_id: str, jti: Optional[str]):
+        """Drop one token's entry"""
+        self._discard((user_id, jti))
+
+    def clear(self):
+        """Drop everything"""
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def _discard(self, key: CacheKey):
+        """Remove an entry and its reverse index"""
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size"""
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Export singleton instance
+user_cache = UserCache()
@@ -0,0 +1,51 @@
+"""
+Batched user name resolution for listing endpoints
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_USER_NAME = "Unknown"
+
+
+class UserNameResolver:
+    """Resolves user ids to full names with one $in query per batch, cached for its lifetime"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._names: Dict[str, str] = {}
+
+    async def resolve(self, user_ids: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Return {user_id: full_name} for the given ids, fetching only unseen ones"""
+        wanted = {str(user_id) for user_id in user_ids if user_id}
+        missing = [user_id for user_id in wanted if user_id not in self._names]
+
+        object_ids = [ObjectId(user_id) for user_id in missing if ObjectId.is_valid(user_id)]
+        if object_ids:
+            try:
+                cursor = self.db.users.find({"_id": {"$in": object_ids}}, {"full_name": 1})
+                async for user in cursor:
+                    self._names[str(user["_id"])] = user.get("full_name") or UNKNOWN_USER_NAME
+            except Exception as e:
+                logger.error(f"Error resolving user names: {e}")
+
+        # Remember misses too so a page with deleted users doesn't re-query them
+        for user_id in missing:
+            self._names.setdefault(user_id, UNKNOWN_USER_NAME)
+
+        return {user_id: self._names[user_id] for user_id in wanted}
+
+    async def get_name(self, user_id: Optional[str]) -> str:
+        """Resolve a single user id"""
+        if not user_id:
+            return UNKNOWN_USER_NAME
+        names = await self.resolve([user_id])
+        return names[str(user_id)]
+
+    def name(self, user_id: Optional[str]) -> str:
+        """Name of an already resolved id"""
+        return self._names.get(str(user_id), UNKNOWN_USER_NAME) if user_id else UNKNOWN_USER_NAME
@@ -0,0 +1,66 @@
+"""
+Text classifier benchmark for Civic Connect
+Replays the golden corpus against the compiled classifier, asserts every
+result matches the recorded output of the previous per-keyword scan, and
+reports classification throughput
+"""
+
+import argparse
+import json
+import sys
+import os
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.text_classifier import text_classifier
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classifier_corpus.json")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Check the classifier against its golden corpus and time it")
+    parser.add_argument("--texts", type=int, default=100_000, help="Descriptions classified for the throughput run")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Golden corpus (cases with expected outputs)")
+    return parser.parse_args()
+
+
+def _result(title: str, description: str) -> dict:
+    """Classifier output in the corpus's recorded form"""
+    analysis = text_classifier.classify(title, description)
+    return {
+        "category": analysis.category,
+        "confidence": analysis.confidence,
+        "labels": analysis.labels,
+        "auto_priority": analysis.auto_priority.value,
+        "suggested_department": analysis.suggested_department
+    }
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+    with open(args.corpus) as f:
+        cases = json.load(f)["cases"]
+
+    mismatches = []
+    for case in cases:
+        actual = _result(case["title"], case["description"])
+        if actual != case["expected"]:
+            mismatches.append((case, actual))
+    for case, actual in mismatches[:10]:
+        print(f"   ✗ {case['title']!r} / {case['description']!r}\n     expected {case['expected']}\n     got      {actual}")
+    print(f"🧪 {len(cases) - len(mismatches)}/{len(cases)} golden cases match")
+    assert not mismatches, f"{len(mismatches)} golden cases differ from the recorded output"
+
+    texts = [(cases[i % len(cases)]["title"], cases[i % len(cases)]["description"]) for i in range(args.texts)]
+    started = time.perf_counter()
+    for title, description in texts:
+        text_classifier.classify(title, description)
+    elapsed = time.perf_counter() - started
+    print(f"⚡ {args.texts} descriptions in {elapsed:.2f}s ({args.texts / elapsed:,.0f}/s, {elapsed / args.texts * 1e6:.1f}µs each)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Duplicate detection benchmark for Civic Connect
+Scores hand-labelled report pairs the way DuplicateDetector does (same classified
+category and department, then word-set similarity), asserts no false positive at
+DUPLICATE_SIMILARITY_THRESHOLD, and prints precision and recall per threshold
+"""
+
+import argparse
+import json
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.services.duplicate_detector import issue_for, shingles_for, similarity
+
+PAIRS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "duplicate_pairs.json")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Check duplicate detection against labelled report pairs")
+    parser.add_argument("--pairs", default=PAIRS_PATH, help="Labelled pairs (title, description) with a duplicate flag")
+    parser.add_argument("--threshold", type=float, default=settings.DUPLICATE_SIMILARITY_THRESHOLD, help="Threshold to check")
+    return parser.parse_args()
+
+
+def _score(pair: dict) -> float:
+    """Similarity the detector would see, 0 when the classifier files the reports apart"""
+    if issue_for(*pair["first"]) != issue_for(*pair["second"]):
+        return 0.0
+    return similarity(shingles_for(*pair["first"]), shingles_for(*pair["second"]))
+
+
+def main():
+    """Main benchmark function"""
+    args = parse_args()
+    with open(args.pairs) as f:
+        pairs = json.load(f)["pairs"]
+
+    scored = sorted(((_score(pair), pair) for pair in pairs), key=lambda item: item[0])
+    for score, pair in scored:
+        print(f"   {'dup' if pair['duplicate'] else '   '} {score:.3f}  {pair['first'][0]!r} / {pair['second'][0]!r}")
+
+    duplicates = sum(1 for pair in pairs if pair["duplicate"])
+    print(f"\n🔎 {len(pairs)} pairs, {duplicates} duplicates")
+    for threshold in sorted({0.4, 0.5, 0.6, 0.65, 0.7, 0.8, args.threshold}):
+        attached = [pair for score, pair in scored if score >= threshold]
+        correct = sum(1 for pair in attached if pair["duplicate"])
+        precision = correct / len(attached) if attached else 1.0
+        marker = "  ◀ configured" if threshold == args.threshold else ""
+        print(f"   threshold {threshold:.2f}: precision {precision:.2f}, recall {correct / duplicates:.2f}{marker}")
+
+    wrong = [pair for score, pair in scored if score >= args.threshold and not pair["duplicate"]]
+    assert not wrong, f"{len(wrong)} different issues would be attached at {args.threshold}"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Map query benchmark for Civic Connect
+Seeds a scratch database with city-scale synthetic grievances and times
+the nearby and bounding-box queries
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+from app.core.indexes import ensure_indexes
+from app.models.grievance import GrievanceCategory, GrievanceStatus, GrievancePriority
+from app.services.geo_service import geo_service, decode_nearby_cursor
+
+# Bengaluru city centre, [longitude, latitude]
+CITY_CENTER = (77.5946, 12.9716)
+CITY_RADIUS_DEGREES = 0.15  # ~16 km
+
+METERS_PER_DEGREE = 111_320
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Time nearby and bounding-box queries on synthetic city data")
+    parser.add_argument("--points", type=int, default=1_000_000, help="Synthetic grievances to seed")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per measurement")
+    parser.add_argument("--radius", type=float, default=1000, help="Nearby radius in meters")
+    parser.add_argument("--limit", type=int, default=50, help="Results per page")
+    parser.add_argument("--database", default="civic_connect_geo_benchmark", help="Scratch database")
+    parser.add_argument("--reuse", action="store_true", help="Keep an already seeded database")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    return parser.parse_args()
+
+
+def _random_point(rng: random.Random):
+    """A point clustered around neighbourhood centres, like real reports"""
+    angle = rng.uniform(0, 2 * math.pi)
+    distance = abs(rng.gauss(0, CITY_RADIUS_DEGREES / 2))
+    return [
+        round(CITY_CENTER[0] + distance * math.cos(angle), 6),
+        round(CITY_CENTER[1] + distance * math.sin(angle), 6)
+    ]
+
+
+async def _seed(db, points: int, rng: random.Random, batch_size: int = 10_000):
+    """Insert `points` grievances with the fields map queries touch"""
+    categories = [c.value for c in GrievanceCategory]
+    statuses = [s.value for s in GrievanceStatus]
+    priorities = [p.value for p in GrievancePriority]
+    started_at = datetime.utcnow() - timedelta(days=365)
+
+    inserted = 0
+    while inserted < points:
+        batch = []
+        for _ in range(min(batch_size, points - inserted)):
+            batch.append({
+                "title": "Synthetic grievance",
+                "description": "Synthetic grievance for the map query benchmark",
+                "category": rng.choice(categories),
+                "priority": rng.choice(priorities),
+                "status": rng.choice(statuses),
+                "location": {"address": "Synthetic", "city": "Bengaluru", "state": "Karnataka",
+                             "coordinates": _random_point(rng)},
+                "citizen_id": "benchmark",
+                "assigned_department": "Municipal Corporation",
+                "created_at": started_at + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            })
+        await db.grievances.insert_many(batch, ordered=False)
+        inserted += len(batch)
+        print(f"   seeded {inserted}/{points}", end="\r", flush=True)
+    print()
+
+
+def _report(label: str, timings):
+    """Print latency percentiles in milliseconds"""
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1000
+    p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000
+    print(f"   {label:<28} p50 {p50:7.2f}ms   p95 {p95:7.2f}ms   max {timings[-1] * 1000:7.2f}ms")
+
+
+async def main():
+    """Main benchmark function"""
+    args = parse_args()
+    rng = random.Random(args.seed)
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[args.database]
+
+    try:
+        if not args.reuse or await db.grievances.estimated_document_count() == 0:
+            await client.drop_database(args.database)
+            print(f"🌱 Seeding {args.points} grievances around {CITY_CENTER}")
+            await _seed(db, args.points, rng)
+        await ensure_indexes(db)
+        total = await db.grievances.estimated_document_count()
+        print(f"🗺️  {total} grievances, {args.queries} queries each, radius {args.radius:.0f}m, {args.limit} per page")
+
+        first_pages, next_pages, filtered, boxes = [], [], [], []
+        half_box = args.radius / METERS_PER_DEGREE
+        for _ in range(args.queries):
+            lng, lat = _random_point(rng)
+
+            started = time.perf_counter()
+            _, cursor = await geo_service.nearby(db, lng, lat, args.radius, args.limit)
+            first_pages.append(time.perf_counter() - started)
+
+            if cursor:
+                started = time.perf_counter()
+                await geo_service.nearby(db, lng, lat, args.radius, args.limit, position=decode_nearby_cursor(cursor))
+                next_pages.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await geo_service.nearby(
+                db, lng, lat, args.radius, args.limit,
+                status=GrievanceStatus.PENDING.value, category=GrievanceCategory.INFRASTRUCTURE.value
+            )
+            filtered.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await geo_service.within_box(
+                db, lng - half_box, lat - half_box, lng + half_box, lat + half_box, args.limit
+            )
+            boxes.append(time.perf_counter() - started)
+
+        _report("nearby, first page", first_pages)
+        if next_pages:
+            _report("nearby, next page", next_pages)
+        _report("nearby, status + category", filtered)
+        _report("bounding box, newest first", boxes)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+"""
+Grievance creation benchmark for Civic Connect
+Counts the MongoDB writes per created grievance and measures creation throughput
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from app.core.config import settings
+from app.core.indexes import ensure_indexes
+from app.models.grievance import GrievanceCreate
+from app.models.user import UserResponse
+from app.api.v1.endpoints.grievances import create_grievance
+from app.services.auto_assignment_service import auto_assignment_service
+from app.services.counter_service import counter_service
+from app.services.text_classifier import DEPARTMENT_MAPPING
+
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+# Grievance, dashboard counters (map cells included), notifications, unread counters
+EXPECTED_WRITES_STANDALONE = 4
+# Map cells are a second counter write there, after the dashboard counters' transaction commits
+EXPECTED_WRITES_REPLICA_SET = 5
+
+SAMPLE_GRIEVANCES = [
+    ("Pothole on main road", "Large pothole near the bus stop is damaging vehicles"),
+    ("No water supply", "No water in our area since two days, pipeline leak suspected"),
+    ("Street light not working", "The street light near the park has been off for a week"),
+    ("Garbage not collected", "Trash and waste piling up near the market"),
+]
+
+
+async def expected_writes_per_grievance(db) -> int:
+    """Writes per created grievance on this deployment"""
+    if await counter_service._supports_transactions(db):
+        return EXPECTED_WRITES_REPLICA_SET
+    return EXPECTED_WRITES_STANDALONE
+
+
+class WriteCounter(monitoring.CommandListener):
+    """Counts write commands per collection"""
+
+    def __init__(self):
+        self.writes: Counter = Counter()
+
+    def started(self, event):
+        if event.command_name in WRITE_COMMANDS:
+            self.writes[event.command[event.command_name]] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Count writes per grievance and measure creation throughput")
+    parser.add_argument("--grievances", type=int, default=200, help="Grievances created per run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent creations")
+    parser.add_argument("--database", default="civic_connect_benchmark", help="Scratch database (dropped first)")
+    return parser.parse_args()
+
+
+async def _seed(db):
+    """Departments with one head each, and the citizen filing the grievances"""
+    now = datetime.utcnow()
+    departments = sorted(set(DEPARTMENT_MAPPING.values()) | {"Water Supply Department", "Electricity Department"})
+    await db.departments.insert_many([{"name": name, "created_at": now} for name in departments])
+    await db.users.insert_many([
+        {"email": f"head{i}@example.com", "full_name": f"Head {i}", "role": "department_head",
+         "department": name, "status": "active", "created_at": now}
+        for i, name in enumerate(departments)
+    ])
+    result = await db.users.insert_one({
+        "email": "citizen@example.com", "full_name": "Benchmark Citizen", "role": "citizen",
+        "status": "active", "created_at": now
+    })
+    return UserResponse(
+        id=str(result.inserted_id), email="citizen@example.com", full_name="Benchmark Citizen",
+        role="citizen", created_at=now, updated_at=now
+    )
+
+
+async def _create_before(grievance_data: GrievanceCreate, citizen: UserResponse, db):
+    """The previous pipeline: insert, then assign (re-read and update), then two notification inserts"""
+    grievance_doc = {
+        "title": grievance_data.title, "description": grievance_data.description,
+        "category": grievance_data.category.value, "priority": grievance_data.priority.value,
+        "location": grievance_data.location.dict(), "images": [], "citizen_id": citizen.id,
+        "status": "pending", "assigned_department": None, "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(), "ai_analysis": None, "comments": []
+    }
+    grievance_id = str(await counter_service.insert_grievance(db, grievance_doc))
+    await auto_assignment_service.analyze_and_assign_grievance(
+        grievance_id, [], grievance_data.title, grievance_data.description, citizen.full_name, db
+    )
+    await auto_assignment_service.notification_service.create_citizen_notification(
+        citizen.id, grievance_id, "grievance_created", "Grievance Submitted Successfully",
+        f"Your grievance '{grievance_data.title}' has been submitted and is being processed.", db
+    )
+
+
+async def _create_after(grievance_data: GrievanceCreate, citizen: UserResponse, db):
+    """The create endpoint"""
+    await create_grievance(grievance_data, citizen, db)
+
+
+async def _run(label: str, create, args, citizen: UserResponse, db, listener: WriteCounter) -> float:
+    """Create args.grievances grievances and print throughput and writes per grievance"""
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def create_one(i: int):
+        title, description = SAMPLE_GRIEVANCES[i % len(SAMPLE_GRIEVANCES)]
+        grievance_data = GrievanceCreate(
+            title=title, description=description, category="other", priority="medium",
+            location={"address": "MG Road", "city": "Pune", "state": "Maharashtra",
+                      "coordinates": [73.85, 18.52]}
+        )
+        async with semaphore:
+            await create(grievance_data, citizen, db)
+
+    listener.writes.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(create_one(i) for i in range(args.grievances)))
+    elapsed = time.perf_counter() - started
+
+    per_grievance = sum(listener.writes.values()) / args.grievances
+    breakdown = ", ".join(f"{name} {count / args.grievances:.1f}" for name, count in listener.writes.most_common())
+    print(f"   {label:<7} {args.grievances / elapsed:8.1f} grievances/s   {per_grievance:5.1f} writes/grievance ({breakdown})")
+    return per_grievance
+
+
+async def main():
+    """Main benchmark function"""
+    args = parse_args()
+    # Every sample report is filed at the same spot; keep them separate grievances
+    settings.DUPLICATE_DETECTION_ENABLED = False
+    listener = WriteCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[listener])
+    await client.drop_database(args.database)
+    db = client[args.database]
+
+    try:
+        await ensure_indexes(db)
+        citizen = await _seed(db)
+        print(f"🏗️  {args.grievances} grievances, {args.concurrency} concurrent, database {args.database}")
+        await _run("before", _create_before, args, citizen, db, listener)
+        writes = await _run("after", _create_after, args, citizen, db, listener)
+        expected = await expected_writes_per_grievance(db)
+        assert writes == expected, f"expected {expected} writes per grievance, got {writes:.1f}"
+    finally:
+        await client.drop_database(args.database)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
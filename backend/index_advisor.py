@@ -0,0 +1,68 @@
+"""
+Index advisor script for Civic Connect
+Creates the registered indexes and explains every registered query shape
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.indexes import ensure_indexes, explain_query_shapes
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Report query shapes that scan collections or sort in memory")
+    parser.add_argument("--no-create", action="store_true", help="Only report, don't create missing indexes first")
+    return parser.parse_args()
+
+
+async def main():
+    """Main advisor function"""
+    args = parse_args()
+    try:
+        print("🔍 Running index advisor...")
+
+        # Connect to database
+        await connect_to_mongo()
+        db = get_database()
+
+        if not args.no_create:
+            await ensure_indexes(db)
+            print("📊 Registered indexes created")
+
+        report = await explain_query_shapes(db)
+
+        for entry in report["query_shapes"]:
+            if entry.get("error"):
+                print(f"   ❌ {entry['collection']}: {entry['name']} - {entry['error']}")
+                continue
+            problems = []
+            if entry["collscan"]:
+                problems.append("COLLSCAN")
+            if entry["in_memory_sort"]:
+                problems.append("in-memory SORT")
+            marker = "✅" if entry["ok"] else "⚠️ "
+            detail = ", ".join(problems) if problems else ", ".join(entry["indexes"])
+            print(f"   {marker} {entry['collection']}: {entry['name']} - {detail}")
+
+        if report["unregistered_indexes"]:
+            print("\n🧹 Indexes not in the registry (candidates to drop):")
+            for index in report["unregistered_indexes"]:
+                print(f"   - {index['collection']}.{index['index']}")
+
+        if report["problems"]:
+            print(f"\n⚠️  {len(report['problems'])} query shape(s) need attention")
+            sys.exit(1)
+        print("\n🎉 Every registered query shape is served by an index")
+
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
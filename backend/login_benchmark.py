@@ -0,0 +1,81 @@
+"""
+Login throughput benchmark for Civic Connect
+Compares bcrypt verification on the event loop with the password hashing pool
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.core.security import pwd_context, verify_and_update_password, shutdown_password_executor
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Measure concurrent login throughput and event loop stalls")
+    parser.add_argument("--logins", type=int, default=50, help="Concurrent login attempts per run")
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS, help="bcrypt cost of the stored hash")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="Password hashing threads")
+    return parser.parse_args()
+
+
+async def _watch_loop(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Longest delay between event loop ticks while the run is in progress"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _run(label: str, verify, logins: int, hashed: str):
+    """Run `logins` concurrent verifications and print throughput and worst loop stall"""
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_loop(stop))
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify("benchmark", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    stall = await watcher
+    assert all(results), "password verification failed"
+    print(f"   {label:<8} {logins / elapsed:8.1f} logins/s   {elapsed:6.2f}s total   worst loop stall {stall * 1000:8.1f}ms")
+
+
+async def _verify_inline(password: str, hashed: str) -> bool:
+    """What authenticate_user used to do: bcrypt directly on the event loop"""
+    return pwd_context.verify(password, hashed)
+
+
+async def _verify_pooled(password: str, hashed: str) -> bool:
+    """What authenticate_user does now"""
+    verified, _ = await verify_and_update_password(password, hashed)
+    return verified
+
+
+async def main():
+    """Main benchmark function"""
+    args = parse_args()
+    settings.PASSWORD_HASH_WORKERS = args.workers
+    # Same cost for the stored hash and the context, so no login triggers a rehash
+    pwd_context.update(bcrypt__rounds=args.rounds)
+    hashed = pwd_context.hash("benchmark")
+
+    print(f"🔐 {args.logins} concurrent logins, bcrypt cost {args.rounds}, {args.workers} hashing threads")
+    try:
+        await _run("inline", _verify_inline, args.logins, hashed)
+        await _run("pooled", _verify_pooled, args.logins, hashed)
+    finally:
+        shutdown_password_executor()
+
+if __name__ == "__main__":
+    asyncio.run(main())
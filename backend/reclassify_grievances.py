@@ -0,0 +1,80 @@
+"""
+Bulk reclassification script for Civic Connect
+Re-scores every grievance with the current text classifier
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.services.reclassification_service import reclassification_service
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Re-score existing grievances in bulk")
+    parser.add_argument("--batch-size", type=int, default=None, help="Grievances per batch")
+    parser.add_argument("--workers", type=int, default=None, help="Classifier worker processes")
+    parser.add_argument("--resume", metavar="JOB_ID", default=None, help="Resume a previous job from its last _id")
+    parser.add_argument("--analysis-only", action="store_true", help="Only rewrite ai_analysis, keep category/priority")
+    parser.add_argument("--reassign-pending", action="store_true", help="Move pending grievances to the suggested department")
+    return parser.parse_args()
+
+
+def print_progress(progress):
+    """Print a progress line"""
+    total = progress["total"] or 1
+    percent = min(progress["processed"] / total * 100, 100)
+    print(f"   {progress['processed']}/{progress['total']} ({percent:.1f}%) - {progress['modified']} modified, {progress['skipped']} skipped", flush=True)
+
+
+async def main():
+    """Main reclassification function"""
+    args = parse_args()
+    try:
+        print("🚀 Starting grievance reclassification...")
+
+        # Connect to database
+        await connect_to_mongo()
+        db = get_database()
+
+        if args.resume:
+            job = await reclassification_service.get_job(args.resume, db)
+            if not job:
+                print(f"❌ Job {args.resume} not found")
+                sys.exit(1)
+            print(f"↩️  Resuming job {job['_id']} after {job['last_id']} ({job['processed']} already processed)")
+        else:
+            job = await reclassification_service.create_job(
+                db,
+                batch_size=args.batch_size,
+                apply_changes=not args.analysis_only,
+                reassign_pending=args.reassign_pending
+            )
+            print(f"📋 Created job {job['_id']} for ~{job['total']} grievances")
+
+        result = await reclassification_service.run_job(
+            job["_id"],
+            db,
+            workers=args.workers,
+            progress_callback=print_progress
+        )
+
+        print(f"\n🎉 Reclassification completed: {result['processed']} processed, {result['modified']} modified, {result['skipped']} skipped")
+
+    except Exception as e:
+        print(f"❌ Reclassification failed: {e}")
+        if not args.resume:
+            print("   Re-run with --resume <job_id> to continue from the last processed grievance")
+        sys.exit(1)
+    finally:
+        reclassification_service.shutdown()
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
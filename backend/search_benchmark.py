@@ -0,0 +1,162 @@
+"""
+Full-text search benchmark for Civic Connect
+Seeds a scratch database with synthetic grievances and times $text search
+against the unanchored regex search it replaces
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+from app.core.indexes import ensure_indexes
+from app.models.grievance import GrievanceCategory, GrievanceStatus, GrievancePriority
+from app.services.search_service import search_service
+
+ISSUES = [
+    ("Pothole", "a deep pothole is damaging vehicles and causing accidents"),
+    ("Water leakage", "the water pipeline is leaking and wasting drinking water"),
+    ("Street light", "the street light has not been working for a week"),
+    ("Garbage", "garbage has not been collected and is piling up"),
+    ("Drainage overflow", "the drain is blocked and sewage is overflowing onto the road"),
+    ("Traffic signal", "the traffic signal is broken and causing jams at peak hours"),
+    ("Fallen tree", "a tree has fallen and is blocking the footpath"),
+    ("Stray dogs", "stray dogs are chasing children near the school"),
+    ("Noise pollution", "loudspeakers are playing late into the night"),
+    ("Broken footpath", "the footpath tiles are broken and unsafe for senior citizens"),
+]
+PLACES = ["MG Road", "Station Road", "Market Street", "Ring Road", "Lake View Colony",
+          "Gandhi Nagar", "Nehru Park", "Old Town", "Civil Lines", "Industrial Area"]
+LANDMARKS = ["bus stop", "temple", "government school", "railway station", "post office",
+             "city hospital", "water tank", "police chowki", "petrol pump", "vegetable market"]
+
+QUERIES = ["pothole", "water leakage", "street light", "garbage market", "sewage overflow",
+           "traffic signal", "fallen tree", "railway station", "school dogs", "broken footpath"]
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Time full-text grievance search on synthetic data")
+    parser.add_argument("--grievances", type=int, default=1_000_000, help="Synthetic grievances to seed")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per measurement")
+    parser.add_argument("--limit", type=int, default=20, help="Results per page")
+    parser.add_argument("--regex-queries", type=int, default=10, help="Queries for the regex baseline (0 skips it)")
+    parser.add_argument("--database", default="civic_connect_search_benchmark", help="Scratch database")
+    parser.add_argument("--reuse", action="store_true", help="Keep an already seeded database")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    return parser.parse_args()
+
+
+async def _seed(db, grievances: int, rng: random.Random, batch_size: int = 10_000):
+    """Insert `grievances` grievances with varied titles, descriptions, addresses and landmarks"""
+    categories = [c.value for c in GrievanceCategory]
+    statuses = [s.value for s in GrievanceStatus]
+    priorities = [p.value for p in GrievancePriority]
+    started_at = datetime.utcnow() - timedelta(days=365)
+
+    inserted = 0
+    while inserted < grievances:
+        batch = []
+        for _ in range(min(batch_size, grievances - inserted)):
+            title, detail = rng.choice(ISSUES)
+            place = rng.choice(PLACES)
+            landmark = rng.choice(LANDMARKS)
+            batch.append({
+                "title": f"{title} on {place}",
+                "description": f"Near the {landmark} {detail}. {rng.choice(ISSUES)[1].capitalize()} as well.",
+                "category": rng.choice(categories),
+                "priority": rng.choice(priorities),
+                "status": rng.choice(statuses),
+                "location": {"address": f"{rng.randint(1, 400)}, {place}", "city": "Bengaluru",
+                             "state": "Karnataka", "landmark": f"Opposite {landmark}",
+                             "coordinates": [77.5946, 12.9716]},
+                "citizen_id": "benchmark",
+                "assigned_department": "Municipal Corporation",
+                "created_at": started_at + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            })
+        await db.grievances.insert_many(batch, ordered=False)
+        inserted += len(batch)
+        print(f"   seeded {inserted}/{grievances}", end="\r", flush=True)
+    print()
+
+
+def _report(label: str, timings):
+    """Print latency percentiles in milliseconds"""
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1000
+    p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000
+    print(f"   {label:<28} p50 {p50:7.2f}ms   p95 {p95:7.2f}ms   max {timings[-1] * 1000:7.2f}ms")
+
+
+async def _regex_search(db, search: str, limit: int):
+    """The previous approach: case-insensitive unanchored regex on every searched field"""
+    query = {"$or": [
+        {"title": {"$regex": search, "$options": "i"}},
+        {"description": {"$regex": search, "$options": "i"}},
+        {"location.address": {"$regex": search, "$options": "i"}},
+        {"location.landmark": {"$regex": search, "$options": "i"}}
+    ]}
+    return await db.grievances.find(query).sort("created_at", -1).limit(limit).to_list(length=limit)
+
+
+async def main():
+    """Main benchmark function"""
+    args = parse_args()
+    rng = random.Random(args.seed)
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[args.database]
+
+    try:
+        if not args.reuse or await db.grievances.estimated_document_count() == 0:
+            await client.drop_database(args.database)
+            print(f"🌱 Seeding {args.grievances} grievances")
+            await _seed(db, args.grievances, rng)
+        started = time.perf_counter()
+        await ensure_indexes(db)
+        print(f"🗂️  Indexes ready in {time.perf_counter() - started:.1f}s")
+        total = await db.grievances.estimated_document_count()
+        print(f"🔎 {total} grievances, {args.queries} queries each, {args.limit} per page")
+
+        first_pages, filtered, deep_pages = [], [], []
+        for _ in range(args.queries):
+            search = rng.choice(QUERIES)
+
+            started = time.perf_counter()
+            await search_service.search_grievances(db, search, args.limit)
+            first_pages.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await search_service.search_grievances(
+                db, search, args.limit,
+                status=GrievanceStatus.PENDING.value, category=GrievanceCategory.INFRASTRUCTURE.value
+            )
+            filtered.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await search_service.search_grievances(db, search, args.limit, skip=settings.SEARCH_MAX_SKIP)
+            deep_pages.append(time.perf_counter() - started)
+
+        _report("text, first page", first_pages)
+        _report("text, status + category", filtered)
+        _report(f"text, skip {settings.SEARCH_MAX_SKIP}", deep_pages)
+
+        if args.regex_queries:
+            regex = []
+            for _ in range(args.regex_queries):
+                started = time.perf_counter()
+                await _regex_search(db, rng.choice(QUERIES), args.limit)
+                regex.append(time.perf_counter() - started)
+            _report("regex baseline, first page", regex)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -13,12 +13,13 @@ import random
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import connect_to_mongo, close_mongo_connection, get_database
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.models.department import DepartmentInDB, DepartmentResponse
 from app.models.user import UserCreate, UserRole, UserStatus
 from app.models.grievance import GrievanceCreate, GrievanceCategory, GrievancePriority, Location, ImageMetadata
 from app.services.auth_service import AuthService
 from app.services.auto_assignment_service import AutoAssignmentService
+from app.services.counter_service import counter_service
 
 # Indian-style demo data
 INDIAN_DEPARTMENTS = [
@@ -305,7 +306,7 @@ async def setup_indian_demo():
         created_users = {}
         for user_data in INDIAN_DEMO_USERS:
             try:
-                hashed_password = get_password_hash(user_data["password"])
+                hashed_password = await hash_password(user_data["password"])
                 user_doc = {
                     "email": user_data["email"],
                     "full_name": user_data["full_name"],
@@ -392,6 +393,10 @@ async def setup_indian_demo():
         
         print(f"✅ Created {len(SAMPLE_GRIEVANCES)} sample grievances")
         
+        # Seed data bypasses the API, so rebuild the dashboard counters from it
+        await counter_service.rebuild(db)
+        print("✅ Rebuilt grievance stats counters")
+        
         # Print summary
         print("\n🎉 Indian-style demo data setup completed successfully!")
         print("\n📋 Demo Accounts Created:")
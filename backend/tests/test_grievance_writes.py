@@ -0,0 +1,69 @@
+"""
+Counts the MongoDB writes made by the grievance create endpoint
+
+Needs a MongoDB server at TEST_MONGODB_URL (default MONGODB_URL); skipped without one.
+The scratch database is dropped before and after the test.
+"""
+
+import os
+import sys
+import unittest
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.core.indexes import ensure_indexes
+from app.models.grievance import GrievanceCreate
+from app.api.v1.endpoints.grievances import create_grievance
+from grievance_benchmark import SAMPLE_GRIEVANCES, WriteCounter, _seed, expected_writes_per_grievance
+
+TEST_DATABASE = "civic_connect_test_writes"
+
+
+class GrievanceWriteCountTest(unittest.IsolatedAsyncioTestCase):
+    """Writes per created grievance, as seen by a command listener"""
+
+    async def asyncSetUp(self):
+        url = os.getenv("TEST_MONGODB_URL", settings.MONGODB_URL)
+        self.listener = WriteCounter()
+        self.client = AsyncIOMotorClient(url, event_listeners=[self.listener], serverSelectionTimeoutMS=2000)
+        try:
+            await self.client.admin.command("ping")
+        except PyMongoError as e:
+            self.client.close()
+            self.skipTest(f"no MongoDB server at {url}: {e}")
+
+        # Every sample report is filed at the same spot; keep them separate grievances
+        self.duplicate_detection = settings.DUPLICATE_DETECTION_ENABLED
+        settings.DUPLICATE_DETECTION_ENABLED = False
+        await self.client.drop_database(TEST_DATABASE)
+        self.db = self.client[TEST_DATABASE]
+        await ensure_indexes(self.db)
+        self.citizen = await _seed(self.db)
+
+    async def asyncTearDown(self):
+        settings.DUPLICATE_DETECTION_ENABLED = self.duplicate_detection
+        await self.client.drop_database(TEST_DATABASE)
+        self.client.close()
+
+    async def test_create_grievance_writes(self):
+        expected = await expected_writes_per_grievance(self.db)
+        for title, description in SAMPLE_GRIEVANCES:
+            grievance_data = GrievanceCreate(
+                title=title, description=description, category="other", priority="medium",
+                location={"address": "MG Road", "city": "Pune", "state": "Maharashtra",
+                          "coordinates": [73.85, 18.52]}
+            )
+            self.listener.writes.clear()
+            await create_grievance(grievance_data, self.citizen, self.db)
+            self.assertEqual(
+                sum(self.listener.writes.values()), expected,
+                f"{title}: {dict(self.listener.writes)}"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()